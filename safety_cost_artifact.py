@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+컴파일된 카탈로그 색인 파일
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+카탈로그 저장소와 모든 검색 색인을 pickle 파일 하나로 저장해 두고, 앱 시작 시
+다시 만들지 않고 읽어 옵니다. 파일에는 형식 버전과 원본 소스 해시가 함께 기록되며,
+카탈로그·색인 소스가 바뀌면(해시 불일치) 자동으로 다시 만듭니다.
+
+빌드: python safety_cost_artifact.py [--force]
+
+색인 파일은 빌드 산출물이라 저장소에 넣지 않습니다(.gitignore). 파일이 없는 첫 실행에서는
+import 시 색인을 만들어(현재 카탈로그 기준 0.1~0.2초) 저장해 두므로 따로 빌드하지 않아도 동작합니다.
+배포 환경에서 첫 요청의 지연을 없애려면 배포 단계에서 위 빌드 명령을 실행해 둡니다.
+(개발 컨테이너는 .devcontainer/devcontainer.json 의 updateContentCommand 에서 실행)
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+
+# 저장 형식이 바뀌면 올립니다.
+ARTIFACT_VERSION = 1
+
+DEFAULT_PATH = Path(__file__).with_name("safety_cost_catalog.pkl")
+
+# 이 파일들의 내용이 색인 결과를 결정합니다.
+SOURCE_FILES = ("safety_cost_data.py", "safety_cost_search.py", "safety_cost_store.py")
+
+
+def source_hash():
+    """색인 소스 파일과 형식 버전, 파이썬 버전으로 만든 SHA-256 해시를 반환합니다."""
+    digest = hashlib.sha256(f"v{ARTIFACT_VERSION}|py{sys.version_info[0]}.{sys.version_info[1]}".encode())
+    base = Path(__file__).parent
+    for name in SOURCE_FILES:
+        digest.update(name.encode())
+        digest.update((base / name).read_bytes())
+    return digest.hexdigest()
+
+
+def load_artifact(path, expected_hash: str):
+    """색인 파일을 읽습니다. 없거나 손상됐거나 버전·해시가 다르면 None 을 반환합니다.
+
+    손상된 pickle 은 UnpicklingError 외에도 ValueError·KeyError·IndexError 등 여러 예외를 내므로
+    읽기 실패는 모두 "다시 빌드"로 처리합니다.
+    """
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except Exception:
+        return None
+    if (
+        not isinstance(payload, dict)
+        or payload.get("version") != ARTIFACT_VERSION
+        or payload.get("source_hash") != expected_hash
+    ):
+        return None
+    return payload["indexes"]
+
+
+def save_artifact(path, indexes, hash_value: str):
+    """색인을 임시 파일에 쓴 뒤 교체하여, 읽는 쪽이 쓰다 만 파일을 보지 않게 합니다."""
+    path = Path(path)
+    payload = {"version": ARTIFACT_VERSION, "source_hash": hash_value, "indexes": indexes}
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_or_build(build, path=DEFAULT_PATH):
+    """저장된 색인이 최신이면 읽어 오고, 아니면 build() 로 만든 뒤 저장합니다.
+
+    저장에 실패해도(읽기 전용 파일 시스템 등) 새로 만든 색인은 그대로 반환합니다.
+    """
+    hash_value = source_hash()
+    indexes = load_artifact(path, hash_value)
+    if indexes is not None:
+        return indexes
+    indexes = build()
+    try:
+        save_artifact(path, indexes, hash_value)
+    except OSError:
+        pass
+    return indexes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="카탈로그 검색 색인 파일 빌드")
+    parser.add_argument("--path", default=str(DEFAULT_PATH), help="색인 파일 경로")
+    parser.add_argument("--force", action="store_true", help="최신이어도 다시 빌드")
+    args = parser.parse_args(argv)
+
+    # safety_cost_data 는 import 시 기본 경로의 색인 파일을 확인·갱신합니다.
+    from safety_cost_data import build_indexes
+
+    hash_value = source_hash()
+    if not args.force and load_artifact(args.path, hash_value) is not None:
+        print(f"최신 상태입니다: {args.path} ({hash_value[:12]})")
+        return
+    save_artifact(args.path, build_indexes(), hash_value)
+    print(f"빌드 완료: {args.path} ({hash_value[:12]}, {Path(args.path).stat().st_size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,748 @@
+# -*- coding: utf-8 -*-
+"""
+안전관리비 검색·분류 성능 측정 스크립트
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+사용법: python safety_cost_bench.py [측정항목] [--size N]
+기본 카탈로그를 복제·변형한 합성 카탈로그로 현장별 대형 카탈로그를 흉내 냅니다.
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from bisect import bisect_right
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+import safety_cost_data
+from safety_cost_data import (
+    CATEGORIES,
+    CATEGORY_LEGAL_DETAILS,
+    ITEMS,
+    PROHIBITED_ITEMS,
+    catalog_documents,
+    classify_many,
+    search_items,
+)
+from safety_cost_boq import NO_MATCH, BoqMatcher, analyze, similarity
+from safety_cost_budget import CONSTRUCTION_TYPES, required_budget, required_budgets
+from safety_cost_crosscheck import CrossCheckIndex, ledger_keys
+from safety_cost_evidence import DEFAULT_MAX_DISTANCE, BandIndex, hamming_many
+from safety_cost_ledger import audit_many
+from safety_cost_rules import aggregate_caps, apply_recognition, as_dates, resolve_conditions
+from safety_cost_search import (
+    BigramIndex,
+    KeywordScanner,
+    SuffixAutomaton,
+    normalize_text,
+    normalize_words,
+    scan_documents,
+)
+from safety_cost_store import NO_ITEM, CatalogStore, Status
+
+# 현장별 카탈로그에서 흔히 붙는 수식어 (합성 데이터용)
+_SITE_WORDS = ["A동", "B동", "지하", "옥상", "1공구", "2공구", "교량", "터널", "임대", "교체용"]
+
+
+# ──────────────────────────────────────────────
+# 합성 데이터
+# ──────────────────────────────────────────────
+def synthetic_catalog(size: int, seed: int = 0):
+    """기본 카탈로그를 변형해 약 size 개 항목의 (ITEMS, PROHIBITED_ITEMS) 를 만듭니다."""
+    rng = random.Random(seed)
+    n_prohibited = max(1, size * len(PROHIBITED_ITEMS) // (len(ITEMS) + len(PROHIBITED_ITEMS)))
+    items, prohibited = [], []
+    for i in range(size - n_prohibited):
+        base = ITEMS[i % len(ITEMS)]
+        word = rng.choice(_SITE_WORDS)
+        items.append({
+            **base,
+            "name": f"{base['name']} ({word} {i})",
+            "keywords": [*base["keywords"], f"{word}{base['keywords'][0]}"],
+        })
+    for i in range(n_prohibited):
+        base = PROHIBITED_ITEMS[i % len(PROHIBITED_ITEMS)]
+        prohibited.append({**base, "name": f"{base['name']} ({i})"})
+    return items, prohibited
+
+
+def _fresh(text: str):
+    """파일에서 읽은 것처럼 같은 내용의 새 문자열 객체를 만듭니다."""
+    return text.encode().decode()
+
+
+def synthetic_rows(size: int):
+    """synthetic_catalog 와 같은 항목을 파일에서 한 줄씩 읽듯 새 dict 로 하나씩 만듭니다."""
+    items, prohibited = synthetic_catalog(size)
+
+    def rows(source):
+        for item in source:
+            yield {
+                key: [_fresh(kw) for kw in value] if key == "keywords"
+                else _fresh(value) if isinstance(value, str) else value
+                for key, value in item.items()
+            }
+    return rows(items), rows(prohibited)
+
+
+def sample_queries(count: int, seed: int = 0):
+    """키워드의 부분 문자열과 결과 없는 검색어를 섞은 검색어 목록을 만듭니다."""
+    rng = random.Random(seed)
+    words = [kw for item in (*ITEMS, *PROHIBITED_ITEMS) for kw in item["keywords"]]
+    queries = []
+    for _ in range(count):
+        word = rng.choice(words)
+        start = rng.randrange(len(word))
+        queries.append(word[start:start + rng.randint(1, 4)].lower())
+    queries.extend(["없는물품", "zzz", "안전", "마스크"])
+    return queries
+
+
+def _timeit(func, queries, repeat: int = 3):
+    """검색어 1건당 평균 소요 시간(µs)을 반환합니다. (최솟값 기준)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            func(query)
+        best = min(best, time.perf_counter() - start)
+    return best / len(queries) * 1e6
+
+
+# ──────────────────────────────────────────────
+# 측정 항목
+# ──────────────────────────────────────────────
+def bench_search(size: int):
+    """바이그램 역색인·접미사 오토마톤과 선형 검색의 결과 일치 여부와 속도를 비교합니다."""
+    items, prohibited = synthetic_catalog(size)
+    documents = catalog_documents(items, prohibited)
+    queries = sample_queries(500)
+
+    start = time.perf_counter()
+    bigram = BigramIndex(documents)
+    bigram_ms = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    automaton = SuffixAutomaton(documents)
+    automaton_ms = (time.perf_counter() - start) * 1e3
+
+    for query in queries:
+        expected = scan_documents(documents, query)
+        assert bigram.search(query) == expected, query
+        assert list(automaton.search(query)) == expected, query
+
+    linear_us = _timeit(lambda q: scan_documents(documents, q), queries)
+    bigram_us = _timeit(bigram.search, queries)
+    automaton_us = _timeit(automaton.search, queries)
+    print(f"[search] 항목 {len(documents):,}개, 검색어 {len(queries)}개 (결과 일치 확인)")
+    print(f"  색인 생성      바이그램 {bigram_ms:.1f} ms / 접미사 오토마톤 {automaton_ms:.1f} ms")
+    print(f"  선형 검색      {linear_us:10.1f} µs/건")
+    print(f"  바이그램 색인  {bigram_us:10.1f} µs/건  (x{linear_us / bigram_us:.1f})")
+    print(f"  접미사 오토마톤 {automaton_us:9.1f} µs/건  (x{linear_us / automaton_us:.1f})")
+
+
+def _assemble_results(doc_ids):
+    """(비교용) 예전 search_items 방식: 결과마다 새 dict 를 조립합니다."""
+    results = {"allowed": [], "conditional": [], "prohibited": []}
+    n_items = len(ITEMS)
+    for doc_id in doc_ids:
+        if doc_id < n_items:
+            item = ITEMS[doc_id]
+            cat = CATEGORIES[item["category"]]
+            results["allowed" if item["status"] == "allowed" else "conditional"].append({
+                "name": item["name"],
+                "status": item["status"],
+                "category_id": item["category"],
+                "category_name": cat["name"],
+                "note": item["note"],
+                "legal_basis": cat["legal_basis"],
+                "limit": cat.get("limit"),
+                "legal_detail": CATEGORY_LEGAL_DETAILS.get(item["category"], {}),
+            })
+            continue
+        item = PROHIBITED_ITEMS[doc_id - n_items]
+        results["prohibited"].append({
+            "name": item["name"],
+            "status": "prohibited",
+            "reason": item["reason"],
+            "category_id": None,
+            "category_name": "해당 없음",
+            "legal_detail": {
+                "상위법": "산업안전보건법 제72조",
+                "고시": "고용노동부고시 제2025-11호 제7조 (사용 불가 사항)",
+                "관련조항": [item["reason"]],
+            },
+        })
+    return results
+
+
+def _shared_results(doc_ids):
+    """현재 search_items 방식: 미리 만든 레코드의 참조만 튜플로 모읍니다."""
+    records = safety_cost_data._RESULT_RECORDS
+    status = safety_cost_data._DOC_STATUS
+    ranked = {"allowed": [], "conditional": [], "prohibited": []}
+    for doc_id in doc_ids:
+        ranked[status[doc_id]].append(records[doc_id])
+    return {key: tuple(values) for key, values in ranked.items()}
+
+
+def _allocated(func, inputs):
+    """func 결과를 모두 유지했을 때 새로 할당된 메모리(바이트)를 반환합니다."""
+    tracemalloc.start()
+    kept = [func(value) for value in inputs]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def bench_records(size: int):
+    """검색 결과 조립(레코드 공유 vs 매번 dict 생성)의 메모리 할당량과 속도를 비교합니다."""
+    engine = safety_cost_data.SEARCH_ENGINES["suffix"]
+    queries = sample_queries(2_000)
+    id_lists = [engine(query) for query in queries]
+    n_results = sum(len(ids) for ids in id_lists)
+
+    before_bytes = _allocated(_assemble_results, id_lists)
+    after_bytes = _allocated(_shared_results, id_lists)
+    before_us = _timeit(_assemble_results, id_lists)
+    after_us = _timeit(_shared_results, id_lists)
+    search_us = _timeit(search_items, queries)
+    print(f"[records] 검색어 {len(queries):,}개, 결과 {n_results:,}건")
+    print(f"  dict 조립      {before_bytes / 1024:10.1f} KiB  {before_us:8.2f} µs/건")
+    print(f"  레코드 공유    {after_bytes / 1024:10.1f} KiB  {after_us:8.2f} µs/건"
+          f"  (할당 x{before_bytes / max(after_bytes, 1):.1f} 감소)")
+    print(f"  search_items 전체 {search_us:8.2f} µs/건")
+
+
+def bench_store(size: int):
+    """dict 목록과 열 단위 CatalogStore 의 메모리 사용량과 순회 속도를 비교합니다."""
+    size = max(size, 100_000)
+
+    tracemalloc.start()
+    items, prohibited = (list(rows) for rows in synthetic_rows(size))
+    dict_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = CatalogStore(*synthetic_rows(size))
+    store_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def count_dicts():
+        counts = {}
+        for item in items:
+            if item["status"] == "allowed":
+                counts[item["category"]] = counts.get(item["category"], 0) + 1
+        return counts
+
+    def count_store():
+        counts = {}
+        allowed = Status.ALLOWED.value
+        for status, category in zip(store.statuses, store.categories):
+            if status == allowed:
+                counts[category] = counts.get(category, 0) + 1
+        return counts
+
+    def count_views():
+        counts = {}
+        for item in views:
+            if item.get("status") == "allowed":
+                counts[item["category"]] = counts.get(item["category"], 0) + 1
+        return counts
+
+    views = store.views()
+    # 호환 어댑터는 원래 dict 와 같은 키·값을 돌려줍니다.
+    assert [dict(view) for view in views] == [*items, *prohibited]
+    assert count_dicts() == count_store() == count_views()
+    dict_ms = _timeit(lambda _: count_dicts(), [None], repeat=5) / 1e3
+    store_ms = _timeit(lambda _: count_store(), [None], repeat=5) / 1e3
+    view_ms = _timeit(lambda _: count_views(), [None], repeat=5) / 1e3
+    print(f"[store] 합성 항목 {len(store):,}개")
+    print(f"  dict 목록      {dict_bytes / 2**20:8.1f} MiB  항목별 집계 {dict_ms:7.1f} ms")
+    print(f"  CatalogStore   {store_bytes / 2**20:8.1f} MiB  항목별 집계 {store_ms:7.1f} ms"
+          f"  (메모리 x{dict_bytes / store_bytes:.1f} 감소)")
+    print(f"  ItemView       {'-':>8}      항목별 집계 {view_ms:7.1f} ms  (dict 호환 어댑터)")
+
+
+def sample_invoice_lines(count: int, seed: int = 0):
+    """키워드 몇 개와 수량·규격 같은 잡음을 섞은 구매 내역 문장을 만듭니다."""
+    rng = random.Random(seed)
+    words = [kw for item in (*ITEMS, *PROHIBITED_ITEMS) for kw in item["keywords"]]
+    noise = ["외 2건", "10타", "3족", "(KS)", "/", "1식", "납품", "규격 L", "20EA", "현장용"]
+    return [
+        " ".join(rng.choice(words) if rng.random() < 0.4 else rng.choice(noise) for _ in range(rng.randint(3, 12)))
+        for _ in range(count)
+    ]
+
+
+def sample_purchase_lines(count: int, seed: int = 0, words=None):
+    """물품 하나(가끔 둘)에 수량·규격을 붙인 구입 내역 문장을 만듭니다. (도급내역 대조용)"""
+    rng = random.Random(seed)
+    words = words or [kw for item in (*ITEMS, *PROHIBITED_ITEMS) for kw in item["keywords"]]
+    units = ["개", "EA", "족", "타", "식", "박스", "세트", "롤", "M"]
+    lines = []
+    for _ in range(count):
+        parts = rng.sample(words, 2 if rng.random() < 0.2 else 1)
+        parts.append(f"{rng.randint(1, 500)}{rng.choice(units)}")
+        if rng.random() < 0.3:
+            parts.append(rng.choice(["현장용", "납품", "(KS)", "교체용"]))
+        lines.append(" ".join(parts))
+    return lines
+
+
+def bench_scan(size: int):
+    """키워드마다 부분 문자열 검사 vs Aho-Corasick 한 번 훑기로 구매 내역 문장을 스캔합니다."""
+    items, prohibited = synthetic_catalog(size)
+    documents = catalog_documents(items, prohibited)
+    patterns = [(keyword, doc_id) for doc_id, texts in enumerate(documents) for keyword in texts[1:]]
+    start = time.perf_counter()
+    scanner = KeywordScanner(patterns)
+    build_ms = (time.perf_counter() - start) * 1e3
+    keywords = scanner.keywords
+    lines = [normalize_text(line) for line in sample_invoice_lines(200)]
+
+    def naive(line):
+        return [keyword_id for keyword_id, keyword in enumerate(keywords) if keyword in line]
+
+    for line in lines:
+        assert sorted({keyword_id for _, _, keyword_id in scanner.scan(line)}) == naive(line), line
+    naive_us = _timeit(naive, lines, repeat=1)
+    scan_us = _timeit(scanner.scan, lines)
+    print(f"[scan] 키워드 {len(keywords):,}개, 문장 {len(lines)}개 (결과 일치 확인), 오토마톤 생성 {build_ms:.1f} ms")
+    print(f"  키워드별 검사  {naive_us:10.1f} µs/문장")
+    print(f"  Aho-Corasick   {scan_us:10.1f} µs/문장  (x{naive_us / scan_us:.1f})")
+
+
+def bench_classify(size: int):
+    """구매 내역 10만 줄을 줄마다 분류하는 경우와 classify_many 일괄 분류를 비교합니다."""
+    rng = random.Random(0)
+    distinct = sample_invoice_lines(20_000)
+    lines = [rng.choice(distinct) for _ in range(100_000)]
+
+    # 짧은 키워드가 긴 낱말의 일부로 걸리거나("캡모자"의 "캡") 부속품이 본품으로 분류되면 안 되며,
+    # 키워드가 없는 조각("임대", "자재")은 부분 일치로 물품을 지어내지 않습니다.
+    unmatched = ["캡모자", "물티슈", "노트북 파우치", "임대", "ㄱ", "a", "자재", "설치", "전"]
+    matched = ["생수 2박스", "안전모", "안전헬멧", "캡 10개", "pc 구입"]
+    result = classify_many(unmatched + matched)["item_id"]
+    assert list(result[:len(unmatched)]) == [NO_ITEM] * len(unmatched), list(result)
+    assert NO_ITEM not in result[len(unmatched):], list(result)
+
+    start = time.perf_counter()
+    batch = classify_many(lines)
+    batch_s = time.perf_counter() - start
+    start = time.perf_counter()
+    single = [classify_many([line]) for line in lines[:10_000]]
+    single_s = (time.perf_counter() - start) * len(lines) / 10_000
+    start = time.perf_counter()
+    for line in lines[:2_000]:
+        search_items(line)
+    search_s = (time.perf_counter() - start) * len(lines) / 2_000
+
+    assert list(batch["item_id"][:10_000]) == [result["item_id"][0] for result in single]
+    n_distinct = len({line for line in lines})
+    print(f"[classify] 구매 내역 {len(lines):,}줄 (서로 다른 줄 {n_distinct:,}개)")
+    print(f"  search_items 반복  {search_s:8.2f} s  (일부 측정 후 환산)")
+    print(f"  줄마다 분류        {single_s:8.2f} s  (일부 측정 후 환산)")
+    print(f"  classify_many      {batch_s:8.2f} s  (x{single_s / batch_s:.1f}, {len(lines) / batch_s:,.0f}줄/s)")
+
+
+def write_ledgers(folder, n_files: int, rows: int, seed: int = 0):
+    """합성 구매 내역으로 현장별 사용내역서 CSV 파일을 만들고 경로 목록을 반환합니다."""
+    rng = random.Random(seed)
+    distinct = sample_invoice_lines(5_000, seed)
+    paths = []
+    for site in range(n_files):
+        path = Path(folder) / f"현장{site + 1:03d}.csv"
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["사용일자", "품명", "금액"])
+            for i in range(rows):
+                writer.writerow([f"2025-{i % 12 + 1:02d}-01", rng.choice(distinct), rng.randint(1, 500) * 1000])
+        paths.append(path)
+    return paths
+
+
+def bench_parallel(size: int):
+    """현장별 사용내역서 여러 개를 search_items 반복 / audit_many 프로세스 수별로 점검합니다."""
+    n_files, rows = 16, 20_000
+    with tempfile.TemporaryDirectory() as folder:
+        paths = write_ledgers(folder, n_files, rows)
+        n_lines = n_files * rows
+
+        # 기준: 줄마다 search_items 를 호출하는 단일 프로세스 분류 (일부 측정 후 환산)
+        with open(paths[0], encoding="utf-8-sig", newline="") as f:
+            lines = [row[1] for row in islice(csv.reader(f), 1, 2_001)]
+        start = time.perf_counter()
+        for line in lines:
+            search_items(line)
+        search_s = (time.perf_counter() - start) * n_lines / len(lines)
+
+        print(f"[parallel] 사용내역서 {n_files}개 × {rows:,}줄 = {n_lines:,}줄, CPU {os.cpu_count()}개")
+        print(f"  search_items 반복   {search_s:8.2f} s  (일부 측정 후 환산)")
+        base_s = None
+        workers = 1
+        while True:
+            start = time.perf_counter()
+            result = audit_many(paths, workers=workers)
+            elapsed = time.perf_counter() - start
+            assert result["total"]["rows"] == n_lines and not result["errors"]
+            base_s = base_s or elapsed
+            print(f"  audit_many {workers:2d}프로세스 {elapsed:8.2f} s  "
+                  f"(1프로세스 대비 x{base_s / elapsed:.1f}, search_items 대비 x{search_s / elapsed:.1f})")
+            if workers >= (os.cpu_count() or 1):
+                break
+            workers = min(workers * 2, os.cpu_count())
+
+
+def bench_caps(size: int):
+    """현장·월·항목별 한도 집계: 줄마다 dict 누적 vs NumPy 묶음 집계 (200만 줄)"""
+    n = 2_000_000
+    rng = np.random.default_rng(0)
+    names = [f"현장{i:03d}" for i in range(200)]
+    sites = rng.integers(0, len(names), n)
+    budgets = {name: int(budget) for name, budget in zip(names, rng.integers(50, 500, len(names)) * 1_000_000)}
+    categories = rng.choice(np.array([-1, *CATEGORIES]), n)
+    amounts = rng.integers(1, 500, n) * 1000
+    days = rng.integers(date(2023, 1, 1).toordinal(), date(2026, 12, 31).toordinal(), n) - date(1970, 1, 1).toordinal()
+
+    start = time.perf_counter()
+    report = aggregate_caps(sites, categories, amounts, as_dates(days), period="month", budgets=budgets,
+                            site_names=names)
+    numpy_s = time.perf_counter() - start
+
+    def python_loop(count):
+        spend = defaultdict(Counter)
+        epoch = date(1970, 1, 1)
+        for site, category, amount, day in zip(sites[:count].tolist(), categories[:count].tolist(),
+                                               amounts[:count].tolist(), days[:count].tolist()):
+            if category >= 0:
+                month = (epoch + timedelta(days=day)).strftime("%Y-%m")
+                spend[site, month][category] += amount
+        return spend
+
+    sample = 200_000
+    start = time.perf_counter()
+    python_loop(sample)
+    python_s = (time.perf_counter() - start) * n / sample
+    breaches = sum(int(cap["breach"].sum()) for cap in report["caps"].values())
+    print(f"[caps] {n:,}줄 → 현장·월 묶음 {len(report['site']):,}개, 한도 초과 {breaches:,}건")
+    print(f"  줄마다 dict 누적  {python_s:8.2f} s  (일부 측정 후 환산)")
+    print(f"  NumPy 묶음 집계   {numpy_s:8.2f} s  (x{python_s / numpy_s:.1f})")
+
+
+def bench_recognition(size: int):
+    """경과조치 인정 비율 적용: 줄마다 bisect vs np.searchsorted 일괄 적용 (200만 줄, 4개 연도)"""
+    n = 2_000_000
+    rng = np.random.default_rng(0)
+    smart = safety_cost_data.CATALOG_STORE.names.index("스마트 안전장비")
+    item_ids = np.where(rng.random(n) < 0.3, smart, rng.integers(0, len(ITEMS), n))
+    amounts = rng.integers(1, 500, n) * 1000
+    days = rng.integers(date(2024, 1, 1).toordinal(), date(2027, 12, 31).toordinal(), n) - date(1970, 1, 1).toordinal()
+
+    start = time.perf_counter()
+    result = apply_recognition(item_ids, amounts, as_dates(days))
+    numpy_s = time.perf_counter() - start
+
+    periods = safety_cost_data.RECOGNITION_RATIOS["스마트 안전장비"]
+    starts = [date.fromisoformat(period["effective_from"]).toordinal() - date(1970, 1, 1).toordinal() for period in periods]
+
+    def python_loop(count):
+        recognized = []
+        for item_id, amount, day in zip(item_ids[:count].tolist(), amounts[:count].tolist(), days[:count].tolist()):
+            ratio = 1.0
+            if item_id == smart:
+                index = bisect_right(starts, day) - 1
+                ratio = periods[index]["ratio"] if index >= 0 else 0.0
+            recognized.append(int(amount * ratio))
+        return recognized
+
+    sample = 200_000
+    start = time.perf_counter()
+    expected = python_loop(sample)
+    python_s = (time.perf_counter() - start) * n / sample
+    assert expected == result["recognized"][:sample].tolist()
+    print(f"[recognition] {n:,}줄 (경과조치 대상 {int((item_ids == smart).sum()):,}줄), "
+          f"인정 금액 {int(result['recognized'].sum()):,}원 (결과 일치 확인)")
+    print(f"  줄마다 bisect     {python_s:8.2f} s  (일부 측정 후 환산)")
+    print(f"  np.searchsorted   {numpy_s:8.2f} s  (x{python_s / numpy_s:.1f})")
+
+
+def bench_budget(size: int):
+    """공사 10만 건 계상액: 공사마다 구간 분기 vs np.searchsorted 일괄 계산"""
+    n = 100_000
+    rng = np.random.default_rng(0)
+    kinds = rng.choice(np.array(CONSTRUCTION_TYPES), n)
+    targets = rng.integers(20_000_000, 20_000_000_000, n)
+
+    start = time.perf_counter()
+    result = required_budgets(kinds, targets)
+    numpy_s = time.perf_counter() - start
+
+    rates = safety_cost_data.ACCRUAL_RATES
+
+    def branching(kind, target):
+        table = rates[kind]
+        if target < 500_000_000:
+            bracket = 0
+        elif target < 5_000_000_000:
+            bracket = 1
+        else:
+            bracket = 2
+        return target * round(table["rates"][bracket] * 100) // 10_000 + table["base"][bracket]
+
+    start = time.perf_counter()
+    expected = [branching(kind, target) for kind, target in zip(kinds.tolist(), targets.tolist())]
+    python_s = time.perf_counter() - start
+    assert expected == result["amount"].tolist()
+
+    # 대상액 미구분(총 공사금액의 70%)도 원 단위까지 정확해야 합니다. (부동소수점이면 2,099,999,999원)
+    fallback = required_budget("건축공사", contract=3_000_000_000)
+    assert (fallback["target"], fallback["amount"]) == (2_100_000_000, 52_205_000), fallback
+    contracts = rng.integers(20_000_000, 20_000_000_000, 10_000)
+    fallback = required_budgets(kinds[:10_000], contracts=contracts, health_manager=np.zeros(10_000, dtype=bool))
+    assert [branching(kind, contract * 7 // 10) for kind, contract in zip(kinds[:10_000].tolist(), contracts.tolist())] \
+        == fallback["amount"].tolist()
+    print(f"[budget] 공사 {n:,}건, 계상액 합계 {int(result['amount'].sum()):,}원 (결과 일치 확인)")
+    print(f"  공사마다 분기     {python_s * 1e3:8.1f} ms")
+    print(f"  np.searchsorted   {numpy_s * 1e3:8.1f} ms  (x{python_s / numpy_s:.1f})")
+
+
+def bench_evidence(size: int):
+    """증빙 사진 20만 장 유사 쌍 찾기: 모든 쌍 해밍 거리 vs LSH 버킷 (해시만 합성, 1%는 다른 현장 복사본)"""
+    n = 200_000
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, 2**64, n, dtype=np.uint64)
+    # 복사본: 원본 해시에서 0~DEFAULT_MAX_DISTANCE 비트를 뒤집습니다.
+    copies = rng.choice(n, n // 100, replace=False)
+    sources = rng.choice(np.setdiff1d(np.arange(n), copies), len(copies), replace=False)
+    for copy, source in zip(copies.tolist(), sources.tolist()):
+        flipped = int(hashes[source])
+        for bit in rng.choice(64, rng.integers(0, DEFAULT_MAX_DISTANCE + 1), replace=False).tolist():
+            flipped ^= 1 << bit
+        hashes[copy] = flipped
+
+    start = time.perf_counter()
+    left, right, _ = BandIndex(hashes).pairs(np.arange(n), DEFAULT_MAX_DISTANCE)
+    lsh_s = time.perf_counter() - start
+    found = set(zip(left.tolist(), right.tolist()))
+    planted = {tuple(sorted(pair)) for pair in zip(copies.tolist(), sources.tolist())}
+    assert planted <= found
+
+    # 모든 쌍: 사진 하나를 나머지 전체와 XOR·비트 세기 (일부 측정 후 환산)
+    sample = 200
+    start = time.perf_counter()
+    for value in hashes[:sample]:
+        hamming_many(hashes, value) <= DEFAULT_MAX_DISTANCE
+    pairs_s = (time.perf_counter() - start) * n / sample / 2
+    print(f"[evidence] 사진 {n:,}장, 유사 쌍 {len(found):,}개 (심어 둔 복사본 {len(planted):,}쌍 모두 찾음)")
+    print(f"  모든 쌍 비교 (NumPy) {pairs_s:8.2f} s  (일부 측정 후 환산)")
+    print(f"  LSH 버킷 탐색        {lsh_s:8.2f} s  (x{pairs_s / lsh_s:.1f})")
+
+
+def bench_crosscheck(size: int):
+    """현장 40개 × 5,000줄 누적 후 새 내역서 대조: 전체 다시 읽어 해시 조인 vs 누적 색인 증분 대조"""
+    n_files, rows = 40, 5_000
+    rng = random.Random(0)
+    distinct = sample_invoice_lines(5_000)
+    issued = []
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        for site in range(n_files):
+            path = Path(folder) / f"현장{site + 1:03d}.csv"
+            with open(path, "w", encoding="utf-8-sig", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["사용일자", "품명", "금액", "거래처", "승인번호", "제조번호"])
+                for i in range(rows):
+                    # 1% 는 앞 현장의 승인번호를 다시 씁니다.
+                    if issued and rng.random() < 0.01:
+                        approval = rng.choice(issued)
+                    else:
+                        approval = f"202503{i % 28 + 1:02d}-{site:08d}-{i:08d}"
+                        issued.append(approval)
+                    writer.writerow([f"2025-03-{i % 28 + 1:02d}", rng.choice(distinct), 1000,
+                                     f"업체{rng.randrange(300)}", approval, f"SN{rng.randrange(10**9)}"])
+            paths.append(path)
+
+        index = CrossCheckIndex(str(Path(folder) / "index.sqlite"))
+        start = time.perf_counter()
+        found = 0
+        for path in paths[:-1]:
+            found += len(index.load(path)["collisions"])
+        history_s = time.perf_counter() - start
+        start = time.perf_counter()
+        found += len(index.load(paths[-1])["collisions"])
+        incremental_s = time.perf_counter() - start
+        index.close()
+
+        # 기준: 새 내역서가 들어올 때마다 모든 내역서를 다시 읽어 키별로 묶습니다.
+        start = time.perf_counter()
+        table = defaultdict(set)
+        for site, path in enumerate(paths):
+            for _, kind, key, _ in ledger_keys(path)[0]:
+                table[kind, key].add(site)
+        rescan_s = time.perf_counter() - start
+        shared = sum(len(sites) > 1 for sites in table.values())
+
+    print(f"[crosscheck] 현장 {n_files}개 × {rows:,}줄, 다른 현장과 겹친 줄 {found:,}개 (겹친 키 {shared:,}개)")
+    print(f"  앞 {n_files - 1}개 현장 누적 색인   {history_s:8.2f} s")
+    print(f"  새 내역서: 전체 다시 읽기 {rescan_s:8.2f} s")
+    print(f"  새 내역서: 증분 대조      {incremental_s:8.2f} s  (x{rescan_s / incremental_s:.1f})")
+
+
+def bench_boq(size: int):
+    """도급내역서 5만 줄 × 사용내역서 20만 줄 중복 반영 대조: 모든 쌍 비교 vs 블록 키 대조"""
+    # 수량만 다른 같은 물품은 중복, 블록을 공유하지 않는 줄은 중복이 아닙니다.
+    matcher = BoqMatcher(["안전모 20개", "신호수 인건비 3월분", "레미콘 타설 123M A형"])
+    assert list(matcher.match(["안전모 5개", "신호수 인건비 4월분"])["boq_row"]) == [0, 1]
+    unrelated = matcher.match(["소화기 10개", "생수 2박스", "철근 가공조립 20M", "안전화 3족"])["boq_row"]
+    assert all(row == NO_MATCH for row in unrelated), list(unrelated)
+
+    n_boq, n_ledger = 50_000, 200_000
+    rng = random.Random(0)
+    works = ["레미콘 타설", "철근 가공조립", "거푸집 설치", "터파기", "되메우기", "방수", "미장", "도장",
+             "보통인부", "특별인부", "비계공", "철골 세우기", "배관", "전선관 배선", "포장"]
+    # 도급내역서 줄의 5%는 안전 물품 키워드 10개 중 하나를 수량만 달리해 적은 줄 (중복 반영)
+    keywords = [kw for item in (*ITEMS, *PROHIBITED_ITEMS) for kw in item["keywords"]]
+    safety = sample_purchase_lines(2_000, seed=1, words=rng.sample(keywords, 10))
+    boq_lines = [
+        rng.choice(safety) if rng.random() < 0.05 else f"{rng.choice(works)} {rng.randint(1, 500)}M {rng.choice('ABCDE')}형"
+        for _ in range(n_boq)
+    ]
+    # 사용내역서는 같은 구입 내역이 여러 달·여러 번 반복되므로 서로 다른 문장 2만 개에서 뽑습니다.
+    distinct = sample_purchase_lines(20_000)
+    ledger_lines = [rng.choice(distinct) for _ in range(n_ledger)]
+
+    start = time.perf_counter()
+    matcher = BoqMatcher(boq_lines)
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    result = matcher.match(ledger_lines)
+    match_s = time.perf_counter() - start
+    matched = sum(row >= 0 for row in result["boq_row"])
+    # 기대값: 중복 반영한 물품과 같은 물품(블록 키)이 있는 사용내역 줄
+    duplicated = {key for line in set(safety) for key in analyze(normalize_words(line))[0]}
+    expected = {line for line in distinct if duplicated.intersection(analyze(normalize_words(line))[0])}
+    n_expected = sum(line in expected for line in ledger_lines)
+
+    # 기준: 서로 다른 사용내역 문장마다 도급내역 문장 전부와 유사도 계산 (일부 측정 후 환산)
+    boq_features = matcher.features
+    sample = 20
+    start = time.perf_counter()
+    for line in distinct[:sample]:
+        features = analyze(normalize_words(line))[1]
+        max(similarity(features, other) for other in boq_features)
+    pairs_s = (time.perf_counter() - start) * len(set(ledger_lines)) / sample
+    print(f"[boq] 도급내역 {n_boq:,}줄 (서로 다른 명칭 {len(matcher.texts):,}개) × 사용내역 {n_ledger:,}줄, "
+          f"중복 의심 {matched:,}줄 ({matched / n_ledger:.1%}, 같은 물품이 있는 줄 {n_expected / n_ledger:.1%})")
+    print(f"  모든 쌍 비교      {pairs_s:8.1f} s  (일부 측정 후 환산)")
+    print(f"  블록 키 대조      {build_s + match_s:8.1f} s  (블록 구성 {build_s:.2f} s, x{pairs_s / (build_s + match_s):.0f})")
+
+
+def bench_conditions(size: int):
+    """조건부 물품 100만 줄 판정: 줄마다 조건 목록 검사 vs 결정표 일괄 평가"""
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    store = safety_cost_data.CATALOG_STORE
+    conditional = [store.names.index(name) for name in safety_cost_data.ITEM_CONDITIONS]
+    item_ids = np.where(rng.random(n) < 0.5, rng.choice(conditional, n), rng.integers(0, len(ITEMS), n))
+    statuses = np.array(store.statuses, dtype=np.int8)[item_ids]
+    purposes = np.array(["TBM 방송", "근로자 안전작업 감시", "품질 관리", "안전보건교육", "일반 업무", ""])
+    attributes = {
+        "purpose": purposes[rng.integers(0, len(purposes), n)],
+        "user": np.array(["안전관리자", "공무팀", ""])[rng.integers(0, 3, n)],
+        "place": np.array(["교육장", "사무실", ""])[rng.integers(0, 3, n)],
+        "event": np.array(["안전보건의 날", "체육대회", ""])[rng.integers(0, 3, n)],
+        "salary": rng.integers(0, 5, n) * 1_000_000,
+        "risk_assessment": np.array(["예", "아니오", ""])[rng.integers(0, 3, n)],
+        "self_constructor": np.array(["Y", "N", ""])[rng.integers(0, 3, n)],
+    }
+    amounts = rng.integers(1, 600, n) * 1000
+    days = rng.integers(date(2025, 1, 1).toordinal(), date(2025, 12, 31).toordinal(), n) - date(1970, 1, 1).toordinal()
+
+    start = time.perf_counter()
+    result = resolve_conditions(statuses, item_ids, attributes, amounts, as_dates(days))
+    table_s = time.perf_counter() - start
+
+    # 기준: 줄마다 물품의 조건 목록을 차례로 검사합니다.
+    rules = {store.names.index(name): conditions for name, conditions in safety_cost_data.ITEM_CONDITIONS.items()}
+    yes, no = {"예", "y"}, {"아니오", "n"}
+
+    def check(row):
+        unknown = False
+        for condition in rules.get(int(item_ids[row]), ()):
+            op, attribute = condition["op"], condition["attribute"]
+            if op == "month_in":
+                outcome = date.fromordinal(int(days[row]) + date(1970, 1, 1).toordinal()).month in condition["months"]
+            elif op == "max_ratio":
+                base = attributes["salary"][row]
+                if base <= 0:
+                    unknown = True
+                    continue
+                outcome = amounts[row] <= base * condition["ratio"]
+            else:
+                text = normalize_text(str(attributes[attribute][row]))
+                if not text or (op == "is_true" and text not in yes | no):
+                    unknown = True
+                    continue
+                if op == "is_true":
+                    outcome = text in yes
+                else:
+                    found = any(normalize_text(word) in text for word in condition["words"])
+                    outcome = found if op == "contains_any" else not found
+            if not outcome:
+                return Status.PROHIBITED
+        if int(item_ids[row]) in rules and not unknown:
+            return Status.ALLOWED
+        return int(statuses[row])
+
+    sample = 100_000
+    start = time.perf_counter()
+    expected = [check(row) for row in range(sample)]
+    python_s = (time.perf_counter() - start) * n / sample
+    assert expected == result["status"][:sample].tolist()
+    counts = Counter(result["status"].tolist())
+    print(f"[conditions] {n:,}줄 (조건 있는 물품 {int(np.isin(item_ids, conditional).sum()):,}줄) → "
+          f"사용 가능 {counts[Status.ALLOWED]:,}, 조건부 {counts[Status.CONDITIONAL]:,}, "
+          f"사용 불가 {counts[Status.PROHIBITED]:,} (결과 일치 확인)")
+    print(f"  줄마다 조건 검사  {python_s:8.2f} s  (일부 측정 후 환산)")
+    print(f"  결정표 일괄 평가  {table_s:8.2f} s  (x{python_s / table_s:.1f})")
+
+
+BENCHMARKS = {
+    "search": bench_search,
+    "records": bench_records,
+    "store": bench_store,
+    "scan": bench_scan,
+    "classify": bench_classify,
+    "parallel": bench_parallel,
+    "caps": bench_caps,
+    "recognition": bench_recognition,
+    "budget": bench_budget,
+    "evidence": bench_evidence,
+    "crosscheck": bench_crosscheck,
+    "boq": bench_boq,
+    "conditions": bench_conditions,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="안전관리비 검색·분류 성능 측정")
+    parser.add_argument("names", nargs="*", help=f"측정 항목 {list(BENCHMARKS)} (기본: 전체)")
+    parser.add_argument("--size", type=int, default=20_000, help="합성 카탈로그 항목 수")
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"알 수 없는 측정 항목: {', '.join(sorted(unknown))}")
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name](args.size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+도급내역서 중복 반영 점검
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+CASES_AND_PRECEDENTS 의 "공사 도급내역서 중복 반영 사례"를 점검합니다. 도급내역서(BOQ)에 이미
+반영된 항목(예: 신호수 인건비)이 안전관리비 사용내역서에도 있으면 중복 사용 의심으로 알립니다.
+
+모든 (도급내역 줄 × 사용내역 줄) 쌍을 비교하지 않도록, 줄마다 키워드가 가리키는 물품(항목에 속한 대표 키워드)을
+블록 키로 삼아 같은 블록 안에서만 유사도를 계산합니다. 키워드가 없는 줄은 정규화한 문장이 같을 때만 만납니다.
+유사도는 두 문장의 특징(키워드는 가리키는 물품 하나, 나머지 글자는 글자 쌍) 중 짧은 쪽이 긴 쪽에 들어 있는
+비율이므로, "하이바"와 "안전모 20개"처럼 별칭으로 적은 줄도 같은 물품으로 봅니다.
+수량·규격("20개", "10타", "500ml", "1식")은 같은 물품이라도 줄마다 달라 특징에서 뺍니다.
+
+사용법: python safety_cost_boq.py 도급내역서.xlsx 사용내역서.xlsx [-o 중복의심.csv] [--threshold 0.6]
+"""
+
+import argparse
+import csv
+import re
+import sys
+from array import array
+from itertools import islice
+
+from safety_cost_data import keyword_spans
+from safety_cost_ledger import (
+    DEFAULT_CHUNK_SIZE,
+    LedgerError,
+    locate_header,
+    parse_amount,
+    read_rows,
+)
+from safety_cost_search import normalize_words
+
+# 도급내역서 머리글에서 찾을 명칭 열 이름 (앞쪽이 우선)
+BOQ_ITEM_COLUMNS = ("명칭", "품명", "공종명", "공종", "품목", "내역", "항목명")
+DEFAULT_THRESHOLD = 0.6
+# 일치하는 도급내역 줄이 없는 사용내역 줄
+NO_MATCH = -1
+# 사용내역서 문장별 대조 결과를 기억해 둘 최대 개수
+MATCH_CACHE_SIZE = 100_000
+
+MATCH_COLUMNS = ("도급내역 행", "도급내역 명칭", "유사도")
+
+# 수량·규격: 숫자(+단위)로 끝나는 토막. "kf94"·"4가스측정기"처럼 글자에 붙은 숫자는 물품명이므로 남깁니다.
+_QUANTITY = re.compile(
+    r"(?<![a-z0-9])\d+(?:[.,]\d+)*\s?"
+    r"(?:개월분|개월|월분|켤레|박스|세트|box|set|ea|pcs|mm|cm|km|kg|ml|개|식|타|족|벌|매|롤|통|병|대|본|장|조|월|건|회|명|인|일|호|m|g|l|t)?"
+    r"(?![a-z0-9가-힣])"
+)
+
+
+def bigrams(text: str):
+    """정규화된 문장의 글자 쌍 집합 (한 글자 문장은 그 글자 하나)"""
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def strip_quantities(words: str):
+    """normalize_words 로 정규화한 문장에서 수량·규격 토막을 지웁니다. ("안전모 20개" → "안전모")"""
+    return " ".join(_QUANTITY.sub(" ", words).split())
+
+
+def analyze(words: str):
+    """normalize_words 로 정규화한 문장의 (블록 키 목록, 특징 집합) 을 반환합니다.
+
+    블록 키: 키워드가 가리키는 문서 번호 (키워드가 없으면 문장 자체)
+    특징: 키워드 자리는 가리키는 문서 번호 튜플 하나, 키워드 사이의 나머지 글자는 글자 쌍
+    수량·규격(strip_quantities)은 블록 키와 특징 모두에서 뺍니다.
+    """
+    words = strip_quantities(words)
+    spans = keyword_spans(words)
+    text = words.replace(" ", "")
+    if not spans:
+        return (text,), frozenset(bigrams(text))
+    keys, features = set(), set()
+    last = 0
+    for start, end, docs in spans:
+        features.update(bigrams(text[last:start]))
+        features.add(docs)
+        keys.update(docs)
+        last = end
+    features.update(bigrams(text[last:]))
+    return tuple(keys), frozenset(features)
+
+
+def similarity(a: frozenset, b: frozenset):
+    """특징 집합의 겹침 계수 |a ∩ b| / min(|a|, |b|) (0~1)
+
+    도급내역 명칭은 짧고 사용내역 문장은 수량·월분 같은 잡음이 붙어 길기 때문에,
+    짧은 쪽이 긴 쪽에 얼마나 들어 있는지로 봅니다.
+    """
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+class BoqMatcher:
+    """도급내역서 줄을 블록 키별로 묶어 두고, 사용내역 줄마다 가장 비슷한 도급내역 줄을 찾습니다."""
+
+    def __init__(self, boq_lines, threshold: float = DEFAULT_THRESHOLD):
+        """boq_lines: 도급내역서 명칭 목록 (순서 = 도급내역 줄 번호 - 1)"""
+        self.threshold = threshold
+        texts = {}
+        first_rows = array("l")
+        for row, line in enumerate(boq_lines):
+            text = normalize_words(line)
+            if text and text not in texts:
+                texts[text] = len(texts)
+                first_rows.append(row)
+        self.texts = list(texts)
+        self.first_rows = first_rows
+        self.features = []
+        self.blocks = {}
+        for text_id, text in enumerate(self.texts):
+            keys, features = analyze(text)
+            self.features.append(features)
+            for key in keys:
+                self.blocks.setdefault(key, []).append(text_id)
+        self.sizes = array("l", map(len, self.features))
+        self._cache = {}
+
+    def _best(self, text: str):
+        """normalize_words 로 정규화한 사용내역 문장과 가장 비슷한 도급내역 문장 (문장 번호, 유사도)"""
+        keys, features = analyze(text)
+        candidates = set()
+        for key in keys:
+            candidates.update(self.blocks.get(key, ()))
+        if not candidates:
+            return NO_MATCH, 0.0
+        # similarity() 를 후보마다 부르지 않고 풀어 씁니다. (블록이 크면 이 반복이 대조 시간의 대부분)
+        all_features, sizes = self.features, self.sizes
+        size = len(features)
+        best_id, best_score = NO_MATCH, 0.0
+        for text_id in candidates:
+            shared = len(features & all_features[text_id])
+            if not shared:
+                continue
+            score = shared / min(size, sizes[text_id])
+            if score > best_score or (score == best_score and text_id < best_id):
+                best_id, best_score = text_id, score
+        if best_score < self.threshold:
+            return NO_MATCH, best_score
+        return best_id, best_score
+
+    def match(self, lines):
+        """사용내역 줄마다 가장 비슷한 도급내역 줄을 열(column) 단위로 반환합니다.
+
+        같은 문장(정규화 기준)은 한 번만 대조합니다.
+          "boq_row": array('l') - 도급내역 줄 번호(0부터, 같은 명칭이 여러 줄이면 첫 줄) 또는 NO_MATCH
+          "score":   array('d') - 유사도 (NO_MATCH 줄은 블록 안 최고 유사도, 후보가 없으면 0)
+        """
+        cache = self._cache
+        boq_rows, scores = array("l"), array("d")
+        for line in lines:
+            result = cache.get(line)
+            if result is None:
+                if len(cache) >= MATCH_CACHE_SIZE:
+                    cache.clear()
+                text_id, score = self._best(normalize_words(line))
+                result = cache[line] = (NO_MATCH if text_id == NO_MATCH else self.first_rows[text_id], score)
+            boq_rows.append(result[0])
+            scores.append(result[1])
+        return {"boq_row": boq_rows, "score": scores}
+
+
+def read_boq(source, kind: str = None, item_column: str = None):
+    """도급내역서의 명칭 열을 읽어 목록으로 반환합니다. (머리글 다음 줄부터, 빈 명칭도 자리를 지킵니다)"""
+    rows = iter(read_rows(source, kind))
+    _, item_index, _, _ = locate_header(rows, item_column, BOQ_ITEM_COLUMNS)
+    return [row[item_index] if item_index < len(row) else "" for row in rows]
+
+
+def match_ledger(matcher: BoqMatcher, source, out=None, kind: str = None, item_column: str = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, boq_lines=None):
+    """사용내역서를 묶음 단위로 읽으며 도급내역서와 대조하고 요약을 반환합니다.
+
+    out: 중복 의심 줄을 쓸 텍스트 파일 객체 (원래 열 + 도급내역 행·명칭·유사도)
+    boq_lines: 결과에 도급내역 명칭을 적기 위한 도급내역서 명칭 목록
+    반환값: {"rows": 줄 수, "matched": 중복 의심 줄 수, "amount": 중복 의심 금액}
+    """
+    rows = iter(read_rows(source, kind))
+    header, item_index, amount_index, _ = locate_header(rows, item_column)
+    writer = None
+    if out is not None:
+        writer = csv.writer(out)
+        writer.writerow([*header, *MATCH_COLUMNS])
+    summary = {"rows": 0, "matched": 0, "amount": 0}
+    line = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        result = matcher.match([row[item_index] if item_index < len(row) else "" for row in chunk])
+        for row, boq_row, score in zip(chunk, result["boq_row"], result["score"]):
+            line += 1
+            if boq_row == NO_MATCH:
+                continue
+            summary["matched"] += 1
+            if amount_index is not None and amount_index < len(row):
+                summary["amount"] += parse_amount(row[amount_index])
+            if writer is not None:
+                name = boq_lines[boq_row] if boq_lines is not None else ""
+                writer.writerow([*row, boq_row + 1, name, f"{score:.2f}"])
+    summary["rows"] = line
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="도급내역서 중복 반영 점검")
+    parser.add_argument("boq", help="도급내역서 (CSV·XLSX)")
+    parser.add_argument("ledger", help="안전관리비 사용내역서 (CSV·XLSX)")
+    parser.add_argument("-o", "--output", help="중복 의심 줄 CSV 경로 (기본: 표준 출력)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="유사도 기준 (0~1)")
+    parser.add_argument("--boq-column", help=f"도급내역서 명칭 열 이름 (기본: {', '.join(BOQ_ITEM_COLUMNS)} 중 자동)")
+    parser.add_argument("--column", help="사용내역서 품명 열 이름 (기본: 자동)")
+    args = parser.parse_args(argv)
+    if not 0 <= args.threshold <= 1:
+        parser.error("--threshold 는 0~1 이어야 합니다.")
+
+    out = open(args.output, "w", encoding="utf-8-sig", newline="") if args.output else sys.stdout
+    try:
+        boq_lines = read_boq(args.boq, item_column=args.boq_column)
+        matcher = BoqMatcher(boq_lines, args.threshold)
+        summary = match_ledger(matcher, args.ledger, out, item_column=args.column, boq_lines=boq_lines)
+    except LedgerError as exc:
+        parser.exit(2, f"오류: {exc}\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    report = sys.stderr if out is sys.stdout else sys.stdout
+    print(f"도급내역 {len(boq_lines):,}줄 × 사용내역 {summary['rows']:,}줄: 중복 의심 {summary['matched']:,}줄, "
+          f"{summary['amount']:,}원", file=report)
+
+
+if __name__ == "__main__":
+    main()
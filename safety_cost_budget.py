@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+안전보건관리비 계상액 계산
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+고시 제4조·[별표 1]의 공사 종류·대상액 구간별 요율표(ACCRUAL_RATES)로 계상해야 할
+안전보건관리비를 계산합니다. 요율표는 (공사 종류 × 구간) 행렬로 미리 바꿔 두고,
+여러 공사를 한 번에 계산할 때는 np.searchsorted 로 구간을 찾아 분기 없이 계산합니다.
+
+사용법: python safety_cost_budget.py 공사목록.csv -o 계상액.csv
+        (열: 공사종류, 대상액 또는 총공사금액, 관급자재(선택))
+"""
+
+import argparse
+import csv
+import sys
+from fractions import Fraction
+
+import numpy as np
+
+from safety_cost_data import ACCRUAL_BRACKETS, ACCRUAL_RATES, ACCRUAL_RULES
+from safety_cost_ledger import LedgerError, parse_amount, read_rows
+
+CONSTRUCTION_TYPES = tuple(ACCRUAL_RATES)
+
+# (공사 종류 × 구간) 요율 행렬. 마지막 열은 보건관리자 선임대상 요율이며 기초액은 없습니다.
+# 요율은 만분율 정수로 바꿔 두어 원 단위 계산에 부동소수점 오차가 생기지 않게 합니다.
+_BRACKETS = np.array(ACCRUAL_BRACKETS, dtype=np.int64)
+_RATES_BP = np.array([
+    [round(rate * 100) for rate in (*ACCRUAL_RATES[kind]["rates"], ACCRUAL_RATES[kind]["health_manager"])]
+    for kind in CONSTRUCTION_TYPES
+], dtype=np.int64)
+_BASES = np.array([[*ACCRUAL_RATES[kind]["base"], 0] for kind in CONSTRUCTION_TYPES], dtype=np.int64)
+_HEALTH_MANAGER_COLUMN = len(ACCRUAL_BRACKETS)
+_HEALTH_MANAGER_CONTRACT = np.array([
+    ACCRUAL_RULES["health_manager_contract"].get(kind, ACCRUAL_RULES["health_manager_contract_default"])
+    for kind in CONSTRUCTION_TYPES
+], dtype=np.int64)
+
+# 발주자 제공 재료 상한 배율(1.2)과 대상액 미구분 시 비율(70%)도 정수 분수로 계산합니다.
+_OWNER_MATERIAL_CAP = Fraction(str(ACCRUAL_RULES["owner_material_cap"]))
+_UNSEPARATED_TARGET = Fraction(str(ACCRUAL_RULES["unseparated_target_ratio"]))
+
+BRACKET_LABELS = ("5억 원 미만", "5억 원 이상 50억 원 미만", "50억 원 이상", "보건관리자 선임대상")
+
+
+class BudgetError(ValueError):
+    """계상액을 계산할 수 없는 입력 (알 수 없는 공사 종류 등)"""
+
+
+def _type_indices(kinds):
+    """공사 종류 이름 배열을 CONSTRUCTION_TYPES 번호 배열로 바꿉니다."""
+    kinds = np.asarray(kinds, dtype=str)
+    names, inverse = np.unique(kinds, return_inverse=True)
+    unknown = sorted(set(names) - set(CONSTRUCTION_TYPES))
+    if unknown:
+        raise BudgetError(f"알 수 없는 공사 종류: {', '.join(unknown)} ({', '.join(CONSTRUCTION_TYPES)} 중 하나)")
+    return np.array([CONSTRUCTION_TYPES.index(name) for name in names], dtype=np.int64)[inverse]
+
+
+def _accrue(type_ids, targets, health_manager):
+    """대상액에 구간 요율을 곱하고 기초액을 더합니다. (원 미만 버림)"""
+    column = np.searchsorted(_BRACKETS, targets, side="right") - 1
+    column = np.where(health_manager, _HEALTH_MANAGER_COLUMN, column)
+    return targets * _RATES_BP[type_ids, column] // 10_000 + _BASES[type_ids, column], column
+
+
+def required_budgets(kinds, targets=None, owner_materials=None, contracts=None, health_manager=None):
+    """여러 공사의 안전보건관리비 계상액을 한 번에 계산합니다.
+
+    kinds: 공사 종류 (CONSTRUCTION_TYPES 중 하나)
+    targets: 대상액(재료비 + 직접노무비). 값이 없거나 음수인 공사는 총 공사금액의 70% 를 대상액으로 봅니다.
+    owner_materials: 발주자가 제공한 재료비 (대상액에 포함하지 않은 금액, 없으면 0)
+    contracts: 총 공사금액 (연간 단가계약은 총 계약금액). 2천만 원 미만이면 계상액 0
+    health_manager: 보건관리자 선임대상 여부 (None 이면 총 공사금액으로 판단)
+
+    반환값: {"amount": 계상액, "target": 적용 대상액, "bracket": 구간 번호(BRACKET_LABELS),
+            "rate": 적용 요율(%), "applicable": 적용 대상 여부}
+    """
+    type_ids = _type_indices(kinds)
+    n = len(type_ids)
+
+    def column(values, fill):
+        if values is None:
+            return np.full(n, fill, dtype=np.float64)
+        return np.asarray(values, dtype=np.float64)
+
+    contracts = column(contracts, np.nan)
+    targets = column(targets, -1.0)
+    # 대상액을 구분할 수 없으면 총 공사금액의 70% (원 미만 버림, 정수 분수로 계산)
+    unseparated = np.isnan(targets) | (targets < 0)
+    if (unseparated & np.isnan(contracts)).any():
+        raise BudgetError("대상액과 총 공사금액이 모두 없는 공사가 있습니다.")
+    contract_won = np.nan_to_num(contracts, nan=0.0).astype(np.int64)
+    fallback = contract_won * _UNSEPARATED_TARGET.numerator // _UNSEPARATED_TARGET.denominator
+    targets = np.where(unseparated, fallback, np.nan_to_num(targets).astype(np.int64))
+    owner_materials = np.nan_to_num(column(owner_materials, 0.0)).astype(np.int64)
+    if health_manager is None:
+        health_manager = np.nan_to_num(contracts, nan=0.0) >= _HEALTH_MANAGER_CONTRACT[type_ids]
+    else:
+        health_manager = np.asarray(health_manager, dtype=bool)
+
+    amount, bracket = _accrue(type_ids, targets + owner_materials, health_manager)
+    # 발주자 제공 재료가 있으면 (포함 계상액)과 (미포함 계상액 × 1.2) 중 작은 값
+    without, _ = _accrue(type_ids, targets, health_manager)
+    capped = without * _OWNER_MATERIAL_CAP.numerator // _OWNER_MATERIAL_CAP.denominator
+    amount = np.where(owner_materials > 0, np.minimum(amount, capped), amount)
+
+    # 총 공사금액을 모르면 대상액을 하한으로 보아 적용 여부를 판단합니다.
+    applicable = np.where(np.isnan(contracts), targets + owner_materials, contracts) >= ACCRUAL_RULES["min_contract"]
+    return {
+        "amount": np.where(applicable, amount, 0),
+        "target": targets + owner_materials,
+        "bracket": bracket,
+        "rate": _RATES_BP[type_ids, bracket] / 100,
+        "applicable": applicable,
+    }
+
+
+def required_budget(kind: str, target=None, owner_materials: int = 0, contract=None, health_manager=None):
+    """공사 하나의 안전보건관리비 계상액을 계산합니다. (required_budgets 의 한 건 버전)
+
+    반환값: {"amount", "target", "bracket", "rate", "applicable", "legal_basis"}
+    """
+    result = required_budgets(
+        [kind],
+        None if target is None else [target],
+        [owner_materials],
+        None if contract is None else [contract],
+        None if health_manager is None else [health_manager],
+    )
+    return {
+        "amount": int(result["amount"][0]),
+        "target": int(result["target"][0]),
+        "bracket": BRACKET_LABELS[result["bracket"][0]],
+        "rate": float(result["rate"][0]),
+        "applicable": bool(result["applicable"][0]),
+        "legal_basis": ACCRUAL_RULES["legal_basis"],
+    }
+
+
+# ──────────────────────────────────────────────
+# 공사 목록 일괄 계산
+# ──────────────────────────────────────────────
+_COLUMNS = {
+    "kind": ("공사종류", "공종", "공사구분"),
+    "target": ("대상액", "계상대상액"),
+    "owner_materials": ("관급자재", "관급자재비", "발주자제공재료비"),
+    "contract": ("총공사금액", "공사금액", "계약금액", "총계약금액"),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="안전보건관리비 계상액 일괄 계산")
+    parser.add_argument("contracts", help="공사 목록 파일 (CSV·XLSX, 첫 줄은 머리글)")
+    parser.add_argument("-o", "--output", help="결과 CSV 경로 (기본: 표준 출력)")
+    args = parser.parse_args(argv)
+
+    try:
+        rows = iter(read_rows(args.contracts))
+        header = [str(name).replace(" ", "") for name in next(rows, [])]
+        index = {
+            key: next((header.index(name) for name in names if name in header), None)
+            for key, names in _COLUMNS.items()
+        }
+        if index["kind"] is None or (index["target"] is None and index["contract"] is None):
+            raise LedgerError("머리글에 공사종류와 대상액(또는 총공사금액) 열이 필요합니다.")
+        rows = [row for row in rows if any(row)]
+        # 공사종류 칸이 없거나 빈 줄(짧은 줄 포함)은 계산하지 않고 건너뜁니다.
+        kind_index = index["kind"]
+        skipped = sum(1 for row in rows if kind_index >= len(row) or not str(row[kind_index]).strip())
+        rows = [row for row in rows if kind_index < len(row) and str(row[kind_index]).strip()]
+
+        def values(key):
+            if index[key] is None:
+                return None
+            return [parse_amount(row[index[key]]) if index[key] < len(row) and row[index[key]] else np.nan
+                    for row in rows]
+
+        result = required_budgets(
+            [str(row[kind_index]).strip() for row in rows],
+            values("target"), values("owner_materials"), values("contract"),
+        )
+    except (LedgerError, BudgetError) as exc:
+        parser.exit(2, f"오류: {exc}\n")
+
+    out = open(args.output, "w", encoding="utf-8-sig", newline="") if args.output else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow([*header, "적용대상액", "적용구간", "요율(%)", "계상액"])
+        for i, row in enumerate(rows):
+            writer.writerow([
+                *row, result["target"][i], BRACKET_LABELS[result["bracket"][i]],
+                f"{result['rate'][i]:.2f}", result["amount"][i] if result["applicable"][i] else "적용 제외",
+            ])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{len(rows):,}건, 계상액 합계 {int(result['amount'].sum()):,}원", file=sys.stderr)
+    if skipped:
+        print(f"공사종류가 없는 {skipped:,}줄은 건너뛰었습니다.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
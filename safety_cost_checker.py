@@ -7,16 +7,27 @@
       (2025.02.12 시행)
 """
 
+import functools
+import os
+import tempfile
+
+import numpy as np
 import streamlit as st
+from streamlit_searchbox import st_searchbox
 from safety_cost_data import (
     CATEGORIES,
     CATEGORY_LEGAL_DETAILS,
-    ITEMS,
-    PROHIBITED_ITEMS,
     CHANGES_2025_2026,
     CASES_AND_PRECEDENTS,
+    autocomplete,
+    facet_counts,
+    filter_items,
     search_items,
+    suggest_items,
 )
+from safety_cost_budget import CONSTRUCTION_TYPES, required_budget
+from safety_cost_ledger import SUMMARY_KEYS, VERDICT_LABELS, LedgerError, audit_ledger, new_columns
+from safety_cost_rules import aggregate_caps, apply_recognition, site_arrays
 
 
 def render_legal_detail(legal_detail: dict) -> str:
@@ -35,6 +46,111 @@ def render_legal_detail(legal_detail: dict) -> str:
         parts.append(f'📎 <strong>관련 조항:</strong><ul style="margin:0.2rem 0 0 1.2rem; padding:0;">{refs}</ul>')
     return "<br>".join(parts)
 
+
+# 물품 확인 탭에서 한 번에 보여줄 최대 결과 수
+SEARCH_LIMIT = 20
+
+STATUS_LABELS = {
+    "allowed": "✅ 사용 가능",
+    "conditional": "⚠️ 조건부",
+    "prohibited": "❌ 사용 불가",
+}
+
+
+def search_suggestions(searchterm: str):
+    """검색창 입력 중(키 입력마다) 보여줄 자동완성 후보. 입력한 검색어 자체가 첫 후보입니다."""
+    if not searchterm.strip():
+        return []
+    return [searchterm, *(term for term in autocomplete(searchterm) if term != searchterm)]
+
+
+def set_query(keyword):
+    """검색어를 확정합니다. (자동완성 선택·Enter)"""
+    st.session_state["query"] = keyword or ""
+
+
+def use_suggestion(keyword: str):
+    """'혹시 이것을 찾으셨나요?' 후보를 검색어로 입력합니다."""
+    set_query(keyword)
+    # 검색창을 새 검색어로 다시 그리도록 상태 초기화
+    st.session_state.pop("query_box", None)
+
+
+# 결과 CSV 가 이보다 크면 화면에서 내려받지 않고 명령줄(safety_cost_ledger.py)을 안내합니다.
+LEDGER_DOWNLOAD_LIMIT = 200 * 1024 * 1024
+
+
+def _fold_columns(columns, totals):
+    """지금까지 모은 열 배열을 항목별 사용액·인정 금액 합계에 더하고 비웁니다.
+
+    판정 도중 묶음마다 부르므로 줄 단위 열은 한 묶음 분량만 메모리에 남습니다.
+    """
+    arrays = site_arrays({"": columns})
+    valid = arrays["categories"] >= 0
+    np.add.at(totals["spend"], arrays["categories"][valid], arrays["amounts"][valid])
+    np.add.at(totals["lines"], arrays["categories"][valid], 1)
+    recognition = apply_recognition(arrays["item_ids"], arrays["amounts"], arrays["dates"])
+    totals["recognized"] += int(recognition["recognized"][valid].sum())
+    totals["unresolved"] += int((recognition["unresolved"] & valid).sum())
+    for values in columns.values():
+        del values[:]
+
+
+def _read_result(path):
+    """내려받기 버튼을 눌렀을 때만 결과 CSV 를 읽습니다."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def run_ledger_audit(uploaded, item_column: str):
+    """업로드한 사용내역서를 판정하여 요약·항목 한도 집계·결과 CSV 경로를 세션에 보관합니다.
+
+    같은 파일·같은 품명 열이면 화면을 다시 그릴 때 판정을 반복하지 않습니다.
+    결과는 임시 파일에 써 내려가고 세션에는 경로만 둡니다. (다른 파일을 판정하면 이전 파일은 지웁니다)
+    한도·인정 금액은 묶음마다 합계로 접어 두므로 메모리 사용량이 파일 크기와 무관합니다.
+    """
+    key = (uploaded.file_id, item_column)
+    cached = st.session_state.get("ledger_result")
+    if cached and cached["key"] == key:
+        return cached
+    if cached:
+        try:
+            os.remove(cached["path"])
+        except OSError:
+            pass
+
+    progress = st.empty()
+    columns = new_columns()
+    totals = {"spend": np.zeros(max(CATEGORIES) + 1, dtype=np.int64),
+              "lines": np.zeros(max(CATEGORIES) + 1, dtype=np.int64),
+              "recognized": 0, "unresolved": 0}
+
+    def on_progress(n):
+        _fold_columns(columns, totals)
+        progress.caption(f"⏳ {n:,}줄 판정 중...")
+
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8-sig", newline="",
+                                     suffix=".csv", delete=False) as out:
+        try:
+            summary = audit_ledger(uploaded, out, item_column=item_column or None,
+                                   columns=columns, on_progress=on_progress)
+        except BaseException:
+            out.close()
+            os.remove(out.name)
+            raise
+    _fold_columns(columns, totals)
+    progress.empty()
+    # 계상액은 화면에서 바꿀 수 있으므로 사용액·비중만 집계해 두고 한도는 그릴 때 계산합니다.
+    # 항목별 합계를 한 줄씩으로 보고 aggregate_caps 에 넘기면 줄 단위로 집계한 것과 같습니다.
+    used = np.flatnonzero(totals["lines"])
+    caps = aggregate_caps(np.zeros(len(used), dtype=np.int32), used, totals["spend"][used])["caps"]
+    st.session_state["ledger_result"] = {
+        "key": key, "summary": summary, "caps": caps,
+        "path": out.name, "size": os.path.getsize(out.name),
+        "recognized": totals["recognized"], "unresolved": totals["unresolved"],
+    }
+    return st.session_state["ledger_result"]
+
 # ──────────────────────────────────────────────
 # Page Config
 # ──────────────────────────────────────────────
@@ -469,6 +585,23 @@ hr {
     background: rgba(99,102,241,0.25);
     border-color: rgba(99,102,241,0.4);
 }
+.suggestion-label {
+    color: #ffffff;
+    font-size: 0.88rem;
+    margin-bottom: 0.4rem;
+}
+[data-testid="stButton"] button {
+    background: rgba(99,102,241,0.12);
+    border: 1px solid rgba(99,102,241,0.25);
+    color: #ffffff;
+    border-radius: 20px;
+    font-size: 0.82rem;
+}
+[data-testid="stButton"] button:hover {
+    background: rgba(99,102,241,0.25);
+    border-color: rgba(99,102,241,0.4);
+    color: #ffffff;
+}
 
 /* ── Hide Streamlit branding ── */
 #MainMenu {visibility: hidden;}
@@ -766,11 +899,13 @@ st.markdown("""
 # ──────────────────────────────────────────────
 # Tabs
 # ──────────────────────────────────────────────
-tab1, tab2, tab3, tab4 = st.tabs([
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
     "🔍 물품 확인",
     "📋 항목별 조회",
     "⚖️ 법령·판례",
     "❌ 사용 불가 항목",
+    "📑 사용내역서 점검",
+    "🧮 계상액 계산",
 ])
 
 
@@ -779,19 +914,45 @@ tab1, tab2, tab3, tab4 = st.tabs([
 # ═══════════════════════════════════════════════
 with tab1:
     st.markdown('<div class="search-container">', unsafe_allow_html=True)
-    query = st.text_input(
-        "물품명을 입력하세요",
+    # 키 입력마다 트라이 자동완성만 실행하고, search_items 는 검색어 확정 시에만 실행
+    st_searchbox(
+        search_suggestions,
         placeholder="예: 안전모, 소화기, CCTV, 프린터, 커피 ...",
-        label_visibility="collapsed",
+        default=st.session_state.get("query", ""),
+        default_searchterm=st.session_state.get("query", ""),
+        edit_after_submit="current",
+        submit_function=set_query,
+        reset_function=lambda: set_query(""),
+        debounce=100,
+        key="query_box",
     )
     st.markdown('</div>', unsafe_allow_html=True)
+    query = st.session_state.get("query", "")
 
     # Search & display results
     if query:
-        results = search_items(query)
-        total_allowed = len(results["allowed"])
-        total_conditional = len(results["conditional"])
-        total_prohibited = len(results["prohibited"])
+        results = search_items(
+            query,
+            limit=SEARCH_LIMIT,
+            cache=st.session_state.setdefault("search_cache", {}),
+        )
+
+        # "Did you mean" suggestions for typos
+        suggestions = suggest_items(query)
+        if suggestions:
+            st.markdown('<div class="suggestion-label">🤔 혹시 이것을 찾으셨나요?</div>', unsafe_allow_html=True)
+            for col, suggestion in zip(st.columns(len(suggestions)), suggestions):
+                col.button(
+                    suggestion["keyword"],
+                    key=f"suggest-{suggestion['keyword']}",
+                    help=", ".join(suggestion["names"]),
+                    on_click=use_suggestion,
+                    args=(suggestion["keyword"],),
+                    use_container_width=True,
+                )
+        total_allowed = results["counts"]["allowed"]
+        total_conditional = results["counts"]["conditional"]
+        total_prohibited = results["counts"]["prohibited"]
         total = total_allowed + total_conditional + total_prohibited
 
         if total == 0:
@@ -822,6 +983,12 @@ with tab1:
                 </div>
             </div>
             """, unsafe_allow_html=True)
+            if total > SEARCH_LIMIT:
+                st.markdown(f"""
+                <p style="color:#ffffff; font-size:0.82rem; text-align:center;">
+                관련도가 높은 상위 {SEARCH_LIMIT}건만 표시합니다. 검색어를 더 구체적으로 입력해 보세요.
+                </p>
+                """, unsafe_allow_html=True)
 
             # Allowed items
             if results["allowed"]:
@@ -882,7 +1049,30 @@ with tab2:
     </p>
     """, unsafe_allow_html=True)
 
+    # 필터별 건수는 다른 필터의 현재 선택값을 반영한 비트맵 연산 결과
+    col_status, col_category = st.columns([1, 2])
+    with col_status:
+        status_counts = facet_counts("status", category=st.session_state.get("browse_category") or None)
+        status_filter = st.multiselect(
+            "상태",
+            options=list(STATUS_LABELS),
+            default=["allowed", "conditional"],
+            format_func=lambda s: f"{STATUS_LABELS[s]} ({status_counts.get(s, 0)})",
+            key="browse_status",
+        )
+    with col_category:
+        category_counts = facet_counts("category", status=status_filter or None)
+        category_filter = st.multiselect(
+            "항목",
+            options=list(CATEGORIES),
+            format_func=lambda c: f"항목 {c}. {CATEGORIES[c]['name']} ({category_counts.get(c, 0)})",
+            placeholder="전체 항목",
+            key="browse_category",
+        )
+
     for cat_id, cat_info in CATEGORIES.items():
+        if category_filter and cat_id not in category_filter:
+            continue
         limit_text = f"  |  📊 한도: {cat_info['limit']}" if cat_info.get("limit") else ""
         with st.expander(f"**항목 {cat_id}. {cat_info['name']}**{limit_text}", expanded=False):
             legal_detail = CATEGORY_LEGAL_DETAILS.get(cat_id, {})
@@ -894,7 +1084,7 @@ with tab2:
             <div class="card-legal-detail" style="margin-bottom:1rem;">{legal_html}</div>
             """, unsafe_allow_html=True)
 
-            cat_items = [item for item in ITEMS if item["category"] == cat_id]
+            cat_items = filter_items(status=status_filter or None, category=[cat_id])
             if cat_items:
                 for item in cat_items:
                     if item["status"] == "allowed":
@@ -920,6 +1110,19 @@ with tab2:
                 </p>
                 """, unsafe_allow_html=True)
 
+    # 사용 불가 항목은 9대 사용항목에 속하지 않으므로 항목 필터가 없을 때만 표시
+    if "prohibited" in status_filter and not category_filter:
+        prohibited_items = filter_items(status=["prohibited"])
+        with st.expander(f"**❌ 사용 불가 항목** ({len(prohibited_items)})", expanded=False):
+            for item in prohibited_items:
+                st.markdown(f"""
+                <div class="result-card prohibited" style="padding:0.9rem 1.2rem;">
+                    <span class="card-status status-prohibited">❌ 사용 불가</span>
+                    <span class="card-title" style="font-size:0.95rem; margin-left:0.5rem;">{item["name"]}</span>
+                    <div class="card-note" style="margin-top:0.3rem;">🚫 {item["reason"]}</div>
+                </div>
+                """, unsafe_allow_html=True)
+
 
 # ═══════════════════════════════════════════════
 # TAB 3: 법령·판례
@@ -967,7 +1170,7 @@ with tab4:
     </p>
     """, unsafe_allow_html=True)
 
-    for item in PROHIBITED_ITEMS:
+    for item in filter_items(status=["prohibited"]):
         st.markdown(f"""
         <div class="result-card prohibited">
             <span class="card-status status-prohibited">❌ 사용 불가</span>
@@ -977,6 +1180,110 @@ with tab4:
         """, unsafe_allow_html=True)
 
 
+# ═══════════════════════════════════════════════
+# TAB 5: 사용내역서 일괄 점검
+# ═══════════════════════════════════════════════
+with tab5:
+    st.markdown('<div class="section-header">📑 안전관리비 사용내역서 일괄 점검</div>', unsafe_allow_html=True)
+    st.markdown("""
+    <p style="color:#ffffff; font-size:0.88rem; margin-bottom:1.5rem;">
+    현장의 사용내역서(CSV·XLSX)를 올리면 줄마다 사용 가능 여부를 판정합니다.
+    품명(또는 내역·적요) 열을 자동으로 찾으며, 판정 결과는 CSV 로 내려받을 수 있습니다.
+    </p>
+    """, unsafe_allow_html=True)
+
+    col_file, col_column, col_budget = st.columns([2, 1, 1])
+    with col_file:
+        uploaded = st.file_uploader("사용내역서 파일", type=["csv", "xlsx"], key="ledger_file")
+    with col_column:
+        item_column = st.text_input("품명 열 이름", placeholder="비우면 자동", key="ledger_column").strip()
+    with col_budget:
+        ledger_budget = st.number_input("현장 계상액 (원)", min_value=0, step=10_000_000, key="ledger_budget",
+                                        help="항목 한도(5%·15%)의 기준입니다. 0 이면 한도 초과를 판정하지 않습니다.")
+
+    if uploaded is not None:
+        try:
+            ledger = run_ledger_audit(uploaded, item_column)
+        except LedgerError as exc:
+            st.error(f"❌ {exc}")
+        else:
+            summary = ledger["summary"]
+            st.markdown(f"**총 {summary['rows']:,}줄 판정 완료**")
+            columns = st.columns(len(SUMMARY_KEYS))
+            for col, key, label in zip(columns, SUMMARY_KEYS, VERDICT_LABELS.values()):
+                col.metric(label, f"{summary['counts'][key]:,}줄", f"{summary['amounts'][key]:,}원", delta_color="off")
+
+            valid_amount = summary["amounts"]["allowed"] + summary["amounts"]["conditional"]
+            st.caption(
+                f"💡 경과조치(스마트 안전장비 2025년 70%, 2026년 100%)를 구입일별로 반영한 인정 금액: "
+                f"**{ledger['recognized']:,}원** / 사용 가능·조건부 {valid_amount:,}원"
+                + (f" · 구입일 확인 필요 {ledger['unresolved']:,}줄" if ledger["unresolved"] else "")
+            )
+
+            # 항목 한도: 입력한 현장 계상액 대비 (계상액이 없으면 사용액 비중만 참고로 표시)
+            cap_columns = st.columns(len(ledger["caps"]))
+            for col, (cat_id, cap) in zip(cap_columns, ledger["caps"].items()):
+                # 사용 가능·조건부 줄이 하나도 없으면 묶음이 없습니다.
+                used = int(cap["used"][0]) if len(cap["used"]) else 0
+                if ledger_budget:
+                    limit = ledger_budget * cap["ratio"]
+                    verdict = f"{'❌ 한도 초과' if used > limit else '✅ 한도 이내'} · 한도 {limit:,.0f}원"
+                else:
+                    share = float(cap["share"][0]) if len(cap["share"]) else 0.0
+                    verdict = f"사용액의 {share:.1%} · 계상액을 입력하면 한도를 판정합니다"
+                col.metric(
+                    f"항목 {cat_id}. {CATEGORIES[cat_id]['name']} (한도 {cap['ratio']:.0%})",
+                    f"{used:,}원", verdict, delta_color="off",
+                )
+
+            if ledger["size"] <= LEDGER_DOWNLOAD_LIMIT:
+                st.download_button(
+                    "⬇️ 판정 결과 CSV 내려받기",
+                    data=functools.partial(_read_result, ledger["path"]),
+                    file_name=f"판정결과_{os.path.splitext(uploaded.name)[0]}.csv",
+                    mime="text/csv",
+                )
+            else:
+                st.caption(
+                    f"💡 판정 결과가 {ledger['size'] / 1024 / 1024:,.0f}MB 로 커서 화면에서 내려받을 수 없습니다. "
+                    f"`python safety_cost_ledger.py {uploaded.name} -o 판정결과.csv` 로 판정하세요."
+                )
+            if summary["flagged"]:
+                st.markdown('<div class="section-header">⚠️ 조건부·사용 불가 줄</div>', unsafe_allow_html=True)
+                st.dataframe(summary["flagged"], use_container_width=True, hide_index=True)
+
+
+# ═══════════════════════════════════════════════
+# TAB 6: 안전보건관리비 계상액 계산
+# ═══════════════════════════════════════════════
+with tab6:
+    st.markdown('<div class="section-header">🧮 안전보건관리비 계상액 계산</div>', unsafe_allow_html=True)
+    st.markdown("""
+    <p style="color:#ffffff; font-size:0.88rem; margin-bottom:1.5rem;">
+    공사 종류와 대상액(재료비 + 직접노무비)으로 고시 [별표 1] 요율에 따른 계상액을 계산합니다.
+    대상액을 모르면 0 으로 두세요. 총 공사금액의 70% 를 대상액으로 봅니다.
+    </p>
+    """, unsafe_allow_html=True)
+
+    col_kind, col_contract = st.columns(2)
+    with col_kind:
+        kind = st.selectbox("공사 종류", CONSTRUCTION_TYPES, key="budget_kind")
+        target = st.number_input("대상액 (원)", min_value=0, step=10_000_000, key="budget_target")
+    with col_contract:
+        contract = st.number_input("총 공사금액 (원)", min_value=0, step=10_000_000, key="budget_contract")
+        owner_materials = st.number_input("발주자 제공 재료비 (원)", min_value=0, step=10_000_000,
+                                          key="budget_owner_materials")
+
+    if target or contract:
+        budget = required_budget(kind, target or None, owner_materials, contract or None)
+        if not budget["applicable"]:
+            st.info("총 공사금액 2천만 원 미만 공사는 안전보건관리비 계상 대상이 아닙니다. (고시 제3조)")
+        else:
+            st.metric("계상액", f"{budget['amount']:,}원",
+                      f"{budget['bracket']} · 요율 {budget['rate']:.2f}%", delta_color="off")
+            st.caption(f"적용 대상액 {budget['target']:,}원 · 근거: {budget['legal_basis']}")
+
+
 # ──────────────────────────────────────────────
 # Footer
 # ──────────────────────────────────────────────
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+현장 간 증빙 대조 (타 현장 전용·승인번호 재사용)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+CASES_AND_PRECEDENTS 의 "타 현장 전용 적발 사례"·"허위 증빙 적발 사례"를 자동 점검합니다.
+판정한 사용내역 줄을 두 가지 키로 색인해 두고, 다른 현장에서 같은 키가 나오면 알립니다.
+
+- 승인번호: 전자세금계산서 승인번호(24자리, 앞 8자리는 발급일자) — 다른 현장에 같은 번호가 있으면 재사용,
+  자릿수·발급일자가 맞지 않으면 형식 오류
+- 제조번호: (거래처, 물품, 제조번호) — 같은 장비가 다른 현장 내역서에도 있으면 타 현장 전용
+
+새 내역서를 넣을 때마다 그 내역서의 키로만 해시 테이블을 만들고(build), 누적 색인(SQLite, 키 해시에 색인)에서
+같은 키 해시만 찾아(probe) 맞춰 보므로, 이미 넣은 내역서 전체를 다시 읽지 않습니다.
+
+현장 이름은 --site(load 의 site) → 내역서의 현장 열(SITE_COLUMNS) → 파일 이름 순으로 정합니다.
+
+사용법: python safety_cost_crosscheck.py 사용내역서.xlsx ... [--index 대조색인.sqlite] [--column 품명]
+        python safety_cost_crosscheck.py 3월_사용내역서.xlsx --site A현장
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from datetime import date
+from hashlib import blake2b
+from itertools import islice
+from pathlib import Path
+
+from safety_cost_data import CATALOG_STORE
+from safety_cost_ledger import (
+    APPROVAL_COLUMNS,
+    DEFAULT_CHUNK_SIZE,
+    SERIAL_COLUMNS,
+    SITE_COLUMNS,
+    VENDOR_COLUMNS,
+    LedgerError,
+    audit_rows,
+    find_column,
+    locate_header,
+    read_rows,
+    site_name,
+)
+from safety_cost_search import normalize_text
+from safety_cost_store import NO_STATUS
+
+DEFAULT_INDEX = "crosscheck_index.sqlite"
+
+# 색인 키 종류
+APPROVAL = 0
+SERIAL = 1
+KIND_LABELS = {APPROVAL: "승인번호 재사용", SERIAL: "타 현장 전용 의심"}
+MALFORMED_LABEL = "승인번호 형식 오류"
+
+APPROVAL_DIGITS = 24
+# 누적 색인에서 한 번에 찾아볼 키 해시 수 (SQLite 변수 개수 제한 안쪽)
+PROBE_BATCH = 500
+
+# 거래처 이름에서 지울 법인 형태 표기
+_VENDOR_NOISE = re.compile(r"주식회사|유한회사|\(\s*[주유]\s*\)|㈜")
+
+
+# ──────────────────────────────────────────────
+# 키 정규화
+# ──────────────────────────────────────────────
+def approval_key(value):
+    """승인번호의 숫자만 남깁니다. ("20250301-41000012-12345678" → "202503014100001212345678")"""
+    return "".join(ch for ch in str(value) if ch.isdigit())
+
+
+def approval_problem(key: str):
+    """승인번호 형식 오류 사유를 반환합니다. (정상이면 None)"""
+    if len(key) != APPROVAL_DIGITS:
+        return f"{APPROVAL_DIGITS}자리가 아님 ({len(key)}자리)"
+    try:
+        date(int(key[:4]), int(key[4:6]), int(key[6:8]))
+    except ValueError:
+        return f"발급일자 {key[:8]} 가 올바르지 않음"
+    return None
+
+
+def vendor_key(value):
+    """거래처 이름에서 법인 형태 표기·공백·기호를 빼고 정규화합니다."""
+    return normalize_text(_VENDOR_NOISE.sub("", str(value)))
+
+
+def _key_hash(kind: int, key: str):
+    """키 종류와 키 문자열의 64비트 해시 (SQLite INTEGER 에 맞게 부호 있는 값)"""
+    digest = blake2b(f"{kind}\x1f{key}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+# ──────────────────────────────────────────────
+# 누적 색인
+# ──────────────────────────────────────────────
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledgers (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    site TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    ledger INTEGER NOT NULL REFERENCES ledgers (id),
+    row INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    key_hash INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    item TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_key ON entries (key_hash);
+CREATE INDEX IF NOT EXISTS entries_ledger ON entries (ledger);
+"""
+
+
+def ledger_keys(source, kind: str = None, item_column: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """사용내역서 줄마다 판정해 색인 키를 만듭니다.
+
+    반환값: (키 목록, 형식 오류 목록, 현장 이름)
+      키: (줄 번호, 키 종류, 키 문자열, 물품) — 물품은 판정된 물품 이름(확인 필요 줄은 품명 원문)
+      형식 오류: (줄 번호, 승인번호 원문, 사유)
+      현장 이름: 현장 열(SITE_COLUMNS)의 값 (열이 없거나 모두 비어 있으면 None)
+    줄 번호는 머리글 다음 줄을 1 로 셉니다. 현장 열에 서로 다른 현장이 섞여 있으면 LedgerError 를 냅니다.
+    """
+    rows = iter(read_rows(source, kind))
+    header, item_index, _, _ = locate_header(rows, item_column)
+    approval_index = find_column(header, APPROVAL_COLUMNS)
+    vendor_index = find_column(header, VENDOR_COLUMNS)
+    serial_index = find_column(header, SERIAL_COLUMNS)
+    site_index = find_column(header, SITE_COLUMNS)
+    if approval_index is None and serial_index is None:
+        raise LedgerError(
+            f"승인번호({', '.join(APPROVAL_COLUMNS)}) 또는 제조번호({', '.join(SERIAL_COLUMNS)}) 열이 없습니다."
+        )
+
+    def cell(row, index):
+        return row[index] if index is not None and index < len(row) else ""
+
+    names = CATALOG_STORE.names
+    keys, malformed = [], []
+    sites = set()
+    for line, (row, _, status, item_id, _) in enumerate(audit_rows(rows, item_index, chunk_size), 1):
+        if site_index is not None:
+            site = cell(row, site_index).strip()
+            if site:
+                sites.add(site)
+        item = names[item_id] if status != NO_STATUS else normalize_text(cell(row, item_index))
+        raw = cell(row, approval_index).strip()
+        if raw:
+            key = approval_key(raw)
+            problem = approval_problem(key)
+            if problem is None:
+                keys.append((line, APPROVAL, key, item))
+            else:
+                malformed.append((line, raw, problem))
+        serial = normalize_text(cell(row, serial_index))
+        if serial:
+            keys.append((line, SERIAL, f"{vendor_key(cell(row, vendor_index))}\x1f{item}\x1f{serial}", item))
+    if len(sites) > 1:
+        raise LedgerError(f"현장 열에 여러 현장({', '.join(sorted(sites))})이 섞여 있습니다. 현장별 파일로 나누어 넣으세요.")
+    return keys, malformed, next(iter(sites), None)
+
+
+class CrossCheckIndex:
+    """현장별 사용내역서의 승인번호·제조번호 키를 누적하는 SQLite 색인입니다."""
+
+    def __init__(self, path=DEFAULT_INDEX):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def _probe(self, hashes, site: str):
+        """다른 현장 색인에서 키 해시가 같은 줄을 찾아 {(키 해시, 키): 가장 먼저 넣은 줄} 을 반환합니다."""
+        found = {}
+        hashes = list(hashes)
+        for start in range(0, len(hashes), PROBE_BATCH):
+            batch = hashes[start:start + PROBE_BATCH]
+            query = (
+                "SELECT e.key_hash, e.key, e.row, e.item, l.site, l.path FROM entries e"
+                " JOIN ledgers l ON l.id = e.ledger"
+                f" WHERE e.key_hash IN ({', '.join('?' * len(batch))}) AND l.site != ?"
+                " ORDER BY l.id, e.row"
+            )
+            for key_hash, key, row, item, other_site, other_path in self.db.execute(query, (*batch, site)):
+                found.setdefault((key_hash, key), (other_site, other_path, row, item))
+        return found
+
+    def load(self, path, site: str = None, kind: str = None, item_column: str = None,
+             chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """사용내역서 하나를 색인에 넣고, 이미 넣은 다른 현장 내역서와 겹치는 줄을 반환합니다.
+
+        같은 경로·크기·수정 시각의 내역서는 다시 읽지 않습니다. 바뀐 내역서는 이전 키를 지우고 다시 넣습니다.
+        site: 현장 이름 (None 이면 내역서의 현장 열, 그것도 없으면 파일 이름)
+        반환값: None(바뀌지 않음) 또는
+          {"site", "path", "keys": 색인한 키 수,
+           "collisions": [{"kind", "label", "row", "item", "key", "other_site", "other_path", "other_row"}],
+           "malformed": [{"row", "approval", "reason"}]}
+        """
+        path = str(Path(path).resolve())
+        stat = os.stat(path)
+        previous = self.db.execute("SELECT id, size, mtime_ns FROM ledgers WHERE path = ?", (path,)).fetchone()
+        if previous is not None and previous[1:] == (stat.st_size, stat.st_mtime_ns):
+            return None
+
+        keys, malformed, column_site = ledger_keys(path, kind, item_column, chunk_size)
+        site = site or column_site or site_name(path)
+        # build: 이번 내역서의 키 해시 → 줄 목록
+        build = {}
+        for line, key_kind, key, item in keys:
+            build.setdefault(_key_hash(key_kind, key), []).append((line, key_kind, key, item))
+        # probe: 누적 색인에서 이번 키 해시만 찾습니다.
+        with self.db:
+            if previous is not None:
+                self.db.execute("DELETE FROM entries WHERE ledger = ?", (previous[0],))
+                self.db.execute("DELETE FROM ledgers WHERE id = ?", (previous[0],))
+            matches = self._probe(build, site)
+            ledger_id = self.db.execute(
+                "INSERT INTO ledgers (path, site, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                (path, site, stat.st_size, stat.st_mtime_ns),
+            ).lastrowid
+            self.db.executemany(
+                "INSERT INTO entries (ledger, row, kind, key_hash, key, item) VALUES (?, ?, ?, ?, ?, ?)",
+                ((ledger_id, line, key_kind, key_hash, key, item)
+                 for key_hash, lines in build.items() for line, key_kind, key, item in lines),
+            )
+
+        collisions = []
+        for key_hash, lines in build.items():
+            for line, key_kind, key, item in lines:
+                match = matches.get((key_hash, key))
+                if match is None:
+                    continue
+                other_site, other_path, other_row, _ = match
+                collisions.append({
+                    "kind": key_kind,
+                    "label": KIND_LABELS[key_kind],
+                    "row": line,
+                    "item": item,
+                    "key": key.split("\x1f")[-1],
+                    "other_site": other_site,
+                    "other_path": other_path,
+                    "other_row": other_row,
+                })
+        collisions.sort(key=lambda collision: (collision["row"], collision["kind"]))
+        return {
+            "site": site,
+            "path": path,
+            "keys": len(keys),
+            "collisions": collisions,
+            "malformed": [{"row": line, "approval": raw, "reason": reason} for line, raw, reason in malformed],
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="현장 간 증빙 대조 (승인번호 재사용·타 현장 전용)")
+    parser.add_argument("ledgers", nargs="+", help="사용내역서 파일 (CSV·XLSX, 넣은 순서대로 대조)")
+    parser.add_argument("--site", help=f"현장 이름 (파일 하나일 때, 기본: {', '.join(SITE_COLUMNS)} 열 또는 파일 이름)")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="누적 색인 파일 경로")
+    parser.add_argument("--column", help="품명 열 이름 (기본: 자동)")
+    args = parser.parse_args(argv)
+    if args.site and len(args.ledgers) > 1:
+        parser.error("--site 는 파일 하나일 때만 쓸 수 있습니다.")
+
+    index = CrossCheckIndex(args.index)
+    failed = False
+    try:
+        for path in args.ledgers:
+            try:
+                result = index.load(path, site=args.site, item_column=args.column)
+            except LedgerError as exc:
+                print(f"오류: {path}: {exc}", file=sys.stderr)
+                failed = True
+                continue
+            if result is None:
+                print(f"{args.site or site_name(path)}: 바뀌지 않음 (건너뜀)")
+                continue
+            print(f"{result['site']}: 키 {result['keys']:,}개, 다른 현장과 겹침 {len(result['collisions']):,}줄, "
+                  f"승인번호 형식 오류 {len(result['malformed']):,}줄")
+            for collision in islice(result["collisions"], 100):
+                print(f"  {collision['row']:6d}행 {collision['label']}: {collision['item']} [{collision['key']}]"
+                      f" ↔ {collision['other_site']} {collision['other_row']}행")
+            for problem in islice(result["malformed"], 100):
+                print(f"  {problem['row']:6d}행 {MALFORMED_LABEL}: {problem['approval']} ({problem['reason']})")
+    finally:
+        index.close()
+    if failed:
+        parser.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,31 @@
 시행일: 2025.02.12
 """
 
+from array import array
+from functools import partial
+from types import MappingProxyType
+
+from safety_cost_artifact import load_or_build
+from safety_cost_search import (
+    BigramIndex,
+    FacetIndex,
+    FuzzyIndex,
+    HangulIndex,
+    KeywordScanner,
+    PrefixTrie,
+    SuffixAutomaton,
+    build_alias_table,
+    decompose_jamo,
+    evaluate_query,
+    normalize_text,
+    normalize_with_offsets,
+    normalize_words,
+    parse_query,
+    rank_documents,
+    scan_documents,
+)
+from safety_cost_store import NO_CATEGORY, NO_ITEM, NO_STATUS, CatalogStore, Status
+
 # ──────────────────────────────────────────────
 # 9대 사용항목 정의 (고시 제7조)
 # ──────────────────────────────────────────────
@@ -65,6 +90,138 @@ CATEGORIES = {
     },
 }
 
+# ──────────────────────────────────────────────
+# 항목별 사용 한도 (CATEGORIES 의 "limit" 문구를 계산용으로 옮긴 표)
+# ratio: 안전보건관리비 총액 대비 상한 비율
+# ──────────────────────────────────────────────
+CATEGORY_CAPS = {
+    8: {"ratio": 0.05, "legal_basis": "고시 제7조 제1항 제8호"},
+    9: {"ratio": 0.15, "legal_basis": "고시 제7조 제1항 제9호 (2025년 개정, 기존 10%)"},
+}
+
+# ──────────────────────────────────────────────
+# 인정 비율 경과조치 (구입일 기준)
+# 물품명별 시행일 오름차순 목록. 각 비율은 다음 시행일 전날까지 적용되며,
+# 첫 시행일(고시 시행일) 이전 구입분은 종전 고시 대상이므로 별도 확인이 필요합니다.
+# ──────────────────────────────────────────────
+RECOGNITION_RATIOS = {
+    "스마트 안전장비": [
+        {"effective_from": "2025-02-12", "ratio": 0.70, "legal_basis": "고시 부칙 제2조 (2025년 70% 인정)"},
+        {"effective_from": "2026-01-01", "ratio": 1.00, "legal_basis": "고시 부칙 제2조 (2026년 1월 1일부터 100% 인정)"},
+    ],
+}
+
+# ──────────────────────────────────────────────
+# 물품별 사용 조건 (ITEMS 의 note 조건 문구를 판정용으로 옮긴 표)
+# 물품명별 조건 목록이며, 모든 조건을 만족해야 사용 가능입니다.
+#   attribute: 사용내역 줄의 속성 (CONDITION_ATTRIBUTES)
+#   op: "contains_any"  속성 문장에 words 중 하나라도 있음
+#       "contains_none" 속성 문장에 words 가 하나도 없음
+#       "month_in"      사용일자의 월이 months 중 하나
+#       "is_true"       예/아니오 속성이 "예"
+#       "max_ratio"     금액 ÷ 속성 값 ≤ ratio
+#   label: 조건을 만족하지 못했을 때의 사유
+# 속성 값이 비어 있으면 그 조건은 판단하지 않고 "확인 필요"로 남깁니다.
+# ──────────────────────────────────────────────
+CONDITION_ATTRIBUTES = {
+    "purpose": "사용 목적",
+    "user": "사용자",
+    "place": "설치·사용 장소",
+    "event": "행사명",
+    "salary": "월 급여액",
+    "risk_assessment": "위험성평가·노사협의체 반영",
+    "self_constructor": "자기공사자 여부",
+    "date": "사용일자",
+}
+
+_SAFETY_STAFF = ["안전관리자", "보건관리자", "안전담당", "안전보조원", "안전팀", "안전보건팀"]
+_TBM_EDUCATION = ["tbm", "작업전안전점검", "안전교육", "보건교육", "안전보건교육"]
+
+ITEM_CONDITIONS = {
+    "CCTV (안전감시용)": [
+        {"attribute": "purpose", "op": "contains_any", "words": ["안전", "관리감독", "작업감시"],
+         "label": "근로자 안전작업 확인·관리감독 목적이 아님"},
+        {"attribute": "purpose", "op": "contains_none", "words": ["품질", "장비운행", "방범", "도난", "공정관리"],
+         "label": "품질 확보·장비 운행 감시 등 다른 목적 포함"},
+    ],
+    "전용 교육장 냉난방기": [
+        {"attribute": "date", "op": "month_in", "months": [12, 1, 2, 6, 7, 8, 9],
+         "label": "혹한기(12~2월)·혹서기(6~9월)가 아님"},
+        {"attribute": "place", "op": "contains_any", "words": ["교육장", "휴게실", "휴게소"],
+         "label": "전용 교육장·현장 간이 휴게실용이 아님"},
+    ],
+    "이동식 화장실": [
+        {"attribute": "risk_assessment", "op": "is_true", "label": "위험성평가 결과에 반영되지 않음"},
+    ],
+    "안전관리자 업무용 카메라": [
+        {"attribute": "user", "op": "contains_any", "words": _SAFETY_STAFF, "label": "안전관리자 등의 업무용이 아님"},
+    ],
+    "안전관리자 업무용 컴퓨터": [
+        {"attribute": "user", "op": "contains_any", "words": _SAFETY_STAFF, "label": "안전관리자 등의 업무용이 아님"},
+    ],
+    "안전관리자 업무용 프린터": [
+        {"attribute": "user", "op": "contains_any", "words": _SAFETY_STAFF, "label": "안전관리자 등의 업무용이 아님"},
+        {"attribute": "purpose", "op": "contains_none", "words": ["일반사무", "일반업무"], "label": "일반 사무용"},
+    ],
+    "관리감독자 업무수당": [
+        {"attribute": "salary", "op": "max_ratio", "ratio": 0.10, "label": "월 급여액의 10% 초과"},
+    ],
+    "안전보건행사 기념품": [
+        {"attribute": "event", "op": "contains_any", "words": ["안전", "보건"], "label": "안전보건행사가 아님"},
+        {"attribute": "purpose", "op": "contains_none", "words": ["전직원", "전원", "일률", "명절", "창립"],
+         "label": "모든 근로자에 일률적 지급"},
+    ],
+    "안전보건행사 식음료": [
+        {"attribute": "event", "op": "contains_any", "words": ["안전", "보건"], "label": "안전보건행사가 아님"},
+    ],
+    "TBM 방송용 앰프": [
+        {"attribute": "purpose", "op": "contains_any", "words": _TBM_EDUCATION, "label": "TBM·안전보건교육 전용이 아님"},
+        {"attribute": "purpose", "op": "contains_none", "words": ["공정", "일반방송", "작업지시"],
+         "label": "공사 목적물 관리·일반 업무용 방송 포함"},
+    ],
+    "TBM·안전교육용 마이크": [
+        {"attribute": "purpose", "op": "contains_any", "words": _TBM_EDUCATION, "label": "TBM·안전보건교육 전용이 아님"},
+    ],
+    "TBM·안전교육용 확성기 (메가폰)": [
+        {"attribute": "purpose", "op": "contains_any", "words": [*_TBM_EDUCATION, "대피"],
+         "label": "TBM·안전보건교육·긴급대피 방송 목적이 아님"},
+        {"attribute": "purpose", "op": "contains_none", "words": ["작업지시"], "label": "일반 작업 지시용"},
+    ],
+    "생수병 (혹서기)": [
+        {"attribute": "date", "op": "month_in", "months": [6, 7, 8, 9], "label": "혹서기(6~9월)가 아님"},
+        {"attribute": "risk_assessment", "op": "is_true", "label": "위험성평가·노사협의체 결정 없음"},
+    ],
+    "건설재해예방전문지도기관 지도 비용": [
+        {"attribute": "self_constructor", "op": "is_true",
+         "label": "자기공사자가 아님 (2022.08.18부터 발주자 계약으로 이관)"},
+    ],
+}
+
+# ──────────────────────────────────────────────
+# 안전보건관리비 계상 기준 (고시 제3조·제4조, [별표 1])
+# 대상액(재료비 + 직접노무비) 구간별 요율(%)과 기초액(원). 구간은 ACCRUAL_BRACKETS 의
+# 시작 금액 이상 ~ 다음 시작 금액 미만이며, 보건관리자 선임대상 공사는 별도 요율을 적용합니다.
+# ──────────────────────────────────────────────
+ACCRUAL_BRACKETS = (0, 500_000_000, 5_000_000_000)  # 5억 미만 / 5억 이상 50억 미만 / 50억 이상
+ACCRUAL_RATES = {
+    "건축공사": {"rates": (3.11, 2.28, 2.37), "base": (0, 4_325_000, 0), "health_manager": 2.64},
+    "토목공사": {"rates": (3.15, 2.53, 2.60), "base": (0, 3_300_000, 0), "health_manager": 2.73},
+    "중건설공사": {"rates": (3.64, 3.05, 3.11), "base": (0, 2_975_000, 0), "health_manager": 3.39},
+    "특수건설공사": {"rates": (2.07, 1.59, 1.64), "base": (0, 2_450_000, 0), "health_manager": 1.78},
+}
+ACCRUAL_RULES = {
+    # 총 공사금액 2천만 원 이상 공사에 적용 (연간 단가계약은 총 계약금액 기준) — 고시 제3조
+    "min_contract": 20_000_000,
+    # 대상액을 구분할 수 없으면 총 공사금액의 70% 를 대상액으로 봄 — 고시 제4조 제1항
+    "unseparated_target_ratio": 0.7,
+    # 발주자가 재료를 제공하면 (재료비 포함 계상액)과 (미포함 계상액 × 1.2) 중 작은 값 — 고시 제4조 제1항
+    "owner_material_cap": 1.2,
+    # 보건관리자 선임대상 공사금액 (시행령 [별표 5], 토목공사는 1천억 원)
+    "health_manager_contract": {"토목공사": 100_000_000_000},
+    "health_manager_contract_default": 80_000_000_000,
+    "legal_basis": "고용노동부고시 제2025-11호 제4조 및 [별표 1]",
+}
+
 # ──────────────────────────────────────────────
 # 카테고리별 상세 법적 근거
 # ──────────────────────────────────────────────
@@ -576,6 +733,40 @@ PROHIBITED_ITEMS = [
      "keywords": ["공구", "드릴", "렌치", "해머"]},
 ]
 
+# ──────────────────────────────────────────────
+# 동의어·현장 용어 그래프
+# (용어, 용어) 쌍. 연결된 용어는 모두 같은 물품을 가리키며, 물품명·키워드와 이어진 용어로 검색됩니다.
+# ──────────────────────────────────────────────
+ALIASES = [
+    # 보호구
+    ("하이바", "헬멧"),
+    ("헬멧", "안전모"),
+    ("안전띠", "안전벨트"),
+    ("안전벨트", "하네스"),
+    ("안전구두", "안전화"),
+    ("고글", "보안경"),
+    ("용접마스크", "용접면"),
+    ("형광조끼", "반사조끼"),
+    ("귀마게", "귀마개"),
+    # 안전시설
+    ("아시바", "비계"),
+    ("생명줄", "라이프라인"),
+    ("안전난간대", "안전난간"),
+    ("소화전함", "소화전"),
+    ("소화전", "소화설비"),
+    ("스프링쿨러", "스프링클러"),
+    ("씨씨티비", "CCTV"),
+    ("냉풍기", "냉방기"),
+    ("구급박스", "구급상자"),
+    ("워키톡키", "워키토키"),
+    # 사용 불가 항목
+    ("칼라콘", "라바콘"),
+    ("트래픽콘", "라바콘"),
+    ("경광봉", "교통봉"),
+    ("함마", "해머"),
+    ("빠루", "공구"),
+]
+
 # ──────────────────────────────────────────────
 # 2025-2026 주요 변경사항
 # ──────────────────────────────────────────────
@@ -672,55 +863,392 @@ CASES_AND_PRECEDENTS = [
     },
 ]
 
+# ──────────────────────────────────────────────
+# 검색 색인 (모듈 로드 시 색인 파일에서 읽거나 1회 생성)
+# ──────────────────────────────────────────────
+def catalog_documents(items, prohibited_items):
+    """검색 대상 문서 목록을 만듭니다. 문서 번호는 ITEMS 다음 PROHIBITED_ITEMS 순서입니다.
+
+    모든 문자열은 이때 한 번 normalize_text 로 정규화되어 저장됩니다.
+    """
+    return CatalogStore(items, prohibited_items).documents()
+
+
+def build_indexes():
+    """카탈로그 저장소와 모든 검색 색인을 새로 만듭니다.
+
+    결과는 safety_cost_artifact 가 소스 해시와 함께 파일로 저장해 두며,
+    소스가 바뀌지 않았다면 다음 시작 시 다시 만들지 않고 읽어 옵니다.
+    """
+    store = CatalogStore(ITEMS, PROHIBITED_ITEMS)
+    documents = store.documents()
+    statuses = [store.status(doc_id) for doc_id in range(len(store))]
+    alias_table = build_alias_table(ALIASES, documents)
+    return {
+        "store": store,
+        "documents": documents,
+        "statuses": statuses,
+        "bigram": BigramIndex(documents),
+        "suffix": SuffixAutomaton(documents),
+        # 별칭 → 문서 번호 (동의어 그래프의 전이 폐포)
+        "aliases": alias_table,
+        # 구매 내역 문장 속 키워드·별칭을 한 번에 찾는 Aho-Corasick 오토마톤
+        "scanner": KeywordScanner([
+            *((keyword, doc_id) for doc_id, texts in enumerate(documents) for keyword in texts[1:]),
+            *((alias, doc_id) for alias, doc_ids in alias_table.items() for doc_id in doc_ids),
+        ]),
+        # 초성("ㅇㅈㅁ")·입력 중인 음절("안전ㅁ") 검색용 자모 색인
+        "hangul": HangulIndex(documents),
+        # 오타 교정("소화귀" → 소화기)용 자모 단위 삭제 사전
+        "fuzzy": FuzzyIndex(
+            (term, doc_id)
+            for doc_id, (name, keywords) in enumerate(zip(store.names, store.keywords))
+            for term in (name, *keywords)
+        ),
+        # 검색창 자동완성용 트라이 (물품명을 키워드보다 먼저 추천)
+        "autocomplete": PrefixTrie(
+            entry
+            for name, keywords in zip(store.names, store.keywords)
+            for entry in ((name, 2), *((kw, 1) for kw in keywords))
+        ),
+        # 상태·항목·한도 유무별 비트맵 (사용 불가 항목의 category 는 None)
+        "facets": FacetIndex({
+            "status": statuses,
+            "category": [store.category(doc_id) for doc_id in range(len(store))],
+            "has_limit": [
+                category in CATEGORIES and CATEGORIES[category]["limit"] is not None
+                for category in store.categories
+            ],
+        }),
+    }
+
+
+_INDEXES = load_or_build(build_indexes)
+
+# 열 단위 카탈로그 저장소. 색인·필터·검색 결과는 모두 이 저장소에서 만들어집니다.
+CATALOG_STORE = _INDEXES["store"]
+
+# 문서 번호 → 저장소를 dict 처럼 읽는 ItemView (filter_items·검색 결과 레코드용)
+_CATALOG = tuple(CATALOG_STORE.views())
+_DOCUMENTS = _INDEXES["documents"]
+_DOC_STATUS = _INDEXES["statuses"]
+# 정규화된 물품명 → 문서 번호 (키워드가 없는 줄을 물품명 그대로 적은 경우의 분류용, 같은 이름은 앞쪽 우선)
+_NAME_IDS = {}
+for _doc_id, _texts in enumerate(_DOCUMENTS):
+    _NAME_IDS.setdefault(_texts[0], _doc_id)
+
+
+def _freeze(value):
+    """dict·list 를 읽기 전용 MappingProxyType·tuple 로 재귀 변환합니다."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+_FROZEN_LEGAL_DETAILS = {cat_id: _freeze(detail) for cat_id, detail in CATEGORY_LEGAL_DETAILS.items()}
+
+
+def _result_record(item, status: str):
+    """검색 결과로 돌려줄 읽기 전용 레코드를 만듭니다. (문서마다 1회, 모듈 로드 시)"""
+    if status == "prohibited":
+        return _freeze({
+            "name": item["name"],
+            "status": "prohibited",
+            "reason": item["reason"],
+            "category_id": None,
+            "category_name": "해당 없음",
+            "legal_detail": {
+                "상위법": "산업안전보건법 제72조",
+                "고시": "고용노동부고시 제2025-11호 제7조 (사용 불가 사항)",
+                "관련조항": [item["reason"]],
+            },
+        })
+    cat = CATEGORIES[item["category"]]
+    return MappingProxyType({
+        "name": item["name"],
+        "status": item["status"],
+        "category_id": item["category"],
+        "category_name": cat["name"],
+        "note": item["note"],
+        "legal_basis": cat["legal_basis"],
+        "limit": cat.get("limit"),
+        "legal_detail": _FROZEN_LEGAL_DETAILS.get(item["category"], MappingProxyType({})),
+    })
+
+
+# 문서 번호 → 검색 결과 레코드. search_items 는 새 dict 를 만들지 않고 이 레코드를 공유합니다.
+_RESULT_RECORDS = tuple(_result_record(item, status) for item, status in zip(_CATALOG, _DOC_STATUS))
+
+# 검색 엔진: 문서 번호를 오름차순으로 반환하는 함수. 엔진 간 교차 검증이 가능하도록 모두 유지
+SEARCH_ENGINES = {
+    "bigram": _INDEXES["bigram"].search,
+    "suffix": _INDEXES["suffix"].search,
+    "linear": partial(scan_documents, _DOCUMENTS),
+}
+DEFAULT_ENGINE = "bigram"
+
+_ALIAS_TABLE = _INDEXES["aliases"]
+_SCANNER = _INDEXES["scanner"]
+_HANGUL_INDEX = _INDEXES["hangul"]
+_FUZZY_INDEX = _INDEXES["fuzzy"]
+_AUTOCOMPLETE = _INDEXES["autocomplete"]
+_FACET_INDEX = _INDEXES["facets"]
+
+
 # ──────────────────────────────────────────────
 # 검색 함수
 # ──────────────────────────────────────────────
-def search_items(query: str):
-    """물품명으로 검색하여 사용 가능 여부를 반환합니다."""
-    query_lower = query.strip().lower()
-    if not query_lower:
-        return {"allowed": [], "conditional": [], "prohibited": []}
-
-    results = {"allowed": [], "conditional": [], "prohibited": []}
-
-    # 사용 가능/조건부 항목 검색
-    for item in ITEMS:
-        name_match = query_lower in item["name"].lower()
-        keyword_match = any(query_lower in kw.lower() for kw in item["keywords"])
-        if name_match or keyword_match:
-            cat = CATEGORIES[item["category"]]
-            legal_detail = CATEGORY_LEGAL_DETAILS.get(item["category"], {})
-            result = {
-                "name": item["name"],
-                "status": item["status"],
-                "category_id": item["category"],
-                "category_name": cat["name"],
-                "note": item["note"],
-                "legal_basis": cat["legal_basis"],
-                "limit": cat.get("limit"),
-                "legal_detail": legal_detail,
-            }
-            if item["status"] == "allowed":
-                results["allowed"].append(result)
-            else:
-                results["conditional"].append(result)
-
-    # 사용 불가 항목 검색
-    for item in PROHIBITED_ITEMS:
-        name_match = query_lower in item["name"].lower()
-        keyword_match = any(query_lower in kw.lower() for kw in item["keywords"])
-        if name_match or keyword_match:
-            results["prohibited"].append({
-                "name": item["name"],
-                "status": "prohibited",
-                "reason": item["reason"],
-                "category_id": None,
-                "category_name": "해당 없음",
-                "legal_detail": {
-                    "상위법": "산업안전보건법 제72조",
-                    "고시": "고용노동부고시 제2025-11호 제7조 (사용 불가 사항)",
-                    "관련조항": [item["reason"]],
-                },
-            })
+def _lookup_term(term: str, engine: str):
+    """검색어 하나에 일치하는 문서 번호를 오름차순으로 반환합니다.
+
+    부분 문자열 일치와 별칭 일치를 합치고, 둘 다 없으면 초성·자모 단위로 다시 찾습니다.
+    """
+    doc_ids = SEARCH_ENGINES[engine](term)
+    aliased = _ALIAS_TABLE.get(term)
+    if aliased:
+        doc_ids = sorted(set(doc_ids).union(aliased))
+    return doc_ids or _HANGUL_INDEX.search(term)
+
+
+def _matches_all(doc_id: int, terms):
+    """문서가 모든 검색어를 부분 문자열 또는 별칭으로 포함하는지 확인합니다."""
+    texts = _DOCUMENTS[doc_id]
+    return all(
+        any(term in text for text in texts) or doc_id in _ALIAS_TABLE.get(term, ())
+        for term in terms
+    )
+
 
+def search_items(query: str, engine: str = DEFAULT_ENGINE, limit: int = None, cache: dict = None):
+    """물품명으로 검색하여 사용 가능 여부를 반환합니다.
+
+    engine: SEARCH_ENGINES 의 키 ("bigram" | "suffix" | "linear")
+    limit: 관련도 상위 limit 건만 결과에 담습니다. (None 이면 전체)
+    공백으로 구분된 검색어는 AND, "OR"·"|" 는 OR, "NOT"·"-" 접두는 제외로 처리합니다.
+    (예: "안전 장갑", "장갑 OR 마스크", "장갑 -면장갑")
+    ALIASES 에 등록된 현장 용어도 해당 물품으로 찾습니다. (예: "하이바" → 안전모)
+    검색어별로 일치하는 항목이 없으면 초성·자모 단위로 다시 찾습니다. (예: "ㅇㅈㅁ", "안전ㅁ")
+    초성·자모 검색 결과도 초성형·자모 분해형 문자열에서의 일치 위치(정확·접두·포함)로 순위를 매깁니다.
+    결과는 상태별 검색 결과 레코드(읽기 전용, 모든 호출이 공유)의 관련도 순 튜플이며,
+    "counts" 에는 limit 적용 전 상태별 건수가 담깁니다.
+
+    cache: 사용자(세션)별 직전 검색 결과를 담아 둘 dict. 새 검색어가 직전 검색어를
+    이어 쓴 것이면("안전" → "안전모") 직전 결과 안에서만 다시 거릅니다.
+    """
+    groups = parse_query(query)
+    if not groups:
+        return {"allowed": (), "conditional": (), "prohibited": (),
+                "counts": {"allowed": 0, "conditional": 0, "prohibited": 0}}
+
+    # AND 검색어만 있는 경우 검색어를 이어 쓰면 결과는 직전 결과의 부분집합
+    key = " ".join(groups[0][0]) if len(groups) == 1 and not groups[0][1] else None
+    doc_ids = None
+    if cache is not None and key and cache.get("key") and key.startswith(cache["key"]):
+        if key == cache["key"]:
+            doc_ids = cache["ids"]
+        else:
+            # 별칭으로 새로 걸리는 문서를 후보에 더한 뒤 거르고,
+            # 걸러진 결과가 없으면 초성·자모 검색일 수 있으므로 전체 검색
+            candidates = set(cache["ids"])
+            for term in groups[0][0]:
+                candidates.update(_ALIAS_TABLE.get(term, ()))
+            doc_ids = [doc_id for doc_id in sorted(candidates) if _matches_all(doc_id, groups[0][0])] or None
+    if doc_ids is None:
+        doc_ids = evaluate_query(groups, lambda term: _lookup_term(term, engine))
+    if cache is not None:
+        cache["key"] = key
+        cache["ids"] = doc_ids
+    counts = {"allowed": 0, "conditional": 0, "prohibited": 0}
+    for doc_id in doc_ids:
+        counts[_DOC_STATUS[doc_id]] += 1
+
+    terms = [term for positives, _ in groups for term in positives]
+    ranked = {"allowed": [], "conditional": [], "prohibited": []}
+    for doc_id in rank_documents(_DOCUMENTS, doc_ids, terms, limit, hangul=_HANGUL_INDEX):
+        ranked[_DOC_STATUS[doc_id]].append(_RESULT_RECORDS[doc_id])
+
+    results = {status: tuple(records) for status, records in ranked.items()}
+    results["counts"] = counts
     return results
+
+
+def suggest_items(query: str, limit: int = 5):
+    """오타가 의심되는 검색어에 대해 '혹시 이것을 찾으셨나요?' 후보를 반환합니다.
+
+    자모 편집 거리 1~2 이내의 물품명·키워드 중 검색어를 이미 포함하는 용어
+    (정확 검색 결과에 나오는 용어)는 제외합니다. 짧은 검색어일수록 허용 거리가 줄어듭니다.
+    """
+    normalized = normalize_text(query)
+    max_distance = min(2, len(decompose_jamo(normalized)) // 5)
+    if max_distance == 0:
+        return []
+
+    suggestions = []
+    for term, distance, doc_ids in _FUZZY_INDEX.lookup(normalized, max_distance, skip_containing=True):
+        suggestions.append({
+            "keyword": term,
+            "distance": distance,
+            "names": [CATALOG_STORE.names[doc_id] for doc_id in doc_ids],
+        })
+        if len(suggestions) >= limit:
+            break
+    return suggestions
+
+
+def autocomplete(prefix: str):
+    """입력 중인 검색어로 시작하는 물품명·키워드 추천어를 반환합니다. (자모 단위 접두사)"""
+    prefix = prefix.strip()
+    if not prefix:
+        return ()
+    return _AUTOCOMPLETE.complete(prefix)
+
+
+def _longest_matches(matches):
+    """다른 일치 안에 포함된 일치를 버리고 시작 위치 순으로 반환합니다."""
+    # 시작 위치 오름차순·길이 내림차순으로 훑으며 앞선 일치에 덮이는 일치를 버립니다.
+    matches = sorted(matches, key=lambda match: (match[0], -match[1]))
+    kept = []
+    covered_to = 0
+    for match in matches:
+        if match[1] > covered_to:
+            kept.append(match)
+            covered_to = match[1]
+    return kept
+
+
+def scan_text(text: str, longest_only: bool = True):
+    """구매 내역 같은 자유 문장에서 언급된 물품을 모두 찾아 위치와 함께 반환합니다.
+
+    예: "3M 방진마스크 KF94 외 2건 / 코팅장갑 10타" → 방진마스크, kf94, 코팅장갑 ...
+    결과는 {"start", "end", "text", "keyword", "items"} 의 목록(원문 위치 순)이며,
+    start·end 는 원문 text 기준 위치, items 는 해당 검색 결과 레코드 튜플입니다.
+    longest_only: 더 긴 일치 안에 포함된 일치("방진마스크" 안의 "마스크")는 제외
+    """
+    normalized, spans = normalize_with_offsets(text)
+    # 원문 구간 사이에 지워진 글자(공백·문장부호)가 있던 자리를 단어 경계로 되살립니다.
+    words = "".join(
+        " " + ch if i and spans[i - 1][1] != spans[i][0] else ch for i, ch in enumerate(normalized)
+    )
+    matches = _SCANNER.scan_words(words)
+    matches = _longest_matches(matches) if longest_only else sorted(matches)
+
+    found = []
+    for start, end, keyword_id in matches:
+        text_start, text_end = spans[start][0], spans[end - 1][1]
+        found.append({
+            "start": text_start,
+            "end": text_end,
+            "text": text[text_start:text_end],
+            "keyword": _SCANNER.keywords[keyword_id],
+            "items": tuple(_RESULT_RECORDS[doc_id] for doc_id in _SCANNER.keyword_docs[keyword_id]),
+        })
+    return found
+
+
+def keyword_spans(words: str):
+    """normalize_words 로 정규화한 한 줄의 키워드 위치와 가리키는 문서 번호를 반환합니다. (가장 긴 일치만, 위치 순)
+
+    위치는 공백을 지운 문장(normalize_text 결과) 기준입니다. 결과는 (start, end, 문서 번호 튜플) 의 목록입니다. 별칭("하이바")과 대표 키워드("안전모")는
+    같은 문서 번호 튜플을 가리키므로, 표현이 달라도 같은 물품이면 같은 값으로 비교할 수 있습니다.
+    """
+    return [
+        (start, end, _SCANNER.keyword_docs[keyword_id])
+        for start, end, keyword_id in _item_matches(words)
+    ]
+
+
+# ──────────────────────────────────────────────
+# 일괄 분류
+# ──────────────────────────────────────────────
+# 한 줄에 여러 물품이 언급되면 더 엄격한 상태를 우선합니다. (사용 불가 > 조건부 > 사용 가능)
+_SEVERITY = {Status.PROHIBITED: 2, Status.CONDITIONAL: 1, Status.ALLOWED: 0}
+NO_MATCH_REASON = "일치하는 물품 없음"
+# 키워드 바로 뒤에 오면 그 물품이 아니라 부속품을 산 것으로 보는 낱말 ("노트북 파우치", "헬멧 케이스")
+ACCESSORY_WORDS = ("파우치", "케이스", "가방", "커버", "거치대", "보관함", "스티커")
+
+
+def _item_matches(words: str):
+    """normalize_words 로 정규화한 한 줄에서 물품을 가리키는 키워드 일치를 반환합니다. (가장 긴 일치만, 위치 순)
+
+    한국어 복합 명사는 뒤쪽이 중심어이므로, 뒤에 부속품 낱말(ACCESSORY_WORDS)이 붙은 키워드는 버립니다.
+    """
+    text = words.replace(" ", "")
+    return [
+        match for match in _longest_matches(_SCANNER.scan_words(words))
+        if not text.startswith(ACCESSORY_WORDS, match[1])
+    ]
+
+
+def _classify_normalized(words: str):
+    """normalize_words 로 정규화한 한 줄의 대표 문서 번호를 반환합니다. (없으면 NO_ITEM)
+
+    문장 속 키워드(가장 긴 일치만, 짧은 키워드는 단어 경계의 일치만)를 모두 찾아 가장 엄격한 상태 → 긴 키워드 → 카탈로그 순서로
+    하나를 고릅니다. 키워드가 없으면 한 줄 전체가 물품명과 똑같을 때만 그 물품으로 봅니다.
+    ("임대", "자재" 같은 조각이 부분 일치로 엉뚱한 물품에 걸리지 않도록 검색 순위는 쓰지 않습니다)
+    """
+    statuses = CATALOG_STORE.statuses
+    best = None
+    for start, end, keyword_id in _item_matches(words):
+        for doc_id in _SCANNER.keyword_docs[keyword_id]:
+            key = (_SEVERITY[statuses[doc_id]], end - start, -doc_id)
+            if best is None or key > best:
+                best = key
+    if best is not None:
+        return -best[2]
+    return _NAME_IDS.get(words.replace(" ", ""), NO_ITEM)
+
+
+def classify_many(lines):
+    """구매 내역 여러 줄을 한 번에 분류하여 열(column) 단위 결과를 반환합니다.
+
+    같은 내용(정규화 기준, 단어 경계 포함)의 줄은 한 번만 분류합니다. 결과의 각 열은 입력 줄과 같은 순서이며,
+    일치하는 물품이 없는 줄은 NO_STATUS·NO_ITEM·NO_CATEGORY·NO_MATCH_REASON 으로 채웁니다.
+      "status":   array('b') - Status 값 (Status(code).label 로 "allowed" 등 문자열)
+      "item_id":  array('l') - 문서 번호 (CATALOG_STORE·검색 결과 레코드 번호)
+      "category": array('b') - 항목 번호 (사용 불가 항목은 NO_CATEGORY)
+      "reason":   list - 사용 가능·조건부는 비고, 사용 불가는 불가 사유 (공유 문자열)
+    """
+    store = CATALOG_STORE
+    unique = {}
+    raw_ids = {}  # 원문이 같은 줄은 정규화도 다시 하지 않습니다.
+    line_ids = array("l")
+    for line in lines:
+        line_id = raw_ids.get(line)
+        if line_id is None:
+            key = normalize_words(line)
+            line_id = unique.get(key)
+            if line_id is None:
+                line_id = unique[key] = len(unique)
+            raw_ids[line] = line_id
+        line_ids.append(line_id)
+
+    unique_docs = [_classify_normalized(key) for key in unique]
+    unique_status = [NO_STATUS if doc_id == NO_ITEM else store.statuses[doc_id] for doc_id in unique_docs]
+    unique_category = [NO_CATEGORY if doc_id == NO_ITEM else store.categories[doc_id] for doc_id in unique_docs]
+    unique_reason = [NO_MATCH_REASON if doc_id == NO_ITEM else store.details[doc_id] for doc_id in unique_docs]
+    return {
+        "status": array("b", [unique_status[i] for i in line_ids]),
+        "item_id": array("l", [unique_docs[i] for i in line_ids]),
+        "category": array("b", [unique_category[i] for i in line_ids]),
+        "reason": [unique_reason[i] for i in line_ids],
+    }
+
+
+# ──────────────────────────────────────────────
+# 속성 필터
+# ──────────────────────────────────────────────
+def filter_items(status=None, category=None, has_limit=None):
+    """조건에 맞는 물품을 카탈로그 순서(ITEMS, PROHIBITED_ITEMS)의 ItemView 로 반환합니다.
+
+    각 조건은 허용할 값의 목록이며 None 이면 적용하지 않습니다.
+    예: filter_items(status=["allowed", "conditional"], category=[3])
+    """
+    selected = _FACET_INDEX.select(status=status, category=category, has_limit=has_limit)
+    return [_CATALOG[doc_id] for doc_id in _FACET_INDEX.ids(selected)]
+
+
+def facet_counts(facet: str, status=None, category=None, has_limit=None):
+    """facet("status" | "category" | "has_limit") 값별 물품 수를 나머지 조건을 적용해 반환합니다."""
+    return _FACET_INDEX.counts(facet, status=status, category=category, has_limit=has_limit)
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+증빙 사진 중복 검출
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+영수증·설치 사진의 지각 해시(perceptual hash, DCT 64비트)를 계산해 SQLite 색인에 저장하고,
+다른 현장 사진을 복사해 쓴 것 같은 유사 사진 쌍을 찾습니다.
+
+- 사진 폴더 구조: 기준 폴더/현장/.../사진.jpg (첫 하위 폴더 이름을 현장으로 봅니다)
+- 색인은 파일 경로·크기·수정 시각으로 바뀐 사진만 다시 계산합니다. (증분 갱신)
+- 유사 쌍은 64비트 해시를 16비트 4개 구간으로 나눈 LSH 버킷(다중 색인 해싱)에서 찾습니다.
+  해밍 거리 d 이하인 두 해시는 어느 한 구간의 차이가 d // 4 비트 이하이므로,
+  그 범위의 버킷만 확인하면 모든 쌍을 비교하지 않고도 빠짐없이 찾을 수 있습니다.
+
+사용법: python safety_cost_evidence.py scan 사진폴더 [--index 색인.sqlite] [--jobs 8]
+        python safety_cost_evidence.py duplicates [--index 색인.sqlite] [--distance 6] [--new-only]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+DEFAULT_INDEX = "evidence_index.sqlite"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"}
+
+# 해밍 거리 기본 허용치 (64비트 중). 재압축·크기 조정·약한 보정은 대개 이 안에 들어옵니다.
+DEFAULT_MAX_DISTANCE = 6
+# 구간마다 max_distance // 4 비트까지 뒤집어 버킷을 찾으므로 거리가 커지면 탐색 버킷 수가 급격히 늘어납니다.
+MAX_DISTANCE_LIMIT = 15
+BAND_BITS = 16
+N_BANDS = 64 // BAND_BITS
+# 한 번에 해시를 계산해 색인에 기록할 사진 수
+HASH_BATCH = 1_000
+
+
+# ──────────────────────────────────────────────
+# 지각 해시
+# ──────────────────────────────────────────────
+_HASH_SIZE = 32
+_DCT = np.cos(
+    np.pi * (2 * np.arange(_HASH_SIZE)[None, :] + 1) * np.arange(_HASH_SIZE)[:, None] / (2 * _HASH_SIZE)
+)
+
+
+def perceptual_hash(image: Image.Image):
+    """사진의 64비트 DCT 지각 해시(pHash)를 정수로 반환합니다.
+
+    32×32 흑백으로 줄인 뒤 2차원 DCT 의 저주파 8×8 계수를 중앙값과 비교해 비트를 만듭니다.
+    """
+    gray = ImageOps.exif_transpose(image).convert("L").resize((_HASH_SIZE, _HASH_SIZE), Image.LANCZOS)
+    pixels = np.asarray(gray, dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:8, :8].ravel()
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hash_file(path):
+    """사진 파일의 지각 해시를 반환합니다. (읽을 수 없거나 픽셀 수가 지나치게 큰 파일은 None)"""
+    try:
+        with Image.open(path) as image:
+            # JPEG 는 해시에 필요한 크기 근처로 줄여서 읽습니다.
+            image.draft("L", (_HASH_SIZE * 2, _HASH_SIZE * 2))
+            return perceptual_hash(image)
+    except (OSError, UnidentifiedImageError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def _hash_task(path):
+    return path, hash_file(path)
+
+
+def hamming(a: int, b: int):
+    """두 해시의 해밍 거리"""
+    return (a ^ b).bit_count()
+
+
+# 바이트별 1 비트 수 (np.bitwise_count 가 없는 NumPy 에서 해밍 거리 계산용)
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def hamming_many(a, b):
+    """uint64 해시 배열 a·b 의 원소별 해밍 거리"""
+    xor = np.ascontiguousarray(np.bitwise_xor(a, b), dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):  # NumPy 2.0 이상
+        return np.bitwise_count(xor).astype(np.int64)
+    return _POPCOUNT[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int64)
+
+
+def _to_signed(value: int):
+    """SQLite INTEGER(부호 있는 64비트)에 넣기 위해 부호 없는 해시를 변환합니다."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+# ──────────────────────────────────────────────
+# LSH 버킷 (다중 색인 해싱)
+# ──────────────────────────────────────────────
+# 한 번에 후보를 펼칠 질의 사진 수 (후보 배열 메모리 상한)
+QUERY_CHUNK = 20_000
+
+
+def _flip_masks(radius: int):
+    """BAND_BITS 비트 값에서 radius 비트 이하를 뒤집는 XOR 마스크 (0 포함)"""
+    masks = [0]
+    frontier = [(0, -1)]
+    for _ in range(radius):
+        frontier = [(mask | (1 << bit), bit) for mask, last in frontier for bit in range(last + 1, BAND_BITS)]
+        masks.extend(mask for mask, _ in frontier)
+    return np.array(masks, dtype=np.int64)
+
+
+class BandIndex:
+    """해시를 구간 값별로 정렬해 두고, 해밍 거리 이내 후보만 꺼내는 메모리 색인입니다.
+
+    구간마다 사진을 구간 값 순으로 정렬하고 구간 값별 시작 위치표를 두어, 버킷 하나가
+    정렬 배열의 연속 구간이 되므로 여러 사진의 버킷을 배열 색인 한 번으로 찾습니다.
+    """
+
+    def __init__(self, hashes):
+        """hashes: uint64 해시 배열"""
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.bands = []
+        for band in range(N_BANDS):
+            keys = self._band_keys(self.hashes, band)
+            order = np.argsort(keys, kind="stable")
+            # 구간 값 v 의 버킷은 order[starts[v]:starts[v + 1]] 입니다.
+            starts = np.searchsorted(keys[order], np.arange((1 << BAND_BITS) + 1, dtype=np.uint64))
+            self.bands.append((starts, order))
+
+    @staticmethod
+    def _band_keys(hashes, band: int):
+        return ((hashes >> np.uint64(BAND_BITS * band)) & np.uint64((1 << BAND_BITS) - 1)).astype(np.int64)
+
+    def _candidates(self, queries, radius: int):
+        """queries(사진 위치 배열) 마다 같은 버킷(반경 radius)에 든 사진 위치 쌍을 반환합니다."""
+        masks = _flip_masks(radius)
+        left, right = [], []
+        for band, (starts, order) in enumerate(self.bands):
+            query_keys = self._band_keys(self.hashes[queries], band)
+            for mask in masks:
+                probe = query_keys ^ mask
+                lo = starts[probe]
+                counts = starts[probe + 1] - lo
+                total = int(counts.sum())
+                if not total:
+                    continue
+                # 질의마다 [lo, lo + count) 구간을 펼칩니다.
+                offsets = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+                left.append(np.repeat(queries, counts))
+                right.append(order[offsets + np.arange(total)])
+        if not left:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(left), np.concatenate(right)
+
+    def pairs(self, queries, max_distance: int):
+        """queries 의 사진과 해밍 거리 max_distance 이하인 사진 쌍을 반환합니다.
+
+        같은 쌍은 한 번만 나오며, 질의 사진끼리의 쌍은 (작은 위치, 큰 위치) 로 나옵니다.
+        반환값: (질의 사진 위치, 상대 사진 위치, 해밍 거리) 배열
+        """
+        queries = np.asarray(queries, dtype=np.int64)
+        is_query = np.zeros(len(self.hashes), dtype=bool)
+        is_query[queries] = True
+        n = len(self.hashes)
+        found = []
+        for start in range(0, len(queries), QUERY_CHUNK):
+            left, right = self._candidates(queries[start:start + QUERY_CHUNK], max_distance // N_BANDS)
+            distance = hamming_many(self.hashes[left], self.hashes[right])
+            # 거리로 먼저 거른 뒤(대부분의 후보가 여기서 빠짐) 여러 구간에서 겹쳐 나온 쌍을 합칩니다.
+            keep = (distance <= max_distance) & (left != right) & ~((right < left) & is_query[right])
+            keys, first = np.unique(left[keep] * n + right[keep], return_index=True)
+            found.append((keys // n, keys % n, distance[keep][first]))
+        if not found:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        return tuple(np.concatenate(column) for column in zip(*found))
+
+
+# ──────────────────────────────────────────────
+# 디스크 색인 (SQLite, 증분 갱신)
+# ──────────────────────────────────────────────
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    site TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash INTEGER,
+    scan INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_scan ON images (scan);
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL
+);
+"""
+
+
+def _image_files(root: Path):
+    """root 아래 사진 파일의 (경로, 현장, 크기, 수정 시각) 을 하나씩 반환합니다."""
+    for folder, _, files in os.walk(root):
+        relative = Path(folder).relative_to(root)
+        site = relative.parts[0] if relative.parts else ""
+        for name in files:
+            if Path(name).suffix.lower() in IMAGE_SUFFIXES:
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:  # 폴더를 훑는 사이 지워졌거나 읽을 수 없는 파일
+                    continue
+                yield path, site, stat.st_size, stat.st_mtime_ns
+
+
+class EvidenceIndex:
+    """사진 경로·현장·지각 해시를 담는 SQLite 색인입니다."""
+
+    def __init__(self, path=DEFAULT_INDEX):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def last_scan(self):
+        """가장 최근 갱신 번호 (갱신한 적이 없으면 0)"""
+        return self.db.execute("SELECT COALESCE(MAX(id), 0) FROM scans").fetchone()[0]
+
+    def update(self, root, workers: int = None, on_progress=None):
+        """root 아래 사진 중 새로 생기거나 바뀐 사진만 해시를 계산해 색인에 반영합니다.
+
+        사라진 사진은 색인에서 지웁니다. 바뀐 사진에는 이번 갱신 번호가 붙으므로
+        duplicates(new_only=True) 로 이번에 들어온 사진만 기존 사진과 비교할 수 있습니다.
+        반환값: {"scan": 갱신 번호, "added": 해시를 새로 계산한 수, "removed": 지운 수, "failed": 읽지 못한 수}
+        """
+        root = Path(root).resolve()
+        with self.db:
+            scan = self.db.execute("INSERT INTO scans (root) VALUES (?)", (str(root),)).lastrowid
+        prefix = f"{root}{os.sep}"
+        known = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in self.db.execute(
+                "SELECT path, size, mtime_ns FROM images WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            )
+        }
+        pending = []
+        for path, site, size, mtime_ns in _image_files(root):
+            if known.pop(path, None) != (size, mtime_ns):
+                pending.append((path, site, size, mtime_ns))
+        with self.db:
+            self.db.executemany("DELETE FROM images WHERE path = ?", ((path,) for path in known))
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(pending) > 1 else None
+        failed = 0
+        try:
+            for start in range(0, len(pending), HASH_BATCH):
+                batch = pending[start:start + HASH_BATCH]
+                paths = [path for path, *_ in batch]
+                results = executor.map(_hash_task, paths, chunksize=32) if executor else map(_hash_task, paths)
+                hashes = dict(results)
+                failed += sum(value is None for value in hashes.values())
+                # 묶음마다 기록하므로 중간에 멈춰도 다음 갱신은 남은 사진부터 계산합니다.
+                with self.db:
+                    self.db.executemany(
+                        "INSERT INTO images (path, site, size, mtime_ns, hash, scan) VALUES (?, ?, ?, ?, ?, ?)"
+                        " ON CONFLICT (path) DO UPDATE SET site = excluded.site, size = excluded.size,"
+                        " mtime_ns = excluded.mtime_ns, hash = excluded.hash, scan = excluded.scan",
+                        (
+                            (path, site, size, mtime_ns,
+                             None if hashes[path] is None else _to_signed(hashes[path]), scan)
+                            for path, site, size, mtime_ns in batch
+                        ),
+                    )
+                if on_progress is not None:
+                    on_progress(min(start + HASH_BATCH, len(pending)), len(pending))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return {"scan": scan, "added": len(pending), "removed": len(known), "failed": failed}
+
+    def duplicates(self, max_distance: int = DEFAULT_MAX_DISTANCE, new_only: bool = False,
+                   cross_site: bool = True):
+        """유사 사진 쌍을 해밍 거리 순으로 반환합니다.
+
+        new_only: 가장 최근 갱신에서 들어온 사진만 기존 전체와 비교합니다.
+        cross_site: 서로 다른 현장 사이의 쌍만 반환합니다. (같은 현장 안의 중복은 제외)
+        반환값: {"distance", "site_a", "path_a", "site_b", "path_b"} 목록
+        """
+        if not 0 <= max_distance <= MAX_DISTANCE_LIMIT:
+            raise ValueError(f"max_distance 는 0~{MAX_DISTANCE_LIMIT} 이어야 합니다.")
+        rows = self.db.execute("SELECT path, site, hash, scan FROM images WHERE hash IS NOT NULL").fetchall()
+        if not rows:
+            return []
+        paths, sites, hashes, scans = zip(*rows)
+        _, site_ids = np.unique(np.array(sites, dtype=str), return_inverse=True)
+        index = BandIndex(np.array(hashes, dtype=np.int64).view(np.uint64))
+        scans = np.array(scans, dtype=np.int64)
+        queries = np.flatnonzero(scans == self.last_scan()) if new_only else np.arange(len(rows))
+
+        left, right, distance = index.pairs(queries, max_distance)
+        if cross_site:
+            keep = site_ids[left] != site_ids[right]
+            left, right, distance = left[keep], right[keep], distance[keep]
+        pairs = [
+            {"distance": int(d), "site_a": sites[a], "path_a": paths[a], "site_b": sites[b], "path_b": paths[b]}
+            for a, b, d in zip(left.tolist(), right.tolist(), distance.tolist())
+        ]
+        pairs.sort(key=lambda pair: (pair["distance"], pair["path_a"], pair["path_b"]))
+        return pairs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="증빙 사진 중복 검출")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="색인 파일 경로")
+    commands = parser.add_subparsers(dest="command", required=True)
+    scan = commands.add_parser("scan", help="사진 폴더를 색인에 반영 (바뀐 사진만)")
+    scan.add_argument("root", help="사진 기준 폴더 (하위 폴더 이름 = 현장)")
+    scan.add_argument("--jobs", type=int, help="해시 계산 프로세스 수 (기본: CPU 수)")
+    duplicates = commands.add_parser("duplicates", help="다른 현장 사이의 유사 사진 쌍 출력")
+    duplicates.add_argument("--distance", type=int, default=DEFAULT_MAX_DISTANCE, help=f"허용 해밍 거리 (0~{MAX_DISTANCE_LIMIT})")
+    duplicates.add_argument("--new-only", action="store_true", help="가장 최근 scan 에서 들어온 사진만 비교")
+    duplicates.add_argument("--same-site", action="store_true", help="같은 현장 안의 중복도 포함")
+    args = parser.parse_args(argv)
+
+    if args.command == "duplicates" and not 0 <= args.distance <= MAX_DISTANCE_LIMIT:
+        parser.exit(2, f"오류: --distance 는 0~{MAX_DISTANCE_LIMIT} 이어야 합니다.\n")
+    index = EvidenceIndex(args.index)
+    try:
+        if args.command == "scan":
+            result = index.update(args.root, args.jobs)
+            print(f"갱신 {result['scan']}회차: 새로 계산 {result['added']:,}장, 삭제 {result['removed']:,}장,"
+                  f" 읽지 못함 {result['failed']:,}장")
+        else:
+            pairs = index.duplicates(args.distance, args.new_only, cross_site=not args.same_site)
+            for pair in pairs:
+                print(f"{pair['distance']:2d}  [{pair['site_a']}] {pair['path_a']}  ↔  [{pair['site_b']}] {pair['path_b']}")
+            print(f"유사 사진 {len(pairs):,}쌍", file=sys.stderr)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
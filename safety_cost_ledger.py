@@ -0,0 +1,625 @@
+# -*- coding: utf-8 -*-
+"""
+안전관리비 사용내역서 일괄 점검
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+현장의 사용내역서(CSV·XLSX)를 한 줄씩 읽어 일정 크기 묶음(chunk)마다 classify_many 로
+판정하고, 판정 결과를 바로 CSV 로 써 내려갑니다. 파일 전체를 메모리에 올리지 않으므로
+수십만 줄짜리 다년도 내역서도 묶음 크기만큼의 메모리로 처리합니다.
+
+사용법: python safety_cost_ledger.py 사용내역서.xlsx -o 판정결과.csv [--column 품명]
+        python safety_cost_ledger.py 현장별/*.xlsx --out-dir 판정결과/ [--jobs 8]
+        python safety_cost_ledger.py 현장별/*.xlsx --caps month --budget A현장=120,000,000 --budget 80000000
+"""
+
+import argparse
+import codecs
+import csv
+import io
+import os
+import re
+import sys
+from array import array
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from safety_cost_data import CATALOG_STORE, classify_many
+from safety_cost_rules import (
+    CONDITIONAL_DOCS,
+    aggregate_caps,
+    apply_recognition,
+    as_dates,
+    cap_breaches,
+    resolve_conditions,
+    site_arrays,
+)
+from safety_cost_store import NO_CATEGORY, NO_STATUS, Status
+
+# 머리글에서 찾을 열 이름 (앞쪽이 우선)
+ITEM_COLUMNS = ("품명", "물품명", "품목", "내역", "적요", "사용내역", "항목명")
+AMOUNT_COLUMNS = ("금액", "사용금액", "합계", "합계금액", "공급가액")
+DATE_COLUMNS = ("사용일자", "구입일자", "일자", "날짜", "사용일")
+APPROVAL_COLUMNS = ("승인번호", "전자세금계산서승인번호", "세금계산서승인번호", "국세청승인번호")
+VENDOR_COLUMNS = ("거래처", "공급자", "구입처", "업체명", "상호")
+SERIAL_COLUMNS = ("제조번호", "일련번호", "시리얼번호", "S/N", "관리번호")
+SITE_COLUMNS = ("현장명", "현장", "현장이름", "공사명")
+# 조건부 물품 판정에 쓰는 속성 열 (safety_cost_data.CONDITION_ATTRIBUTES, 사용일자는 DATE_COLUMNS)
+ATTRIBUTE_COLUMNS = {
+    "purpose": ("사용목적", "목적", "용도", "사용용도"),
+    "user": ("사용자", "사용부서", "담당자", "지급대상"),
+    "place": ("설치장소", "사용장소", "장소"),
+    "event": ("행사명", "행사"),
+    "salary": ("월급여액", "월급여", "급여"),
+    "risk_assessment": ("위험성평가", "위험성평가반영", "노사협의체"),
+    "self_constructor": ("자기공사자", "자기공사자여부"),
+}
+
+# 머리글 위에 제목·현장명 줄이 있는 경우를 고려해 찾아볼 최대 줄 수
+HEADER_SEARCH_ROWS = 20
+DEFAULT_CHUNK_SIZE = 5_000
+# 일자 문자열 해석 결과를 기억해 둘 최대 개수 (시각까지 적힌 일자가 줄마다 달라도 메모리 일정)
+DATE_CACHE_SIZE = 10_000
+# 화면 미리보기용으로 보관하는 조건부·사용 불가 줄의 최대 개수
+FLAGGED_SAMPLE = 200
+
+VERDICT_LABELS = {
+    Status.ALLOWED: "사용 가능",
+    Status.CONDITIONAL: "조건부",
+    Status.PROHIBITED: "사용 불가",
+    NO_STATUS: "확인 필요",
+}
+VERDICT_COLUMNS = ("판정", "해당 물품", "항목", "사유")
+SUMMARY_KEYS = ("allowed", "conditional", "prohibited", "unmatched")
+
+
+class LedgerError(ValueError):
+    """사용내역서 형식을 해석할 수 없는 경우"""
+
+
+# ──────────────────────────────────────────────
+# 파일 읽기 (줄 단위 스트리밍)
+# ──────────────────────────────────────────────
+def _detect_encoding(raw):
+    """파일 앞부분으로 인코딩을 고릅니다. (UTF-8 이 아니면 국내 엑셀 기본값인 CP949)"""
+    head = raw.read(65536)
+    raw.seek(0)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return "cp949"
+    return "utf-8-sig"
+
+
+def _csv_rows(source):
+    """CSV 파일의 각 줄을 문자열 목록으로 하나씩 반환합니다."""
+    raw = open(source, "rb") if isinstance(source, (str, Path)) else source
+    try:
+        text = io.TextIOWrapper(raw, encoding=_detect_encoding(raw), newline="")
+        try:
+            yield from csv.reader(text)
+        finally:
+            text.detach()
+    finally:
+        if raw is not source:
+            raw.close()
+
+
+def _xlsx_rows(source):
+    """XLSX 파일 첫 시트의 각 줄을 문자열 목록으로 하나씩 반환합니다. (openpyxl 읽기 전용 모드)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise LedgerError("XLSX 파일을 읽으려면 openpyxl 이 필요합니다. (pip install openpyxl)") from exc
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ["" if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def read_rows(source, kind: str = None):
+    """사용내역서의 각 줄을 문자열 목록으로 하나씩 반환합니다.
+
+    source: 파일 경로 또는 바이너리 파일 객체(업로드 파일 등)
+    kind: "csv" | "xlsx" (None 이면 파일 이름의 확장자로 판단)
+    """
+    if kind is None:
+        kind = Path(getattr(source, "name", str(source))).suffix.lower().lstrip(".")
+    if kind == "csv":
+        return _csv_rows(source)
+    if kind in ("xlsx", "xlsm"):
+        return _xlsx_rows(source)
+    raise LedgerError(f"지원하지 않는 파일 형식입니다: {kind} (CSV·XLSX 만 가능)")
+
+
+def find_column(header, candidates):
+    """머리글에서 후보 이름과 일치하는 열 번호를 찾습니다. (공백 무시, 없으면 None)"""
+    names = [str(name).replace(" ", "") for name in header]
+    for candidate in candidates:
+        if candidate in names:
+            return names.index(candidate)
+    return None
+
+
+def locate_header(rows, item_column: str = None, item_columns=ITEM_COLUMNS):
+    """머리글 줄을 찾아 (머리글, 품명 열 번호, 금액 열 번호, 일자 열 번호) 를 반환합니다.
+
+    rows 는 머리글 줄까지만 소비되므로, 이후 같은 반복자에서 데이터 줄을 이어 읽습니다.
+    item_columns: item_column 이 없을 때 찾을 품명 열 이름 후보 (도급내역서 등 다른 서식용)
+    """
+    candidates = (item_column.replace(" ", ""),) if item_column else item_columns
+    for header in islice(rows, HEADER_SEARCH_ROWS):
+        item_index = find_column(header, candidates)
+        if item_index is not None:
+            return header, item_index, find_column(header, AMOUNT_COLUMNS), find_column(header, DATE_COLUMNS)
+    raise LedgerError(
+        f"앞 {HEADER_SEARCH_ROWS}줄에서 품명 열({', '.join(candidates)})을 찾지 못했습니다."
+    )
+
+
+def parse_amount(value):
+    """"1,234,000", "1234000원" 같은 금액 문자열을 정수로 바꿉니다. (해석할 수 없으면 0)"""
+    digits = "".join(ch for ch in str(value) if ch.isdigit() or ch in "-.")
+    try:
+        return int(float(digits)) if digits else 0
+    except ValueError:
+        return 0
+
+
+_DATE_PATTERN = re.compile(r"(\d{4})\D?(\d{1,2})\D?(\d{1,2})")
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# 해석할 수 없는 일자 (numpy datetime64 의 NaT 와 같은 정수 값)
+NO_DATE = -2**63
+
+
+def parse_date(value):
+    """"2025-03-01", "2025.3.1", "20250301", "2025-03-01 00:00:00" 같은 일자를 1970-01-01 기준 일수로 바꿉니다.
+
+    해석할 수 없으면 NO_DATE 를 반환합니다.
+    """
+    match = _DATE_PATTERN.search(str(value))
+    if match is None:
+        return NO_DATE
+    try:
+        return date(*map(int, match.groups())).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return NO_DATE
+
+
+def new_columns():
+    """집계용 열 배열 (audit_ledger 의 columns 인자). 한 줄당 약 19바이트입니다."""
+    return {
+        "item_id": array("l"),
+        "category": array("b"),
+        "amount": array("q"),
+        "date": array("q"),  # 1970-01-01 기준 일수 (NO_DATE: 일자 없음)
+    }
+
+
+# ──────────────────────────────────────────────
+# 판정
+# ──────────────────────────────────────────────
+def _chunks(rows, size: int):
+    """rows 를 size 줄씩 묶어 반환합니다."""
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def locate_conditions(header, amount_index=None, date_index=None):
+    """조건부 물품 판정에 쓸 열 번호를 찾습니다. (audit_rows 의 conditions 인자)"""
+    return {
+        "attributes": {
+            name: index for name, names in ATTRIBUTE_COLUMNS.items()
+            if (index := find_column(header, names)) is not None
+        },
+        "amount": amount_index,
+        "date": date_index,
+    }
+
+
+# 조건이 있는 물품의 문서 번호 (묶음마다 줄을 고를 때 쓰는 집합)
+_CONDITIONAL_DOCS = frozenset(CONDITIONAL_DOCS.tolist())
+
+
+def _resolve_chunk(chunk, result, conditions):
+    """묶음에서 조건이 있는 물품 줄만 골라 속성 열로 판정을 확정합니다. (result 를 고쳐 씁니다)
+
+    속성이 비어 판단하지 못한 조건부 줄은 조건부로 남기고, 사유 뒤에 빠진 속성을 덧붙입니다.
+    판단하지 못한 그 밖의 줄(조건이 붙은 사용 가능 물품)은 상태와 사유를 그대로 둡니다.
+    """
+    lines = [i for i, item_id in enumerate(result["item_id"]) if item_id in _CONDITIONAL_DOCS]
+    if not lines:
+        return
+
+    def cells(index):
+        return [chunk[i][index] if index is not None and index < len(chunk[i]) else "" for i in lines]
+
+    attributes = {name: cells(index) for name, index in conditions["attributes"].items()}
+    if "salary" in attributes:
+        attributes["salary"] = [parse_amount(value) for value in attributes["salary"]]
+    amounts = None if conditions["amount"] is None else [parse_amount(value) for value in cells(conditions["amount"])]
+    dates = None if conditions["date"] is None else as_dates([parse_date(value) for value in cells(conditions["date"])])
+    resolved = resolve_conditions(
+        [result["status"][i] for i in lines], [result["item_id"][i] for i in lines], attributes, amounts, dates,
+    )
+    for i, status, reason, decided in zip(lines, resolved["status"].tolist(), resolved["reason"],
+                                          resolved["resolved"].tolist()):
+        if not decided:
+            if status != Status.CONDITIONAL:
+                continue
+            reason = f"{result['reason'][i]} ({reason})"
+        elif status == Status.PROHIBITED:
+            # 사용 불가 줄은 항목 한도 집계에서 빠지도록 항목 번호를 지웁니다.
+            result["category"][i] = NO_CATEGORY
+        result["status"][i] = status
+        result["reason"][i] = reason
+
+
+def audit_rows(rows, item_index: int, chunk_size: int = DEFAULT_CHUNK_SIZE, conditions=None):
+    """데이터 줄을 묶음마다 판정하여 (원래 줄, 판정 결과 열 목록, 상태 값, 문서 번호, 항목 번호) 를 하나씩 반환합니다.
+
+    conditions: locate_conditions 결과. 주어지면 조건이 있는 물품 줄을 속성 열로 판정합니다.
+    """
+    names = CATALOG_STORE.names
+    for chunk in _chunks(rows, chunk_size):
+        lines = [row[item_index] if item_index < len(row) else "" for row in chunk]
+        result = classify_many(lines)
+        if conditions is not None:
+            _resolve_chunk(chunk, result, conditions)
+        for i, row in enumerate(chunk):
+            status = result["status"][i]
+            item_id = result["item_id"][i]
+            category = result["category"][i]
+            yield row, (
+                VERDICT_LABELS[status],
+                names[item_id] if status != NO_STATUS else "",
+                str(category) if category >= 0 else "",
+                result["reason"][i],
+            ), status, item_id, category
+
+
+def _summary_key(status):
+    return "unmatched" if status == NO_STATUS else Status(status).label
+
+
+def new_summary():
+    """판정 요약 (상태별 줄 수·금액, 조건부·사용 불가 줄 일부, 현장 열에 적힌 현장 이름 목록)"""
+    return {
+        "rows": 0,
+        "counts": dict.fromkeys(SUMMARY_KEYS, 0),
+        "amounts": dict.fromkeys(SUMMARY_KEYS, 0),
+        "flagged": [],
+        "sites": [],
+    }
+
+
+def audit_ledger(source, out=None, kind: str = None, item_column: str = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, on_progress=None, columns=None):
+    """사용내역서를 스트리밍으로 판정하고 요약을 반환합니다.
+
+    out: 판정 결과를 쓸 텍스트 파일 객체 (원래 열 + 판정·해당 물품·항목·사유, None 이면 쓰지 않음)
+    on_progress: 묶음마다 지금까지 처리한 줄 수로 호출할 함수
+    columns: new_columns() 로 만든 dict. 주어지면 줄마다 문서 번호·항목·금액·일자를 덧붙입니다.
+    조건이 있는 물품 줄은 속성 열(ATTRIBUTE_COLUMNS)·일자·금액으로 ITEM_CONDITIONS 를 평가해 판정을 확정합니다.
+    요약의 크기는 파일 크기와 무관합니다. (flagged 는 최대 FLAGGED_SAMPLE 줄, sites 는 서로 다른 현장 이름만)
+    """
+    rows = iter(read_rows(source, kind))
+    header, item_index, amount_index, date_index = locate_header(rows, item_column)
+    site_index = find_column(header, SITE_COLUMNS)
+    site_values = set()
+    if columns is not None:
+        item_ids, categories = columns["item_id"], columns["category"]
+        line_amounts, dates = columns["amount"], columns["date"]
+        date_cache = {}
+    writer = None
+    if out is not None:
+        writer = csv.writer(out)
+        writer.writerow([*header, *VERDICT_COLUMNS])
+
+    summary = new_summary()
+    counts, amounts, flagged = summary["counts"], summary["amounts"], summary["flagged"]
+    n_rows = 0
+    conditions = locate_conditions(header, amount_index, date_index)
+    for row, verdict, status, item_id, category in audit_rows(rows, item_index, chunk_size, conditions):
+        n_rows += 1
+        key = _summary_key(status)
+        counts[key] += 1
+        amount = 0
+        if amount_index is not None and amount_index < len(row):
+            amount = parse_amount(row[amount_index])
+            amounts[key] += amount
+        if columns is not None:
+            item_ids.append(item_id)
+            categories.append(category)
+            line_amounts.append(amount)
+            text = row[date_index] if date_index is not None and date_index < len(row) else ""
+            day = date_cache.get(text)
+            if day is None:
+                if len(date_cache) >= DATE_CACHE_SIZE:
+                    date_cache.clear()
+                day = date_cache[text] = parse_date(text)
+            dates.append(day)
+        if site_index is not None and site_index < len(row):
+            site = str(row[site_index]).strip()
+            if site:
+                site_values.add(site)
+        if status in (Status.CONDITIONAL, Status.PROHIBITED) and len(flagged) < FLAGGED_SAMPLE:
+            flagged.append({"line": row[item_index] if item_index < len(row) else "",
+                            **dict(zip(VERDICT_COLUMNS, verdict))})
+        if writer is not None:
+            writer.writerow([*row, *verdict])
+        if on_progress is not None and n_rows % chunk_size == 0:
+            on_progress(n_rows)
+    summary["rows"] = n_rows
+    summary["sites"] = sorted(site_values)
+    return summary
+
+
+# ──────────────────────────────────────────────
+# 여러 현장 병렬 점검
+# ──────────────────────────────────────────────
+def site_name(path):
+    """현장 이름 (파일 이름에서 확장자를 뺀 부분)"""
+    return Path(path).stem
+
+
+def ledger_site(path, summary):
+    """점검한 사용내역서의 현장 이름: 현장 열(SITE_COLUMNS)의 값, 열이 없으면 파일 이름
+
+    현장 열에 서로 다른 현장이 섞여 있으면 LedgerError 를 냅니다.
+    """
+    sites = summary["sites"]
+    if len(sites) > 1:
+        raise LedgerError(f"현장 열에 여러 현장({', '.join(sites)})이 섞여 있습니다. 현장별 파일로 나누어 넣으세요.")
+    return sites[0] if sites else site_name(path)
+
+
+def _audit_file(task):
+    """작업 프로세스에서 사용내역서 파일 하나를 점검합니다. (ProcessPoolExecutor 작업 단위)
+
+    카탈로그·색인은 이 모듈을 import 할 때 컴파일된 색인 파일에서 프로세스당 한 번 읽으므로,
+    작업마다 다시 만들지 않습니다.
+    """
+    path, out_path, item_column, chunk_size, collect = task
+    columns = new_columns() if collect else None
+    try:
+        if out_path is None:
+            summary = audit_ledger(path, item_column=item_column, chunk_size=chunk_size, columns=columns)
+        else:
+            with open(out_path, "w", encoding="utf-8-sig", newline="") as out:
+                summary = audit_ledger(path, out, item_column=item_column, chunk_size=chunk_size,
+                                       columns=columns)
+    except (LedgerError, OSError) as exc:
+        if out_path is not None and out_path.exists():
+            out_path.unlink()
+        return path, None, str(exc)
+    if columns is not None:
+        summary["columns"] = columns
+    return path, summary, None
+
+
+def merge_summaries(summaries):
+    """요약들을 합친 요약을 반환합니다. (flagged 는 FLAGGED_SAMPLE 줄까지만, columns 는 모두 있을 때만 이어 붙임)"""
+    summaries = list(summaries)
+    total = new_summary()
+    if summaries and all("columns" in summary for summary in summaries):
+        total["columns"] = new_columns()
+        for summary in summaries:
+            for key, values in summary["columns"].items():
+                total["columns"][key].extend(values)
+    for summary in summaries:
+        total["rows"] += summary["rows"]
+        for key in SUMMARY_KEYS:
+            total["counts"][key] += summary["counts"][key]
+            total["amounts"][key] += summary["amounts"][key]
+        total["flagged"].extend(summary["flagged"][:FLAGGED_SAMPLE - len(total["flagged"])])
+    total["sites"] = sorted({site for summary in summaries for site in summary["sites"]})
+    return total
+
+
+def audit_many(paths, out_dir=None, item_column: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               workers: int = None, collect: bool = False):
+    """여러 사용내역서를 프로세스 풀로 나누어 점검하고 현장별·전체 요약을 반환합니다.
+
+    파일 하나가 작업 하나이며, 큰 파일부터 먼저 나눠 주어 마지막에 큰 파일 하나만 남는 일을 줄입니다.
+    현장 이름은 ledger_site 로 정하며, 현장 열이 같은 파일(같은 현장의 월별 내역서 등)은 한 현장으로 합칩니다.
+    현장 열이 없어 파일 이름으로 정한 현장 이름이 다른 파일과 겹치면(x/3월.csv, y/3월.csv) 조용히 합치지 않고
+    해당 파일들을 모두 오류로 돌립니다. 읽을 수 없는 파일도 오류로 기록하고 나머지는 계속 점검합니다.
+    workers: 작업 프로세스 수 (None 이면 CPU 수, 1 이면 현재 프로세스에서 차례로 처리)
+    collect: True 이면 현장별 요약의 "columns" 에 집계용 열 배열(new_columns)을 담습니다.
+    반환값: {"sites": {현장 이름: 요약}, "total": 전체 요약, "errors": {파일 경로: 오류 메시지}}
+    """
+    errors = {}
+    sizes = {}
+    for path in map(str, paths):
+        try:
+            sizes[path] = os.path.getsize(path)
+        except OSError as exc:
+            errors[path] = str(exc)
+    paths = sorted(sizes, key=sizes.get, reverse=True)
+    # 결과 CSV 이름이 겹치지 않도록 같은 파일 이름은 번호를 붙입니다.
+    out_paths = {}
+    if out_dir is not None:
+        taken = set()
+        for path in paths:
+            name = stem = site_name(path)
+            number = 1
+            while name in taken:
+                number += 1
+                name = f"{stem}_{number}"
+            taken.add(name)
+            out_paths[path] = Path(out_dir) / f"{name}_판정결과.csv"
+    tasks = [(path, out_paths.get(path), item_column, chunk_size, collect) for path in paths]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        results = map(_audit_file, tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_audit_file, tasks)
+
+    by_site, from_column = {}, set()
+    try:
+        for path, summary, error in results:
+            if error is None:
+                try:
+                    site = ledger_site(path, summary)
+                except LedgerError as exc:
+                    errors[path] = str(exc)
+                    continue
+                by_site.setdefault(site, []).append((path, summary))
+                if summary["sites"]:
+                    from_column.add(site)
+            else:
+                errors[path] = error
+    finally:
+        if workers > 1:
+            executor.shutdown()
+
+    sites = {}
+    for site, entries in sorted(by_site.items()):
+        if len(entries) > 1 and site not in from_column:
+            others = ", ".join(path for path, _ in entries)
+            for path, _ in entries:
+                errors[path] = (f"현장 이름 '{site}' 이(가) 다른 파일과 겹칩니다 ({others}). "
+                                "현장명 열을 넣거나 파일 이름을 바꾸세요.")
+            continue
+        sites[site] = entries[0][1] if len(entries) == 1 else merge_summaries(summary for _, summary in entries)
+    return {"sites": sites, "total": merge_summaries(sites.values()), "errors": errors}
+
+
+def _print_summary(title: str, summary, file):
+    print(f"{title}: 총 {summary['rows']:,}줄", file=file)
+    for key, label in zip(SUMMARY_KEYS, VERDICT_LABELS.values()):
+        print(f"  {label:6s} {summary['counts'][key]:8,}줄  {summary['amounts'][key]:15,}원", file=file)
+
+
+def parse_budgets(values):
+    """--budget 값("금액" 또는 "현장=금액") 목록을 (모든 현장 공통 계상액, {현장: 계상액}) 으로 바꿉니다.
+
+    금액을 해석할 수 없거나 0 이하이면 ValueError 를 냅니다.
+    """
+    default, budgets = None, {}
+    for value in values or ():
+        site, sep, amount = value.rpartition("=")
+        budget = parse_amount(amount)
+        if budget <= 0:
+            raise ValueError(f"계상액을 해석할 수 없습니다: {value}")
+        if sep:
+            budgets[site.strip()] = budget
+        else:
+            default = budget
+    return default, budgets
+
+
+def _print_caps(site_columns, period: str, budgets, file):
+    """현장별 열 배열로 항목 한도 사용률을 집계해 초과 건을 출력합니다.
+
+    budgets: parse_budgets 결과. 계상액이 없는 현장은 한도를 판정하지 않고 이름만 알립니다.
+    """
+    default, budgets = budgets
+    site_budgets = {site: budgets.get(site, default) for site in site_columns}
+    missing = [site for site, budget in site_budgets.items() if budget is None]
+    arrays = site_arrays(site_columns)
+    report = aggregate_caps(arrays["sites"], arrays["categories"], arrays["amounts"], arrays["dates"], period,
+                            budgets={site: budget for site, budget in site_budgets.items() if budget is not None},
+                            site_names=arrays["site_names"])
+    breaches = cap_breaches(report)
+    print(f"항목 한도 초과: {len(breaches)}건 (기준: 현장 계상액, 누적 사용액)", file=file)
+    if missing:
+        print(f"  계상액(--budget)이 없어 한도를 판정하지 않은 현장: {', '.join(missing)}", file=file)
+    for breach in breaches:
+        print(f"  {breach['site']} {breach['period']} 항목 {breach['category']}. {breach['category_name']}: "
+              f"{breach['used']:,}원 / 한도 {breach['limit']:,.0f}원 ({breach['utilization']:.0%})", file=file)
+
+
+def _print_recognition(site_columns, file):
+    """경과조치 인정 비율(스마트 안전장비 등)을 구입일별로 적용한 인정 금액을 출력합니다."""
+    arrays = site_arrays(site_columns)
+    result = apply_recognition(arrays["item_ids"], arrays["amounts"], arrays["dates"])
+    valid = arrays["categories"] >= 0
+    reduced = valid & (result["ratio"] < 1.0)
+    print(f"인정 금액: {int(result['recognized'][valid].sum()):,}원 "
+          f"(사용 가능·조건부 {int(arrays['amounts'][valid].sum()):,}원 중, "
+          f"경과조치 적용 {int(reduced.sum()):,}줄)", file=file)
+    if result["unresolved"].any():
+        print(f"  구입일 확인 필요 (경과조치 시행일 이전·일자 없음): {int(result['unresolved'].sum()):,}줄", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="안전관리비 사용내역서 일괄 점검")
+    parser.add_argument("ledgers", nargs="+", help="사용내역서 파일 (CSV·XLSX, 여러 개면 현장별 병렬 점검)")
+    parser.add_argument("-o", "--output", help="판정 결과 CSV 경로 (파일 하나일 때, 기본: 표준 출력)")
+    parser.add_argument("--out-dir", help="현장별 판정 결과 CSV 를 쓸 폴더 (파일 여러 개일 때)")
+    parser.add_argument("--jobs", type=int, help="작업 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--column", help=f"품명 열 이름 (기본: {', '.join(ITEM_COLUMNS)} 중 자동)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="한 번에 판정할 줄 수")
+    parser.add_argument("--caps", choices=("all", "year", "quarter", "month"),
+                        help="항목 한도(항목 8: 5%%, 항목 9: 15%%) 사용률을 이 기간 단위로 집계")
+    parser.add_argument("--budget", action="append", metavar="[현장=]금액",
+                        help="--caps 한도 기준이 되는 현장 계상액 (현장 이름은 현장명 열, 없으면 파일 이름. "
+                             "현장 이름 없이 쓰면 모든 현장 공통, 여러 번 지정 가능)")
+    parser.add_argument("--recognized", action="store_true",
+                        help="경과조치 인정 비율(스마트 안전장비 2025년 70%%, 2026년 100%%)을 반영한 인정 금액 출력")
+    args = parser.parse_args(argv)
+    collect = bool(args.caps or args.recognized)
+    try:
+        budgets = parse_budgets(args.budget)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.budget and not args.caps:
+        parser.error("--budget 은 --caps 와 함께 사용하세요.")
+
+    if len(args.ledgers) > 1 or args.out_dir:
+        if args.output:
+            parser.error("파일이 여러 개이면 -o 대신 --out-dir 을 사용하세요.")
+        if args.out_dir:
+            os.makedirs(args.out_dir, exist_ok=True)
+        result = audit_many(args.ledgers, args.out_dir, args.column, args.chunk_size, args.jobs,
+                            collect=collect)
+        for site, summary in result["sites"].items():
+            _print_summary(site, summary, sys.stdout)
+        _print_summary(f"전체 {len(result['sites'])}개 현장", result["total"], sys.stdout)
+        site_columns = {site: summary["columns"] for site, summary in result["sites"].items()} if collect else None
+        if args.caps:
+            _print_caps(site_columns, args.caps, budgets, sys.stdout)
+        if args.recognized:
+            _print_recognition(site_columns, sys.stdout)
+        for path, error in result["errors"].items():
+            print(f"오류: {path}: {error}", file=sys.stderr)
+        if result["errors"]:
+            parser.exit(1)
+        return
+
+    out = open(args.output, "w", encoding="utf-8-sig", newline="") if args.output else sys.stdout
+    columns = new_columns() if collect else None
+    try:
+        summary = audit_ledger(args.ledgers[0], out, item_column=args.column, chunk_size=args.chunk_size,
+                               columns=columns)
+    except LedgerError as exc:
+        parser.exit(2, f"오류: {exc}\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    report = sys.stderr if out is sys.stdout else sys.stdout
+    _print_summary("전체", summary, report)
+    try:
+        site = ledger_site(args.ledgers[0], summary)
+    except LedgerError as exc:
+        if args.caps:
+            parser.exit(2, f"오류: {exc}\n")
+        site = site_name(args.ledgers[0])
+    if args.caps:
+        _print_caps({site: columns}, args.caps, budgets, report)
+    if args.recognized:
+        _print_recognition({site: columns}, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""
+안전관리비 사용 한도·인정 비율 계산
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+판정된 사용내역 줄(문서 번호·항목 번호·금액·일자 열 배열)을 NumPy 로 한 번에 계산합니다.
+- 한도: 현장·기간·항목별로 묶어 CATEGORY_CAPS(항목 8: 5%, 항목 9: 15%) 사용률과 초과 여부
+- 인정 비율: RECOGNITION_RATIOS 경과조치(스마트 안전장비 2025년 70%, 2026년 100%)를 구입일별로 적용
+- 조건부 물품: ITEM_CONDITIONS 조건을 결정표로 바꿔 목적·장소·월 급여액 등 속성이 있는 줄을 판정
+줄마다 파이썬 반복을 돌지 않고 np.unique·np.bincount·np.searchsorted 로 처리합니다.
+"""
+
+import numpy as np
+
+from safety_cost_data import (
+    CATALOG_STORE,
+    CATEGORIES,
+    CATEGORY_CAPS,
+    CONDITION_ATTRIBUTES,
+    ITEM_CONDITIONS,
+    RECOGNITION_RATIOS,
+)
+from safety_cost_search import normalize_text
+from safety_cost_store import Status
+
+# 집계 기간 단위
+PERIODS = ("all", "year", "quarter", "month")
+NO_PERIOD_LABEL = "일자 없음"
+
+# 항목 번호를 그대로 열 번호로 쓰는 집계 행렬의 열 수 (0번 열은 비어 있음)
+_N_CATEGORIES = max(CATEGORIES) + 1
+
+
+# ──────────────────────────────────────────────
+# 기간
+# ──────────────────────────────────────────────
+def as_dates(days):
+    """1970-01-01 기준 일수 배열(NO_DATE 포함)을 datetime64[D] 배열(NaT 포함)로 바꿉니다."""
+    return np.asarray(days, dtype=np.int64).view("datetime64[D]")
+
+
+def period_codes(dates, period: str):
+    """일자별 기간 번호를 반환합니다. (1970년 기준 연·분기·월 수, 일자 없음은 -1)"""
+    if period not in PERIODS:
+        raise ValueError(f"알 수 없는 기간 단위: {period} ({', '.join(PERIODS)})")
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    if period == "all":
+        return np.zeros(len(dates), dtype=np.int64)
+    unit = "datetime64[Y]" if period == "year" else "datetime64[M]"
+    codes = dates.astype(unit).view(np.int64)
+    if period == "quarter":
+        codes = codes // 3
+    return np.where(np.isnat(dates), -1, codes)
+
+
+def period_label(code: int, period: str):
+    """period_codes 의 기간 번호를 "2025", "2025Q3", "2025-07" 형태로 바꿉니다."""
+    if period == "all":
+        return "전체"
+    if code < 0:
+        return NO_PERIOD_LABEL
+    if period == "year":
+        return str(1970 + code)
+    if period == "quarter":
+        return f"{1970 + code // 4}Q{code % 4 + 1}"
+    return f"{1970 + code // 12}-{code % 12 + 1:02d}"
+
+
+# ──────────────────────────────────────────────
+# 한도 집계
+# ──────────────────────────────────────────────
+def site_arrays(site_columns):
+    """{현장: 열 배열(safety_cost_ledger.new_columns)} 을 줄 단위 NumPy 배열로 이어 붙입니다.
+
+    현장은 줄마다 이름 문자열을 두지 않고 site_names 의 번호(정수)로 적습니다.
+    반환값: {"sites", "site_names", "item_ids", "categories", "amounts", "dates"(datetime64[D])}
+    """
+    names = list(site_columns)
+    lengths = [len(site_columns[name]["category"]) for name in names]
+
+    def concat(key):
+        if not names:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.asarray(site_columns[name][key], dtype=np.int64) for name in names])
+
+    return {
+        "sites": np.repeat(np.arange(len(names), dtype=np.int32), lengths),
+        "site_names": names,
+        "item_ids": concat("item_id"),
+        "categories": concat("category"),
+        "amounts": concat("amount"),
+        "dates": as_dates(concat("date")),
+    }
+
+
+def aggregate_caps(sites, categories, amounts, dates=None, period: str = "all", budgets=None, site_names=None):
+    """현장·기간별 항목 사용액과 한도 사용률을 열(column) 단위로 반환합니다.
+
+    sites·categories·amounts·dates: 줄마다 하나씩 값이 있는 같은 길이의 배열
+      (categories 가 음수인 줄 — 사용 불가·확인 필요 — 은 사용액에 넣지 않습니다)
+    period: PERIODS 중 하나 (dates 가 None 이면 "all" 만 가능)
+    budgets: {현장: 안전보건관리비 총액(계상액)}. 한도는 계상액 기준이며 사용액은 현장의 첫 기간부터
+      누적합니다. 계상액이 없는 현장은 한도를 알 수 없으므로 limit·utilization 이 NaN, breach 가 False 입니다.
+    site_names: 주어지면 sites 는 이 목록의 번호(site_arrays 의 "sites")입니다.
+
+    반환값 (배열은 모두 묶음 순서 — 현장 → 기간 오름차순):
+      "site", "period": 묶음별 현장·기간 이름
+      "spend": (묶음 수 × 항목 번호) 사용액 행렬,  "total": 묶음별 사용액 합계
+      "base": 한도 기준 금액 (계상액, 없으면 NaN)
+      "caps": {항목 번호: {"ratio", "used", "share", "limit", "utilization", "breach"}}
+        share 는 묶음 사용액 합계에서 이 항목이 차지하는 비율 (계상액 없이도 참고용으로 계산)
+    """
+    categories = np.asarray(categories, dtype=np.int64)
+    valid = categories >= 0
+    categories = categories[valid]
+    amounts = np.asarray(amounts, dtype=np.int64)[valid]
+    site_codes, site_ids = np.unique(np.asarray(sites)[valid], return_inverse=True)
+    site_names = site_codes if site_names is None else np.asarray(site_names, dtype=object)[site_codes]
+    if dates is None:
+        if period != "all":
+            raise ValueError("기간별로 집계하려면 dates 가 필요합니다.")
+        codes = np.zeros(len(categories), dtype=np.int64)
+    else:
+        codes = period_codes(np.asarray(dates)[valid], period)
+    period_values, period_ids = np.unique(codes, return_inverse=True)
+
+    keys, group_ids = np.unique(site_ids * len(period_values) + period_ids, return_inverse=True)
+    group_site = keys // max(len(period_values), 1)
+    group_period = keys % max(len(period_values), 1)
+    n_groups = len(keys)
+
+    spend = np.bincount(
+        group_ids * _N_CATEGORIES + categories, weights=amounts, minlength=n_groups * _N_CATEGORIES,
+    ).round().astype(np.int64).reshape(n_groups, _N_CATEGORIES)
+    total = spend.sum(axis=1)
+
+    # 현장별 누적: 전체 누적합에서 현장 첫 묶음 직전까지의 누적합을 뺍니다.
+    cumulative = np.cumsum(spend, axis=0)
+    starts = np.searchsorted(group_site, group_site, side="left")
+    before = np.where((starts > 0)[:, None], cumulative[np.maximum(starts - 1, 0)], 0)
+    used = cumulative - before
+    budgets = budgets or {}
+    base = np.array([budgets.get(name, np.nan) for name in site_names], dtype=np.float64)[group_site]
+
+    caps = {}
+    for category, cap in CATEGORY_CAPS.items():
+        limit = base * cap["ratio"]
+        category_used = used[:, category]
+        share = np.divide(spend[:, category], total, out=np.zeros(n_groups), where=total > 0)
+        utilization = np.divide(
+            category_used, limit, out=np.where(category_used > 0, np.inf, 0.0), where=limit > 0,
+        )
+        utilization[np.isnan(limit)] = np.nan
+        caps[category] = {
+            "ratio": cap["ratio"],
+            "used": category_used,
+            "share": share,
+            "limit": limit,
+            "utilization": utilization,
+            "breach": category_used > np.nan_to_num(limit, nan=np.inf),
+        }
+
+    return {
+        "site": site_names[group_site],
+        "period": [period_label(code, period) for code in period_values[group_period]],
+        "spend": spend,
+        "total": total,
+        "base": base,
+        "caps": caps,
+    }
+
+
+def cap_breaches(report):
+    """aggregate_caps 결과에서 한도를 넘은 (현장, 기간, 항목) 을 사용률이 높은 순으로 반환합니다."""
+    breaches = []
+    for category, cap in report["caps"].items():
+        for group in np.flatnonzero(cap["breach"]):
+            breaches.append({
+                "site": str(report["site"][group]),
+                "period": report["period"][group],
+                "category": category,
+                "category_name": CATEGORIES[category]["name"],
+                "used": int(cap["used"][group]),
+                "limit": float(cap["limit"][group]),
+                "utilization": float(cap["utilization"][group]),
+            })
+    breaches.sort(key=lambda breach: -breach["utilization"])
+    return breaches
+
+
+# ──────────────────────────────────────────────
+# 인정 비율 (시행일별 경과조치)
+# ──────────────────────────────────────────────
+def _compile_recognition(table):
+    """RECOGNITION_RATIOS 를 (문서 번호, 시행일 배열, 비율 배열) 목록으로 바꿉니다."""
+    doc_ids = {name: doc_id for doc_id, name in enumerate(CATALOG_STORE.names)}
+    rules = []
+    for name, periods in table.items():
+        periods = sorted(periods, key=lambda period: period["effective_from"])
+        rules.append((
+            doc_ids[name],
+            np.array([period["effective_from"] for period in periods], dtype="datetime64[D]"),
+            np.array([period["ratio"] for period in periods], dtype=np.float64),
+        ))
+    return rules
+
+
+_RECOGNITION_RULES = _compile_recognition(RECOGNITION_RATIOS)
+
+
+def recognition_ratios(item_ids, dates):
+    """줄마다 구입일에 맞는 인정 비율을 반환합니다.
+
+    경과조치 대상이 아닌 물품은 1.0, 대상 물품인데 구입일이 없거나 첫 시행일 이전이면 NaN 입니다.
+    물품마다 시행일 배열에서 np.searchsorted 로 구입일이 속한 구간을 한 번에 찾습니다.
+    """
+    item_ids = np.asarray(item_ids, dtype=np.int64)
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    ratios = np.ones(len(item_ids), dtype=np.float64)
+    for doc_id, effective_from, rule_ratios in _RECOGNITION_RULES:
+        lines = np.flatnonzero(item_ids == doc_id)
+        line_dates = dates[lines]
+        period = np.searchsorted(effective_from, line_dates, side="right") - 1
+        resolved = (period >= 0) & ~np.isnat(line_dates)
+        ratios[lines] = np.where(resolved, rule_ratios[np.maximum(period, 0)], np.nan)
+    return ratios
+
+
+def apply_recognition(item_ids, amounts, dates):
+    """줄마다 인정 비율과 인정 금액(원 미만 버림)을 계산합니다.
+
+    반환값: {"ratio": 비율, "recognized": 인정 금액, "unresolved": 비율을 정할 수 없는 줄 (인정 금액 0)}
+    """
+    ratios = recognition_ratios(item_ids, dates)
+    unresolved = np.isnan(ratios)
+    amounts = np.asarray(amounts, dtype=np.int64)
+    recognized = np.floor(amounts * np.where(unresolved, 0.0, ratios)).astype(np.int64)
+    return {"ratio": ratios, "recognized": recognized, "unresolved": unresolved}
+
+
+# ──────────────────────────────────────────────
+# 조건부 물품 판정 (결정표)
+# ──────────────────────────────────────────────
+CONDITION_OPS = ("contains_any", "contains_none", "month_in", "is_true", "max_ratio")
+
+# 조건 하나의 결과 (아직 판단하지 않은 줄 = 해당 없음)
+CONDITION_UNKNOWN = -1
+CONDITION_FAILED = 0
+CONDITION_MET = 1
+
+# 예/아니오 속성으로 인정하는 값 (normalize_text 기준)
+_TRUE_WORDS = frozenset(("예", "y", "yes", "o", "○", "true", "1", "해당", "반영", "있음"))
+_FALSE_WORDS = frozenset(("아니오", "아니요", "n", "no", "x", "×", "false", "0", "미해당", "미반영", "없음"))
+
+
+def compile_conditions(table):
+    """ITEM_CONDITIONS 를 결정표로 바꿉니다. 조건 하나가 결정표의 한 행입니다.
+
+    반환값: {"doc": 문서 번호 배열, "op": CONDITION_OPS 번호 배열, "attribute": 속성 이름 목록,
+            "operand": 연산 값 목록 (단어는 normalize_text 로 정규화), "label": 사유 목록}
+    """
+    doc_ids = {name: doc_id for doc_id, name in enumerate(CATALOG_STORE.names)}
+    docs, ops, attributes, operands, labels = [], [], [], [], []
+    for name, conditions in table.items():
+        if name not in doc_ids:
+            raise ValueError(f"ITEM_CONDITIONS: 카탈로그에 없는 물품입니다: {name}")
+        for condition in conditions:
+            op = condition["op"]
+            if op not in CONDITION_OPS:
+                raise ValueError(f"ITEM_CONDITIONS: 알 수 없는 조건 {op} ({name})")
+            if condition["attribute"] not in CONDITION_ATTRIBUTES:
+                raise ValueError(f"ITEM_CONDITIONS: 알 수 없는 속성 {condition['attribute']} ({name})")
+            if op in ("contains_any", "contains_none"):
+                operand = tuple(normalize_text(word) for word in condition["words"])
+            elif op == "month_in":
+                operand = np.array(condition["months"], dtype=np.int64)
+            elif op == "max_ratio":
+                operand = condition["ratio"]
+            else:
+                operand = None
+            docs.append(doc_ids[name])
+            ops.append(CONDITION_OPS.index(op))
+            attributes.append(condition["attribute"])
+            operands.append(operand)
+            labels.append(condition["label"])
+    return {
+        "doc": np.array(docs, dtype=np.int64),
+        "op": np.array(ops, dtype=np.int64),
+        "attribute": attributes,
+        "operand": operands,
+        "label": labels,
+    }
+
+
+DECISION_TABLE = compile_conditions(ITEM_CONDITIONS)
+if len(DECISION_TABLE["doc"]) > 63:
+    raise ValueError("ITEM_CONDITIONS: 조건은 63개까지 (resolve_conditions 의 비트 묶음)")
+# 조건이 있는 문서 번호 (조건부 물품 + 조건이 붙은 사용 가능 물품)
+CONDITIONAL_DOCS = np.unique(DECISION_TABLE["doc"])
+
+
+def _text_outcomes(values, op: str, words):
+    """문장 속성 배열의 조건 결과. 서로 다른 값마다 한 번만 정규화·검사합니다."""
+    unique, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    outcomes = np.empty(len(unique), dtype=np.int8)
+    for i, value in enumerate(unique.tolist()):
+        text = normalize_text(value)
+        if not text:
+            outcomes[i] = CONDITION_UNKNOWN
+        else:
+            found = any(word in text for word in words)
+            outcomes[i] = CONDITION_MET if found == (op == "contains_any") else CONDITION_FAILED
+    return outcomes[inverse]
+
+
+def _flag_outcomes(values):
+    """예/아니오 속성 배열의 조건 결과 ("예" 만 충족, 알 수 없는 값은 확인 필요)"""
+    unique, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    outcomes = np.array([
+        CONDITION_MET if text in _TRUE_WORDS else CONDITION_FAILED if text in _FALSE_WORDS else CONDITION_UNKNOWN
+        for text in map(normalize_text, unique.tolist())
+    ], dtype=np.int8)
+    return outcomes[inverse]
+
+
+def evaluate_conditions(item_ids, attributes, amounts=None, dates=None):
+    """줄마다 결정표의 조건을 모두 평가해 (줄 수 × 결정표 행 수) 결과 행렬을 반환합니다.
+
+    item_ids: 줄마다 문서 번호
+    attributes: {속성 이름: 줄마다 문자열 배열} (없는 속성은 모두 빈 값으로 봄)
+    amounts: 줄마다 금액 ("max_ratio" 용), dates: 줄마다 datetime64[D] 일자 ("month_in" 용)
+    결과 값은 CONDITION_MET·CONDITION_FAILED·CONDITION_UNKNOWN 이며, 해당 물품이 아닌 칸은 CONDITION_MET 입니다.
+    결정표 행마다 그 물품 줄만 골라 열 단위로 한 번에 계산합니다.
+    """
+    item_ids = np.asarray(item_ids, dtype=np.int64)
+    table = DECISION_TABLE
+    outcomes = np.full((len(item_ids), len(table["doc"])), CONDITION_MET, dtype=np.int8)
+    rows_by_doc = {int(doc): np.flatnonzero(item_ids == doc) for doc in CONDITIONAL_DOCS}
+    for rule, (doc, op_code) in enumerate(zip(table["doc"].tolist(), table["op"].tolist())):
+        rows = rows_by_doc[doc]
+        if not len(rows):
+            continue
+        op, attribute, operand = CONDITION_OPS[op_code], table["attribute"][rule], table["operand"][rule]
+        if op == "month_in":
+            if dates is None:
+                result = np.full(len(rows), CONDITION_UNKNOWN, dtype=np.int8)
+            else:
+                line_dates = np.asarray(dates, dtype="datetime64[D]")[rows]
+                months = line_dates.astype("datetime64[M]").view(np.int64) % 12 + 1
+                result = np.where(np.isin(months, operand), CONDITION_MET, CONDITION_FAILED).astype(np.int8)
+                result[np.isnat(line_dates)] = CONDITION_UNKNOWN
+        elif op == "max_ratio":
+            base = attributes.get(attribute)
+            if base is None or amounts is None:
+                result = np.full(len(rows), CONDITION_UNKNOWN, dtype=np.int8)
+            else:
+                base = np.asarray(base, dtype=np.float64)[rows]
+                line_amounts = np.asarray(amounts, dtype=np.float64)[rows]
+                result = np.where(line_amounts <= base * operand, CONDITION_MET, CONDITION_FAILED).astype(np.int8)
+                result[~(base > 0)] = CONDITION_UNKNOWN
+        else:
+            values = attributes.get(attribute)
+            values = np.full(len(rows), "") if values is None else np.asarray(values, dtype=str)[rows]
+            result = _flag_outcomes(values) if op == "is_true" else _text_outcomes(values, op, operand)
+        outcomes[rows, rule] = result
+    return outcomes
+
+
+def resolve_conditions(statuses, item_ids, attributes, amounts=None, dates=None):
+    """조건이 있는 물품 줄의 판정을 결정표 결과로 확정합니다.
+
+    조건을 하나라도 만족하지 못하면 사용 불가(사유: 결정표 순서상 첫 불충족 조건), 모두 만족하면 사용 가능입니다.
+    판단할 속성이 비어 있는 줄과 조건이 없는 물품 줄은 statuses 그대로 둡니다. (조건부는 조건부로 남음)
+    attributes 의 "salary" 처럼 숫자로 비교하는 속성은 금액 배열로 넘깁니다.
+
+    반환값: {"status": 확정 상태 배열, "rule": 첫 불충족 결정표 행 (없으면 -1),
+            "resolved": 결정표로 상태를 확정한 줄 (bool 배열, 판단하지 못한 줄·조건 없는 줄은 False),
+            "reason": 조건이 있는 줄의 사유 목록 (그 밖의 줄은 None)}
+    """
+    statuses = np.array(statuses, dtype=np.int8)
+    outcomes = evaluate_conditions(item_ids, attributes, amounts, dates)
+    applies = np.isin(np.asarray(item_ids, dtype=np.int64), CONDITIONAL_DOCS)
+    failed = outcomes == CONDITION_FAILED
+    any_failed = failed.any(axis=1)
+    first_failed = np.where(any_failed, failed.argmax(axis=1), -1)
+    # 판단하지 못한 조건 묶음을 비트로 나타냅니다. (결정표 행 수 ≤ 63)
+    unknown_mask = ((outcomes == CONDITION_UNKNOWN).astype(np.int64) << np.arange(outcomes.shape[1])).sum(axis=1)
+
+    resolved = applies & (any_failed | (unknown_mask == 0))
+    statuses[resolved & any_failed] = Status.PROHIBITED
+    statuses[resolved & ~any_failed] = Status.ALLOWED
+
+    # 사유는 (첫 불충족 조건 | 판단하지 못한 조건 묶음) 마다 한 번만 만듭니다.
+    labels, attributes_of = DECISION_TABLE["label"], DECISION_TABLE["attribute"]
+    keys = np.where(any_failed, first_failed, -1 - unknown_mask)
+    messages = {}
+    for key in np.unique(keys[applies]).tolist():
+        if key >= 0:
+            messages[key] = f"조건 불충족: {labels[key]}"
+        elif key == -1:
+            messages[key] = "조건 충족"
+        else:
+            mask = -1 - key
+            missing = dict.fromkeys(
+                CONDITION_ATTRIBUTES[attributes_of[rule]] for rule in range(len(labels)) if mask >> rule & 1
+            )
+            messages[key] = f"조건 확인 필요: {', '.join(missing)} 정보 없음"
+    reasons = [None] * len(statuses)
+    for row, key in zip(np.flatnonzero(applies).tolist(), keys[applies].tolist()):
+        reasons[row] = messages[key]
+    return {"status": statuses, "rule": first_failed, "resolved": resolved, "reason": reasons}
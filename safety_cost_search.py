@@ -0,0 +1,774 @@
+# -*- coding: utf-8 -*-
+"""
+안전관리비 물품 검색 색인
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+safety_cost_data 의 물품명·키워드를 대상으로 하는 검색 엔진 모음입니다.
+색인은 문서(document) 목록 위에 만들어지며, 문서 하나는 물품 하나의
+검색 대상 문자열(물품명 + 키워드) 묶음입니다. 문서 번호는 목록 순서와 같습니다.
+"""
+
+import heapq
+import re
+import unicodedata
+
+# ──────────────────────────────────────────────
+# 정규화
+# ──────────────────────────────────────────────
+# 호환 자모(ㄱ~ㅣ)는 NFKC 에서 조합용 자모로 바뀌므로 초성 검색을 위해 건너뜁니다.
+_COMPAT_JAMO_RUN = re.compile("[\u3131-\u318e]+")
+
+
+def _fold(text: str):
+    """NFKC(호환 자모 제외) + 소문자화(casefold)"""
+    parts = []
+    pos = 0
+    for match in _COMPAT_JAMO_RUN.finditer(text):
+        parts.append(unicodedata.normalize("NFKC", text[pos:match.start()]))
+        parts.append(match.group())
+        pos = match.end()
+    parts.append(unicodedata.normalize("NFKC", text[pos:]))
+    return "".join(parts).casefold()
+
+
+def normalize_text(text: str):
+    """검색용 정규화: NFKC, 소문자화(casefold), 공백·문장부호 제거.
+
+    NFKC 는 전각 문자를 반각으로("ＣＣＴＶ" → "CCTV"), 조합형(NFD) 한글을 완성형으로 바꿉니다.
+    예: "안전 모" → "안전모", "유도·신호자" → "유도신호자"
+    """
+    return "".join(ch for ch in _fold(text) if unicodedata.category(ch)[0] not in "ZPC")
+
+
+def normalize_words(text: str):
+    """normalize_text 와 같되, 지운 공백·문장부호 자리를 공백 하나로 남깁니다. (단어 경계 보존)
+
+    예: "물 티슈" → "물 티슈", "캡(모자)" → "캡 모자". 공백을 지우면 normalize_text 결과와 같습니다.
+    """
+    return " ".join("".join(
+        " " if unicodedata.category(ch)[0] in "ZPC" else ch for ch in _fold(text)
+    ).split())
+
+
+def _is_continuation(ch: str):
+    """앞 글자와 합쳐져 정규화되는 글자(결합 문자, 조합형 한글 중성·종성)인지 확인합니다."""
+    return (
+        unicodedata.combining(ch) != 0
+        or "\u1160" <= ch <= "\u11ff"
+        or "\ud7b0" <= ch <= "\ud7ff"
+        or unicodedata.category(ch) in ("Mn", "Mc", "Me")
+    )
+
+
+def normalize_with_offsets(text: str):
+    """normalize_text 와 같은 결과와 함께, 정규화된 글자마다 원문 구간 (시작, 끝) 목록을 반환합니다.
+
+    원문을 기저 글자 + 뒤따르는 결합 글자 단위로 나누어 각각 정규화하므로,
+    정규화된 문자열에서 찾은 위치를 원문 위치로 되돌릴 수 있습니다.
+    """
+    chars = []
+    spans = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = start + 1
+        if not _COMPAT_JAMO_RUN.match(text[start]):
+            while end < length and _is_continuation(text[end]):
+                end += 1
+        for ch in normalize_text(text[start:end]):
+            chars.append(ch)
+            spans.append((start, end))
+        start = end
+    return "".join(chars), spans
+
+
+# ──────────────────────────────────────────────
+# 선형 검색 (기준 구현)
+# ──────────────────────────────────────────────
+def scan_documents(documents, query: str):
+    """모든 문서를 순회하며 query 를 부분 문자열로 포함하는 문서 번호를 반환합니다."""
+    return [
+        doc_id for doc_id, texts in enumerate(documents)
+        if any(query in text for text in texts)
+    ]
+
+
+# ──────────────────────────────────────────────
+# 관련도 순위
+# ──────────────────────────────────────────────
+# 필드 가중치(물품명 > 키워드) × 일치 유형 점수. 물품명 완전 일치 > 물품명 접두 일치 > 키워드 일치 순
+NAME_WEIGHT = 1.0
+KEYWORD_WEIGHT = 0.5
+MATCH_SCORES = {"exact": 100, "prefix": 70, "contains": 40}
+# 검색어가 차지하는 비율만큼 가산 (긴 문자열일수록 감점)
+LENGTH_BONUS = 10
+
+
+def score_document(texts, query: str):
+    """문서(물품명, 키워드...)가 query 와 얼마나 잘 맞는지 점수를 매깁니다."""
+    best = 0.0
+    for field, text in enumerate(texts):
+        if text == query:
+            match = MATCH_SCORES["exact"]
+        elif text.startswith(query):
+            match = MATCH_SCORES["prefix"]
+        elif query in text:
+            match = MATCH_SCORES["contains"]
+        else:
+            continue
+        weight = NAME_WEIGHT if field == 0 else KEYWORD_WEIGHT
+        score = weight * match + LENGTH_BONUS * len(query) / len(text)
+        if score > best:
+            best = score
+    return best
+
+
+def rank_documents(documents, doc_ids, terms, limit: int = None, hangul=None):
+    """doc_ids 를 관련도 순으로 정렬합니다. limit 이 있으면 힙으로 상위 limit 개만 고릅니다.
+
+    terms: 검색어 목록. 문서 점수는 검색어별 점수의 합이며, 점수가 같으면
+    카탈로그 순서(문서 번호)를 따릅니다.
+    hangul: HangulIndex. 주어지면 문서에 그대로 없는 초성·자모 검색어("ㅇㅈㅁ", "안전ㅁ")도 채점합니다.
+    """
+    def key(doc_id):
+        texts = documents[doc_id]
+        total = 0.0
+        for term in terms:
+            score = score_document(texts, term)
+            if not score and hangul is not None:
+                score = hangul.score(doc_id, term)
+            total += score
+        return -total, doc_id
+
+    if limit is None:
+        return sorted(doc_ids, key=key)
+    return heapq.nsmallest(limit, doc_ids, key=key)
+
+
+# ──────────────────────────────────────────────
+# 다중 검색어 (AND / OR / NOT)
+# ──────────────────────────────────────────────
+OR_OPERATORS = {"OR", "|"}
+NOT_OPERATORS = {"NOT"}
+
+
+def parse_query(query: str):
+    """검색어를 OR 로 묶인 (포함할 검색어 목록, 제외할 검색어 목록) 그룹으로 나눕니다.
+
+    공백으로 구분된 검색어는 AND, "OR" 또는 "|" 는 OR, "NOT" 또는 "-" 접두는 제외입니다.
+    예: "안전 장갑 OR 마스크 -방독" → [(["안전", "장갑"], []), (["마스크"], ["방독"])]
+    연산자는 대문자로만 인식하며, 검색어는 normalize_text 로 정규화합니다.
+    """
+    groups = [([], [])]
+    negate = False
+    for token in query.split():
+        if token in OR_OPERATORS:
+            groups.append(([], []))
+            negate = False
+            continue
+        if token in NOT_OPERATORS:
+            negate = True
+            continue
+        if token.startswith("-") and len(token) > 1:
+            token, negate = token[1:], True
+        term = normalize_text(token)
+        if term:
+            groups[-1][1 if negate else 0].append(term)
+        negate = False
+    return [(positives, negatives) for positives, negatives in groups if positives]
+
+
+def intersect_postings(postings):
+    """오름차순 문서 번호 목록들의 교집합을 가장 짧은 목록부터 구합니다."""
+    postings = sorted(postings, key=len)
+    if not postings or not postings[0]:
+        return set()
+    ids = set(postings[0])
+    for other in postings[1:]:
+        ids.intersection_update(other)
+        if not ids:
+            break
+    return ids
+
+
+def evaluate_query(groups, lookup):
+    """parse_query 결과를 검색어별 문서 목록(lookup)으로 평가해 문서 번호를 오름차순으로 반환합니다."""
+    if len(groups) == 1 and len(groups[0][0]) == 1 and not groups[0][1]:
+        return lookup(groups[0][0][0])
+
+    postings = {}
+    matched = set()
+    for positives, negatives in groups:
+        for term in (*positives, *negatives):
+            if term not in postings:
+                postings[term] = lookup(term)
+        ids = intersect_postings([postings[term] for term in positives])
+        for term in negatives:
+            ids.difference_update(postings[term])
+        matched |= ids
+    return sorted(matched)
+
+
+# ──────────────────────────────────────────────
+# 동의어·별칭 (전이 폐포)
+# ──────────────────────────────────────────────
+def build_alias_table(edges, documents):
+    """동의어 그래프의 연결 요소마다 전이 폐포를 구해 {정규화된 별칭: 문서 번호 튜플} 표를 만듭니다.
+
+    edges: (용어, 용어) 쌍. 같은 연결 요소에 있는 용어는 모두 같은 물품을 가리키며,
+    물품은 문서의 물품명·키워드와 정확히 같은 용어로 연결됩니다.
+    검색 시에는 그래프 탐색 없이 이 표를 한 번 조회하면 됩니다.
+    """
+    parent = {}
+
+    def find(term):
+        parent.setdefault(term, term)
+        while parent[term] != term:
+            parent[term] = parent[parent[term]]
+            term = parent[term]
+        return term
+
+    for a, b in edges:
+        root_a, root_b = find(normalize_text(a)), find(normalize_text(b))
+        if root_a != root_b:
+            parent[root_a] = root_b
+
+    term_docs = {}
+    for doc_id, texts in enumerate(documents):
+        for text in texts:
+            if text in parent:
+                term_docs.setdefault(text, set()).add(doc_id)
+
+    component_docs = {}
+    for term, doc_ids in term_docs.items():
+        component_docs.setdefault(find(term), set()).update(doc_ids)
+    return {
+        term: tuple(sorted(component_docs[find(term)]))
+        for term in parent if component_docs.get(find(term))
+    }
+
+
+# ──────────────────────────────────────────────
+# 다중 키워드 스캔 (Aho-Corasick)
+# ──────────────────────────────────────────────
+# 이 글자 수 이하의 키워드는 단어 경계에 걸칠 때만 인정합니다. (KeywordScanner.scan_words)
+SHORT_KEYWORD = 2
+
+
+def _script(ch: str):
+    """글자 종류: 0 한글, 1 숫자, 2 그 밖의 문자"""
+    if "\uac00" <= ch <= "\ud7a3" or "\u1100" <= ch <= "\u11ff" or "\u3131" <= ch <= "\u318e":
+        return 0
+    return 1 if ch.isdigit() else 2
+
+
+def _word_end(text: str, pos: int, breaks):
+    """text 의 pos 자리가 단어 경계인지 확인합니다. (문장 끝, 지운 공백·문장부호, 한글·숫자·영문이 바뀌는 자리)"""
+    return pos in breaks or _script(text[pos - 1]) != _script(text[pos])
+
+
+class KeywordScanner:
+    """모든 키워드를 하나의 Aho-Corasick 오토마톤으로 묶어 긴 문장에서 한 번에 찾습니다.
+
+    검색(search)은 "검색어가 키워드의 일부인가"를 묻지만, 구매 내역 한 줄
+    ("3M 방진마스크 KF94 외 2건 / 코팅장갑 10타")은 반대로 여러 키워드를 포함합니다.
+    스캔 시간은 문장 길이 + 찾은 개수에 비례하며 키워드 수와 무관합니다.
+    """
+
+    def __init__(self, patterns):
+        """patterns: (정규화된 키워드, 문서 번호) 쌍의 목록"""
+        self.keywords = []
+        self.keyword_docs = []
+        goto = [{}]
+        own = [[]]
+        keyword_ids = {}
+        for keyword, doc_id in patterns:
+            if not keyword:
+                continue
+            if keyword not in keyword_ids:
+                keyword_ids[keyword] = len(self.keywords)
+                self.keywords.append(keyword)
+                self.keyword_docs.append([])
+                state = 0
+                for ch in keyword:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = goto[state][ch] = len(goto)
+                        goto.append({})
+                        own.append([])
+                    state = nxt
+                own[state].append(keyword_ids[keyword])
+            docs = self.keyword_docs[keyword_ids[keyword]]
+            if doc_id not in docs:
+                docs.append(doc_id)
+        self.keyword_docs = [tuple(docs) for docs in self.keyword_docs]
+
+        # 너비 우선으로 실패 링크를 잇고, 각 상태의 출력에 실패 링크 쪽 출력을 합칩니다.
+        fail = [0] * len(goto)
+        output = [tuple(ids) for ids in own]
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                link = fail[state]
+                while link and ch not in goto[link]:
+                    link = fail[link]
+                fail[nxt] = goto[link].get(ch, 0) if goto[link].get(ch) != nxt else 0
+                output[nxt] = output[nxt] + output[fail[nxt]]
+        self.goto = goto
+        self.fail = fail
+        self.output = output
+
+    def scan(self, text: str):
+        """정규화된 text 에서 찾은 (시작, 끝, 키워드 번호) 를 끝 위치 순으로 반환합니다. (겹침 포함)"""
+        goto, fail, output = self.goto, self.fail, self.output
+        keywords = self.keywords
+        matches = []
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for keyword_id in output[state]:
+                matches.append((end - len(keywords[keyword_id]), end, keyword_id))
+        return matches
+
+    def scan_words(self, words: str):
+        """normalize_words 로 정규화한 문장을 공백을 지우고 스캔하되, 짧은 키워드는 단어 경계의 일치만 남깁니다.
+
+        위치는 공백을 지운 문장(= normalize_text 결과) 기준입니다. 짧은 키워드는 더 긴 단어의 일부로
+        잘못 걸리기 쉬우므로("캡모자"의 "캡", "물티슈"의 "물", "노트북"의 "노트") 한 글자 키워드는
+        단어 전체여야 하고, SHORT_KEYWORD 글자 이하 키워드는 단어 끝에서 끝나야 합니다.
+        (한국어 복합어는 뒤쪽이 중심어이므로 "안전헬멧"의 "헬멧", "방역소독"의 "소독"은 인정)
+        """
+        text = words.replace(" ", "")
+        matches = self.scan(text)
+        keywords = self.keywords
+        if all(len(keywords[keyword_id]) > SHORT_KEYWORD for _, _, keyword_id in matches):
+            return matches
+        breaks = {0, len(text)}
+        pos = 0
+        for word in words.split(" "):
+            pos += len(word)
+            breaks.add(pos)
+        return [
+            (start, end, keyword_id) for start, end, keyword_id in matches
+            if len(keywords[keyword_id]) > SHORT_KEYWORD
+            or (_word_end(text, end, breaks) and (end - start > 1 or _word_end(text, start, breaks)))
+        ]
+
+
+# ──────────────────────────────────────────────
+# 속성 필터 (비트맵 facet)
+# ──────────────────────────────────────────────
+class FacetIndex:
+    """속성 값마다 문서 집합을 비트맵(int)으로 미리 만들어 두는 필터 엔진입니다.
+
+    같은 속성 안의 값들은 OR, 서로 다른 속성은 AND 로 결합하며 모두 비트 연산입니다.
+    """
+
+    def __init__(self, facets):
+        """facets: {속성명: 문서 번호 순서의 값 목록}"""
+        self.size = 0
+        self.bitmaps = {}
+        for facet, values in facets.items():
+            bitmaps = {}
+            for doc_id, value in enumerate(values):
+                bitmaps[value] = bitmaps.get(value, 0) | (1 << doc_id)
+                self.size = max(self.size, doc_id + 1)
+            self.bitmaps[facet] = bitmaps
+        self.all = (1 << self.size) - 1
+
+    def select(self, **filters):
+        """조건에 맞는 문서 비트맵을 반환합니다. 값이 None 인 조건은 무시합니다.
+
+        예: select(status=["allowed"], category=[2, 3])
+        """
+        selected = self.all
+        for facet, values in filters.items():
+            if values is None:
+                continue
+            bitmaps = self.bitmaps[facet]
+            mask = 0
+            for value in values:
+                mask |= bitmaps.get(value, 0)
+            selected &= mask
+        return selected
+
+    def counts(self, facet: str, **filters):
+        """facet 을 제외한 나머지 조건을 적용했을 때 facet 값별 문서 수를 반환합니다."""
+        others = {name: values for name, values in filters.items() if name != facet}
+        selected = self.select(**others)
+        return {value: (bitmap & selected).bit_count() for value, bitmap in self.bitmaps[facet].items()}
+
+    @staticmethod
+    def ids(bitmap: int):
+        """비트맵에 포함된 문서 번호를 오름차순으로 반환합니다."""
+        ids = []
+        while bitmap:
+            low = bitmap & -bitmap
+            ids.append(low.bit_length() - 1)
+            bitmap ^= low
+        return ids
+
+
+# ──────────────────────────────────────────────
+# 문자 바이그램 역색인
+# ──────────────────────────────────────────────
+def _grams(text: str):
+    """문자열의 1-gram 과 2-gram 을 반환합니다. (한글은 음절 단위)"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class BigramIndex:
+    """문자 바이그램 역색인으로 후보 문서를 고른 뒤 부분 문자열 검사로 확정합니다.
+
+    한글 음절은 하나의 코드 포인트이므로 "안전모" 는 "안전", "전모" 두 개의
+    바이그램으로 색인됩니다. 한 글자 검색어는 1-gram 목록을 그대로 사용합니다.
+    """
+
+    def __init__(self, documents):
+        self.documents = [tuple(texts) for texts in documents]
+        postings = {}
+        for doc_id, texts in enumerate(self.documents):
+            for text in texts:
+                for gram in _grams(text):
+                    ids = postings.setdefault(gram, [])
+                    if ids[-1:] != [doc_id]:
+                        ids.append(doc_id)
+        self.postings = postings
+
+    def candidates(self, query: str):
+        """query 의 모든 바이그램을 포함하는 후보 문서 번호를 오름차순으로 반환합니다."""
+        if len(query) == 1:
+            return self.postings.get(query, [])
+        grams = {query[i:i + 2] for i in range(len(query) - 1)}
+        return sorted(intersect_postings(self.postings.get(gram, []) for gram in grams))
+
+    def search(self, query: str):
+        """query 를 부분 문자열로 포함하는 문서 번호를 오름차순으로 반환합니다."""
+        if not query:
+            return []
+        documents = self.documents
+        return [
+            doc_id for doc_id in self.candidates(query)
+            if any(query in text for text in documents[doc_id])
+        ]
+
+
+# ──────────────────────────────────────────────
+# 일반화 접미사 오토마톤
+# ──────────────────────────────────────────────
+class SuffixAutomaton:
+    """모든 문서 문자열의 부분 문자열을 인식하는 일반화 접미사 오토마톤입니다.
+
+    각 상태에는 그 상태가 나타내는 부분 문자열을 포함하는 문서 번호를 미리
+    계산해 두므로, 검색은 query 길이만큼 전이를 따라가는 것으로 끝나며
+    카탈로그 크기와 무관합니다.
+    """
+
+    def __init__(self, documents):
+        self.transitions = [{}]
+        self.links = [-1]
+        self.lengths = [0]
+        documents = [tuple(texts) for texts in documents]
+        for texts in documents:
+            for text in texts:
+                last = 0
+                for ch in text:
+                    last = self._extend(last, ch)
+
+        # 문서별로 모든 접두사 상태에서 접미사 링크를 따라 올라가며 문서 번호를 기록
+        doc_ids = [[] for _ in self.lengths]
+        marked = [-1] * len(self.lengths)
+        for doc_id, texts in enumerate(documents):
+            for text in texts:
+                state = 0
+                for ch in text:
+                    state = self.transitions[state][ch]
+                    walk = state
+                    while walk > 0 and marked[walk] != doc_id:
+                        marked[walk] = doc_id
+                        doc_ids[walk].append(doc_id)
+                        walk = self.links[walk]
+        self.doc_ids = [tuple(ids) for ids in doc_ids]
+
+    def _new_state(self, length: int, transitions=None, link: int = -1):
+        self.transitions.append(dict(transitions or {}))
+        self.links.append(link)
+        self.lengths.append(length)
+        return len(self.lengths) - 1
+
+    def _clone(self, p: int, q: int, ch: str):
+        """상태 q 를 길이 lengths[p] + 1 로 분할한 복제 상태를 만듭니다."""
+        transitions, links = self.transitions, self.links
+        clone = self._new_state(self.lengths[p] + 1, transitions[q], links[q])
+        while p != -1 and transitions[p].get(ch) == q:
+            transitions[p][ch] = clone
+            p = links[p]
+        links[q] = clone
+        return clone
+
+    def _extend(self, last: int, ch: str):
+        transitions, links, lengths = self.transitions, self.links, self.lengths
+        # 다른 문자열에서 이미 같은 전이가 만들어진 경우 (일반화 오토마톤)
+        if ch in transitions[last]:
+            q = transitions[last][ch]
+            if lengths[q] == lengths[last] + 1:
+                return q
+            return self._clone(last, q, ch)
+
+        cur = self._new_state(lengths[last] + 1)
+        p = last
+        while p != -1 and ch not in transitions[p]:
+            transitions[p][ch] = cur
+            p = links[p]
+        if p == -1:
+            links[cur] = 0
+        else:
+            q = transitions[p][ch]
+            if lengths[p] + 1 == lengths[q]:
+                links[cur] = q
+            else:
+                links[cur] = self._clone(p, q, ch)
+        return cur
+
+    def search(self, query: str):
+        """query 를 부분 문자열로 포함하는 문서 번호를 오름차순 튜플로 반환합니다."""
+        if not query:
+            return ()
+        transitions = self.transitions
+        state = 0
+        for ch in query:
+            state = transitions[state].get(ch)
+            if state is None:
+                return ()
+        return self.doc_ids[state]
+
+
+# ──────────────────────────────────────────────
+# 한글 자모·초성 색인
+# ──────────────────────────────────────────────
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = ("", *"ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ")
+
+# 겹받침·이중모음은 자판 입력 순서대로 나눕니다. (예: ㄺ → ㄹㄱ, ㅘ → ㅗㅏ)
+_COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ",
+    "ㄽ": "ㄹㅅ", "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+
+
+def decompose_jamo(text: str):
+    """한글 음절을 호환 자모 열로 풀어 씁니다. (예: "안전모" → "ㅇㅏㄴㅈㅓㄴㅁㅗ")"""
+    out = []
+    for ch in text:
+        code = ord(ch) - _HANGUL_BASE
+        if 0 <= code <= _HANGUL_LAST - _HANGUL_BASE:
+            cho, rest = divmod(code, 588)
+            jung, jong = divmod(rest, 28)
+            out.append(_CHOSEONG[cho])
+            out.append(_COMPOUND_JAMO.get(_JUNGSEONG[jung], _JUNGSEONG[jung]))
+            out.append(_COMPOUND_JAMO.get(_JONGSEONG[jong], _JONGSEONG[jong]))
+        else:
+            out.append(_COMPOUND_JAMO.get(ch, ch))
+    return "".join(out)
+
+
+def choseong(text: str):
+    """한글 음절을 초성으로 바꿉니다. 한글이 아닌 문자는 그대로 둡니다. (예: "안전모" → "ㅇㅈㅁ")"""
+    out = []
+    for ch in text:
+        code = ord(ch) - _HANGUL_BASE
+        if 0 <= code <= _HANGUL_LAST - _HANGUL_BASE:
+            out.append(_CHOSEONG[code // 588])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def is_choseong_query(query: str):
+    """검색어가 초성(자음)으로만 이루어졌는지 확인합니다."""
+    return bool(query) and all(ch in _CHOSEONG for ch in query)
+
+
+class HangulIndex:
+    """자모 분해형·초성형 문자열 위의 접미사 오토마톤 색인입니다.
+
+    "ㅇㅈㅁ" 같은 초성 검색어는 초성 색인으로, "안전ㅁ" 처럼 음절 입력이 끝나지
+    않은 검색어는 자모 색인으로 찾습니다. 분해형은 색인 생성 시 한 번만 계산합니다.
+    """
+
+    def __init__(self, documents):
+        documents = [tuple(texts) for texts in documents]
+        self.jamo_documents = [tuple(decompose_jamo(t) for t in texts) for texts in documents]
+        self.choseong_documents = [tuple(choseong(t) for t in texts) for texts in documents]
+        self.jamo = SuffixAutomaton(self.jamo_documents)
+        self.choseong = SuffixAutomaton(self.choseong_documents)
+
+    def search(self, query: str):
+        """초성 또는 자모 단위로 query 를 포함하는 문서 번호를 오름차순 튜플로 반환합니다."""
+        if is_choseong_query(query):
+            return self.choseong.search(query)
+        return self.jamo.search(decompose_jamo(query))
+
+    def score(self, doc_id: int, query: str):
+        """호환 자모가 섞인 query 를 초성형·자모 분해형 문서와 비교해 score_document 점수를 매깁니다.
+
+        자모가 없는 검색어는 0 입니다. (음절 검색어는 원래 문서로 채점)
+        """
+        if not _COMPAT_JAMO_RUN.search(query):
+            return 0.0
+        if is_choseong_query(query):
+            return score_document(self.choseong_documents[doc_id], query)
+        return score_document(self.jamo_documents[doc_id], decompose_jamo(query))
+
+
+# ──────────────────────────────────────────────
+# 자동완성 (접두사 트라이)
+# ──────────────────────────────────────────────
+class PrefixTrie:
+    """자모 분해형 접두사 트라이입니다. 노드마다 상위 k개 추천어를 생성 시 미리 계산해 둡니다.
+
+    자모 단위이므로 입력 중인 "안전ㅁ", "안저" 도 "안전모" 의 접두사로 인식되며,
+    자동완성은 접두사 길이만큼 노드를 따라간 뒤 저장된 추천어를 돌려주는 것으로 끝납니다.
+    """
+
+    def __init__(self, entries, k: int = 8):
+        """entries: (용어, 가중치) 쌍의 목록. 가중치가 크고 짧은 용어가 먼저 추천됩니다."""
+        self.k = k
+        self.children = [{}]
+        terminals = [[]]
+        seen = set()
+        for term, weight in entries:
+            key = normalize_text(term)
+            if key in seen:
+                continue
+            seen.add(key)
+            node = 0
+            for ch in decompose_jamo(key):
+                child = self.children[node].get(ch)
+                if child is None:
+                    child = len(self.children)
+                    self.children[node][ch] = child
+                    self.children.append({})
+                    terminals.append([])
+                node = child
+            terminals[node].append((-weight, len(term), term))
+
+        # 자식 노드가 항상 부모보다 뒤에 만들어지므로 역순으로 올라가며 상위 k개를 합칩니다.
+        ranked = [None] * len(self.children)
+        for node in range(len(self.children) - 1, -1, -1):
+            candidates = list(terminals[node])
+            for child in self.children[node].values():
+                candidates.extend(ranked[child])
+            ranked[node] = heapq.nsmallest(k, candidates)
+        self.top = [tuple(term for _, _, term in entries) for entries in ranked]
+
+    def complete(self, prefix: str):
+        """prefix 로 시작하는 상위 k개 용어를 튜플로 반환합니다."""
+        node = 0
+        for ch in decompose_jamo(normalize_text(prefix)):
+            node = self.children[node].get(ch)
+            if node is None:
+                return ()
+        return self.top[node]
+
+
+# ──────────────────────────────────────────────
+# 오타 교정 (SymSpell 방식 삭제 사전)
+# ──────────────────────────────────────────────
+def _deletes(text: str, max_distance: int):
+    """text 에서 최대 max_distance 개 문자를 지운 모든 문자열을 반환합니다. (자기 자신 포함)"""
+    found = {text}
+    frontier = {text}
+    for _ in range(max_distance):
+        frontier = {
+            word[:i] + word[i + 1:]
+            for word in frontier if len(word) > 1
+            for i in range(len(word))
+        } - found
+        found |= frontier
+    return found
+
+
+def edit_distance(a: str, b: str, max_distance: int):
+    """인접 전치를 포함한 편집 거리(OSA)를 반환합니다. max_distance 초과 시 max_distance + 1."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = ca != cb
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return min(prev[-1], max_distance + 1)
+
+
+class FuzzyIndex:
+    """자모 단위 SymSpell 삭제 사전으로 오타가 섞인 검색어에 가까운 용어를 찾습니다.
+
+    용어마다 최대 max_distance 개 자모를 지운 변형을 미리 사전에 넣어 두고,
+    검색 시에는 검색어의 삭제 변형만 사전에서 찾아 편집 거리로 확정합니다.
+    """
+
+    def __init__(self, terms, max_distance: int = 2):
+        """terms: (용어, 문서 번호) 쌍의 목록"""
+        self.max_distance = max_distance
+        self.terms = []
+        self.term_docs = []
+        self.jamo_terms = []
+        term_ids = {}
+        for term, doc_id in terms:
+            key = normalize_text(term)
+            if key not in term_ids:
+                term_ids[key] = len(self.terms)
+                self.terms.append(term)
+                self.term_docs.append([])
+                self.jamo_terms.append(decompose_jamo(key))
+            docs = self.term_docs[term_ids[key]]
+            if doc_id not in docs:
+                docs.append(doc_id)
+
+        deletes = {}
+        for term_id, jamo in enumerate(self.jamo_terms):
+            for variant in _deletes(jamo, max_distance):
+                deletes.setdefault(variant, []).append(term_id)
+        self.deletes = deletes
+
+    def lookup(self, query: str, max_distance: int = None, skip_containing: bool = False):
+        """query 와 자모 편집 거리가 max_distance 이하인 (용어, 거리, 문서 번호 목록) 을 가까운 순으로 반환합니다.
+
+        skip_containing: query 를 이미 포함하는 용어(정확 검색에서 찾을 수 있는 용어)는 제외
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        max_distance = min(max_distance, self.max_distance)
+        jamo = decompose_jamo(normalize_text(query))
+        matches = {}
+        for variant in _deletes(jamo, max_distance):
+            for term_id in self.deletes.get(variant, ()):
+                if term_id not in matches:
+                    if skip_containing and jamo in self.jamo_terms[term_id]:
+                        matches[term_id] = max_distance + 1
+                        continue
+                    matches[term_id] = edit_distance(jamo, self.jamo_terms[term_id], max_distance)
+        found = [
+            (distance, len(self.terms[term_id]), term_id)
+            for term_id, distance in matches.items() if distance <= max_distance
+        ]
+        return [
+            (self.terms[term_id], distance, self.term_docs[term_id])
+            for distance, _, term_id in sorted(found)
+        ]
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+안전관리비 물품 카탈로그 저장소
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+ITEMS·PROHIBITED_ITEMS(dict 목록)를 열(column) 단위 배열로 옮겨 담은 저장소입니다.
+문자열은 intern 하여 공유하고, 상태와 항목 번호는 정수 배열로 저장합니다.
+기존 dict 형태가 필요한 코드에는 ItemView 로 같은 키를 제공합니다.
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping
+from enum import IntEnum
+
+from safety_cost_search import normalize_text
+
+
+class Status(IntEnum):
+    """물품 사용 가능 여부"""
+    ALLOWED = 0
+    CONDITIONAL = 1
+    PROHIBITED = 2
+
+    @property
+    def label(self):
+        """ITEMS 의 status 문자열 ("allowed" | "conditional" | "prohibited")"""
+        return self.name.lower()
+
+
+_STATUS_BY_LABEL = {status.label: status for status in Status}
+
+# category 가 None(사용 불가 항목)인 경우의 항목 번호
+NO_CATEGORY = -1
+
+# 일치하는 물품이 없는 경우의 상태·문서 번호 (일괄 분류 결과의 열 값)
+NO_STATUS = -1
+NO_ITEM = -1
+
+
+class CatalogStore:
+    """문서 번호(ITEMS 다음 PROHIBITED_ITEMS 순서)별 열 배열 저장소입니다."""
+
+    __slots__ = ("names", "categories", "statuses", "keywords", "details")
+
+    def __init__(self, items, prohibited_items):
+        intern = sys.intern
+        self.names = []
+        self.categories = array("b")
+        self.statuses = array("B")
+        self.keywords = []
+        self.details = []  # 사용 가능·조건부는 note, 사용 불가는 reason
+        for item in items:
+            self._append(item, _STATUS_BY_LABEL[item["status"]], item["note"], intern)
+        for item in prohibited_items:
+            self._append(item, Status.PROHIBITED, item["reason"], intern)
+
+    def _append(self, item, status: Status, detail: str, intern):
+        category = item["category"]
+        self.names.append(intern(item["name"]))
+        self.categories.append(NO_CATEGORY if category is None else category)
+        self.statuses.append(status)
+        self.keywords.append(tuple(intern(kw) for kw in item["keywords"]))
+        self.details.append(intern(detail))
+
+    def __len__(self):
+        return len(self.names)
+
+    def status(self, doc_id: int):
+        """문서의 상태 문자열 ("allowed" | "conditional" | "prohibited")"""
+        return Status(self.statuses[doc_id]).label
+
+    def category(self, doc_id: int):
+        """문서의 항목 번호 (사용 불가 항목은 None)"""
+        category = self.categories[doc_id]
+        return None if category == NO_CATEGORY else category
+
+    def documents(self):
+        """검색 색인용 문서 목록 (정규화된 물품명, 정규화된 키워드...)"""
+        return [
+            (normalize_text(name), *(normalize_text(kw) for kw in keywords))
+            for name, keywords in zip(self.names, self.keywords)
+        ]
+
+    def view(self, doc_id: int):
+        """문서를 ITEMS·PROHIBITED_ITEMS 와 같은 키의 읽기 전용 dict 형태로 반환합니다."""
+        return ItemView(self, doc_id)
+
+    def views(self):
+        """모든 문서의 ItemView 를 문서 번호 순으로 반환합니다."""
+        return [ItemView(self, doc_id) for doc_id in range(len(self))]
+
+
+class ItemView(Mapping):
+    """CatalogStore 의 문서 하나를 기존 dict 항목처럼 읽을 수 있게 하는 호환 어댑터입니다."""
+
+    __slots__ = ("_store", "_doc_id")
+
+    _ITEM_KEYS = ("name", "category", "status", "keywords", "note")
+    _PROHIBITED_KEYS = ("name", "category", "reason", "keywords")
+
+    def __init__(self, store: CatalogStore, doc_id: int):
+        self._store = store
+        self._doc_id = doc_id
+
+    def _keys(self):
+        if self._store.statuses[self._doc_id] == Status.PROHIBITED:
+            return self._PROHIBITED_KEYS
+        return self._ITEM_KEYS
+
+    def __getitem__(self, key):
+        if key not in self._keys():
+            raise KeyError(key)
+        store, doc_id = self._store, self._doc_id
+        if key == "name":
+            return store.names[doc_id]
+        if key == "category":
+            return store.category(doc_id)
+        if key == "status":
+            return store.status(doc_id)
+        if key == "keywords":
+            return list(store.keywords[doc_id])
+        return store.details[doc_id]
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f"ItemView({dict(self)!r})"